@@ -0,0 +1,80 @@
+"""
+Compares the latency and placement quality of the static CPU allocators.
+
+A trace of static workload adds and removes, recorded or generated as by benchmarks.ip_cache_hit_rate, is replayed
+against a fresh allocator of each kind.  The distribution of the time spent in assign_threads and free_threads is
+reported next to the mean isolation violation counts after each event.
+
+    $ python -m benchmarks.allocator_comparison --events 200
+    $ python -m benchmarks.allocator_comparison --trace events.jsonl --package-count 2 --cores-per-package 24
+"""
+import logging
+import random
+import time
+
+import click
+import numpy as np
+
+from benchmarks.ip_cache_hit_rate import generate_trace, read_trace
+from titus_isolate import log
+from titus_isolate.allocate.best_fit_cpu_allocator import BestFitCpuAllocator
+from titus_isolate.allocate.greedy_cpu_allocator import GreedyCpuAllocator
+from titus_isolate.allocate.hierarchical_cpu_allocator import HierarchicalCpuAllocator
+from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator
+from titus_isolate.docker.constants import STATIC
+from titus_isolate.isolate.detect import get_cross_package_violation_count, get_shared_core_violation_count
+from titus_isolate.model.processor.config import get_cpu
+from titus_isolate.model.workload import Workload
+
+ALLOCATORS = [GreedyCpuAllocator, BestFitCpuAllocator, IntegerProgramCpuAllocator, HierarchicalCpuAllocator]
+PERCENTILES = [50, 99, 100]
+
+
+def replay(events, shape, allocator_class):
+    cpu = get_cpu(*shape)
+    allocator = allocator_class(cpu)
+    durations = []
+    cross_package_counts = []
+    shared_core_counts = []
+
+    for event in events:
+        start = time.perf_counter()
+        if event["action"] == "add":
+            allocator.assign_threads(Workload(event["id"], event["size"], STATIC))
+        else:
+            allocator.free_threads(event["id"])
+        durations.append(time.perf_counter() - start)
+
+        cross_package_counts.append(get_cross_package_violation_count(cpu))
+        shared_core_counts.append(get_shared_core_violation_count(cpu))
+
+    return durations, np.mean(cross_package_counts), np.mean(shared_core_counts)
+
+
+@click.command()
+@click.option('--trace', default=None, help="A recorded trace to replay instead of a generated one")
+@click.option('--events', default=200, help="The number of events to generate (default: 200)")
+@click.option('--package-count', default=2, help="The number of packages (default: 2)")
+@click.option('--cores-per-package', default=8, help="The number of cores per package (default: 8)")
+@click.option('--threads-per-core', default=2, help="The number of threads per core (default: 2)")
+@click.option('--seed', default=0, help="The random seed used to generate the trace (default: 0)")
+def main(trace, events, package_count, cores_per_package, threads_per_core, seed):
+    log.setLevel(logging.WARNING)
+    shape = (package_count, cores_per_package, threads_per_core)
+
+    if trace is None:
+        trace_events = generate_trace(events, package_count * cores_per_package * threads_per_core, random.Random(seed))
+    else:
+        trace_events = read_trace(trace)
+
+    print("{:>28} {:>11} {:>11} {:>11} {:>10} {:>12}".format(
+        "allocator", "p50_us", "p99_us", "max_us", "cross_pkg", "shared_core"))
+    for allocator_class in ALLOCATORS:
+        durations, cross_package_count, shared_core_count = replay(trace_events, shape, allocator_class)
+        percentiles = np.percentile(np.array(durations) * 1e6, PERCENTILES)
+        print("{:>28} {:>11.1f} {:>11.1f} {:>11.1f} {:>10.2f} {:>12.2f}".format(
+            allocator_class.__name__, *percentiles, cross_package_count, shared_core_count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Measures how GreedyCpuAllocator latency scales with the number of threads on the CPU.
+
+Each run fills an empty CPU with randomly sized static workloads, frees half of them and fills it again, timing every
+assign_threads and free_threads call.
+
+    $ python -m benchmarks.greedy_allocation --runs 20
+"""
+import logging
+import random
+import time
+
+import click
+
+from titus_isolate import log
+from titus_isolate.allocate.greedy_cpu_allocator import GreedyCpuAllocator
+from titus_isolate.docker.constants import STATIC
+from titus_isolate.model.processor.config import get_cpu
+from titus_isolate.model.workload import Workload
+
+SHAPES = [(1, 4, 2), (2, 4, 2), (2, 16, 2), (2, 24, 2), (2, 48, 2), (4, 48, 2)]
+REQUEST_SIZES = [1, 2, 4, 8, 16]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run(shape, rng):
+    cpu = get_cpu(*shape)
+    allocator = GreedyCpuAllocator(cpu)
+    durations = []
+    workload_ids = []
+
+    def fill():
+        while cpu.get_empty_thread_count() > 0:
+            size = min(rng.choice(REQUEST_SIZES), cpu.get_empty_thread_count())
+            workload = Workload(str(len(durations)), size, STATIC)
+            start = time.perf_counter()
+            allocator.assign_threads(workload)
+            durations.append(time.perf_counter() - start)
+            workload_ids.append(workload.get_id())
+
+    fill()
+    rng.shuffle(workload_ids)
+    for workload_id in workload_ids[:len(workload_ids) // 2]:
+        start = time.perf_counter()
+        allocator.free_threads(workload_id)
+        durations.append(time.perf_counter() - start)
+    fill()
+
+    return durations
+
+
+@click.command()
+@click.option('--runs', default=10, help="The number of fill/free/fill cycles per CPU shape (default: 10)")
+@click.option('--seed', default=0, help="The random seed used to pick request sizes (default: 0)")
+def main(runs, seed):
+    log.setLevel(logging.WARNING)
+    rng = random.Random(seed)
+
+    print("{:>8} {:>8} {:>12} {:>12} {:>12}".format("shape", "threads", "calls", "mean_us", "p99_us"))
+    for shape in SHAPES:
+        durations = []
+        for _ in range(runs):
+            durations += run(shape, rng)
+
+        print("{:>8} {:>8} {:>12} {:>12.1f} {:>12.1f}".format(
+            "x".join([str(s) for s in shape]),
+            shape[0] * shape[1] * shape[2],
+            len(durations),
+            1e6 * sum(durations) / len(durations),
+            1e6 * percentile(durations, 0.99)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Measures the solution cache hit rate of IntegerProgramCpuAllocator with and without symmetry canonicalization.
+
+A trace of static workload adds and removes is replayed against a fresh allocator of each kind.  The trace is either a
+recorded file, with one JSON object per line such as {"action": "add", "id": "a", "size": 2} or
+{"action": "remove", "id": "a"}, or generated: workloads of random sizes arrive while they fit and a random one leaves
+otherwise.
+
+    $ python -m benchmarks.ip_cache_hit_rate --events 500
+    $ python -m benchmarks.ip_cache_hit_rate --trace events.jsonl
+"""
+import json
+import logging
+import random
+import time
+
+import click
+
+from titus_isolate import log
+from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator
+from titus_isolate.docker.constants import STATIC
+from titus_isolate.model.processor.config import get_cpu
+from titus_isolate.model.workload import Workload
+
+REQUEST_SIZES = [1, 2, 2, 4, 4, 8]
+
+
+def read_trace(path):
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if len(line.strip()) > 0]
+
+
+def generate_trace(event_count, thread_count, rng):
+    events = []
+    placed = {}
+    while len(events) < event_count:
+        size = rng.choice(REQUEST_SIZES)
+        if sum(placed.values()) + size <= thread_count and (len(placed) == 0 or rng.random() < 0.55):
+            workload_id = str(len(events))
+            placed[workload_id] = size
+            events.append({"action": "add", "id": workload_id, "size": size})
+        elif len(placed) > 0:
+            workload_id = rng.choice(sorted(placed.keys()))
+            placed.pop(workload_id)
+            events.append({"action": "remove", "id": workload_id})
+
+    return events
+
+
+def replay(events, shape, use_symmetry):
+    allocator = IntegerProgramCpuAllocator(get_cpu(*shape), use_symmetry=use_symmetry)
+    start = time.perf_counter()
+    for event in events:
+        if event["action"] == "add":
+            allocator.assign_threads(Workload(event["id"], event["size"], STATIC))
+        else:
+            allocator.free_threads(event["id"])
+
+    cache = allocator.get_solution_cache()
+    return cache.get_hit_count(), cache.get_miss_count(), time.perf_counter() - start
+
+
+@click.command()
+@click.option('--trace', default=None, help="A recorded trace to replay instead of a generated one")
+@click.option('--events', default=300, help="The number of events to generate (default: 300)")
+@click.option('--package-count', default=2, help="The number of packages (default: 2)")
+@click.option('--cores-per-package', default=4, help="The number of cores per package (default: 4)")
+@click.option('--threads-per-core', default=2, help="The number of threads per core (default: 2)")
+@click.option('--seed', default=0, help="The random seed used to generate the trace (default: 0)")
+def main(trace, events, package_count, cores_per_package, threads_per_core, seed):
+    log.setLevel(logging.WARNING)
+    shape = (package_count, cores_per_package, threads_per_core)
+
+    if trace is None:
+        trace_events = generate_trace(events, package_count * cores_per_package * threads_per_core, random.Random(seed))
+    else:
+        trace_events = read_trace(trace)
+
+    print("{:>10} {:>8} {:>8} {:>10} {:>10}".format("symmetry", "hits", "misses", "hit_rate", "secs"))
+    for use_symmetry in [False, True]:
+        hits, misses, secs = replay(trace_events, shape, use_symmetry)
+        print("{:>10} {:>8} {:>8} {:>10.3f} {:>10.1f}".format(
+            str(use_symmetry), hits, misses, hits / max(1, hits + misses), secs))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Compares the solve times of IntegerProgramCpuAllocator over threads and over cores, see core_integer_program.
+
+A trace of static workload adds and removes, generated as by benchmarks.ip_cache_hit_rate, is replayed against a fresh
+allocator of each formulation, for each package count.  The distribution of the time spent in the solver and the
+share of solves stopped by the time limit are reported, along with the mean isolation violation counts after each
+event, so any loss of placement quality shows up next to the speed up.
+
+    $ python -m benchmarks.ip_formulation --events 200
+    $ python -m benchmarks.ip_formulation --package-counts 2,4 --cores-per-package 12 --solver-max-runtime-secs 1
+"""
+import logging
+import random
+import time
+
+import click
+import numpy as np
+
+from benchmarks.ip_cache_hit_rate import generate_trace
+from titus_isolate import log
+from titus_isolate.allocate import integer_program_cpu_allocator
+from titus_isolate.allocate.core_integer_program import FORMULATIONS
+from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator
+from titus_isolate.docker.constants import STATIC
+from titus_isolate.isolate.detect import get_cross_package_violation_count, get_shared_core_violation_count
+from titus_isolate.model.processor.config import get_cpu
+from titus_isolate.model.workload import Workload
+from titus_optimize.compute import IP_SOLUTION_TIME_BOUND
+
+PERCENTILES = [50, 90, 99, 100]
+
+
+def replay(events, shape, formulation, solver_max_runtime_secs, incremental):
+    solve_times = []
+    statuses = []
+    solve_ip = integer_program_cpu_allocator.solve_ip
+
+    def timed_solve_ip(solver_args):
+        start = time.perf_counter()
+        solution = solve_ip(solver_args)
+        solve_times.append(time.perf_counter() - start)
+        statuses.append(solution[1])
+        return solution
+
+    cpu = get_cpu(*shape)
+    allocator = IntegerProgramCpuAllocator(
+        cpu, solver_max_runtime_secs, incremental=incremental, formulation=formulation)
+    cross_package_counts = []
+    shared_core_counts = []
+
+    integer_program_cpu_allocator.solve_ip = timed_solve_ip
+    try:
+        for event in events:
+            if event["action"] == "add":
+                allocator.assign_threads(Workload(event["id"], event["size"], STATIC))
+            else:
+                allocator.free_threads(event["id"])
+            cross_package_counts.append(get_cross_package_violation_count(cpu))
+            shared_core_counts.append(get_shared_core_violation_count(cpu))
+    finally:
+        integer_program_cpu_allocator.solve_ip = solve_ip
+
+    time_bound_rate = statuses.count(IP_SOLUTION_TIME_BOUND) / max(len(statuses), 1)
+    return solve_times, time_bound_rate, np.mean(cross_package_counts), np.mean(shared_core_counts)
+
+
+@click.command()
+@click.option('--events', default=200, help="The number of events to generate (default: 200)")
+@click.option('--package-counts', default='2,4', help="Comma separated package counts to compare on (default: 2,4)")
+@click.option('--cores-per-package', default=8, help="The number of cores per package (default: 8)")
+@click.option('--solver-max-runtime-secs', default=1.5, help="The time limit of each solve (default: 1.5)")
+@click.option('--incremental/--no-incremental', default=False,
+              help="Whether to solve incrementally, see IntegerProgramCpuAllocator (default: not incremental)")
+@click.option('--seed', default=0, help="The random seed used to generate the trace (default: 0)")
+def main(events, package_counts, cores_per_package, solver_max_runtime_secs, incremental, seed):
+    log.setLevel(logging.WARNING)
+
+    print("{:>8} {:>11} {:>7} {:>9} {:>9} {:>9} {:>9} {:>10} {:>10} {:>11}".format(
+        "packages", "formulation", "solves", "p50_ms", "p90_ms", "p99_ms", "max_ms", "time_bound", "cross_pkg",
+        "shared_core"))
+    for package_count in [int(c) for c in package_counts.split(',')]:
+        shape = (package_count, cores_per_package, 2)
+        trace_events = generate_trace(events, package_count * cores_per_package * 2, random.Random(seed))
+        for formulation in FORMULATIONS:
+            solve_times, time_bound_rate, cross_package_count, shared_core_count = replay(
+                trace_events, shape, formulation, solver_max_runtime_secs, incremental)
+            percentiles = np.percentile(np.array(solve_times) * 1000, PERCENTILES) if len(solve_times) > 0 else [0] * 4
+            print("{:>8} {:>11} {:>7} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f} {:>10.2f} {:>10.2f} {:>11.2f}".format(
+                package_count, formulation, len(solve_times), *percentiles, time_bound_rate, cross_package_count,
+                shared_core_count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Measures the solve times of IntegerProgramCpuAllocator with and without incremental solving.
+
+A trace of static workload adds and removes, recorded or generated as by benchmarks.ip_cache_hit_rate, is replayed
+against a fresh allocator of each kind.  The distribution of the time spent in the solver is reported, along with the
+mean isolation violation counts after each event, so any loss of placement quality shows up next to the speed up.
+
+    $ python -m benchmarks.ip_solve_time --events 200
+    $ python -m benchmarks.ip_solve_time --trace events.jsonl --package-count 2 --cores-per-package 24
+"""
+import logging
+import random
+import time
+
+import click
+import numpy as np
+
+from benchmarks.ip_cache_hit_rate import generate_trace, read_trace
+from titus_isolate import log
+from titus_isolate.allocate import integer_program_cpu_allocator
+from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator
+from titus_isolate.docker.constants import STATIC
+from titus_isolate.isolate.detect import get_cross_package_violation_count, get_shared_core_violation_count
+from titus_isolate.model.processor.config import get_cpu
+from titus_isolate.model.workload import Workload
+
+PERCENTILES = [50, 90, 99, 100]
+
+
+def replay(events, shape, incremental):
+    solve_times = []
+    solve_ip = integer_program_cpu_allocator.solve_ip
+
+    def timed_solve_ip(solver_args):
+        start = time.perf_counter()
+        solution = solve_ip(solver_args)
+        solve_times.append(time.perf_counter() - start)
+        return solution
+
+    cpu = get_cpu(*shape)
+    allocator = IntegerProgramCpuAllocator(cpu, incremental=incremental)
+    cross_package_counts = []
+    shared_core_counts = []
+
+    integer_program_cpu_allocator.solve_ip = timed_solve_ip
+    try:
+        for event in events:
+            if event["action"] == "add":
+                allocator.assign_threads(Workload(event["id"], event["size"], STATIC))
+            else:
+                allocator.free_threads(event["id"])
+            cross_package_counts.append(get_cross_package_violation_count(cpu))
+            shared_core_counts.append(get_shared_core_violation_count(cpu))
+    finally:
+        integer_program_cpu_allocator.solve_ip = solve_ip
+
+    return solve_times, np.mean(cross_package_counts), np.mean(shared_core_counts)
+
+
+@click.command()
+@click.option('--trace', default=None, help="A recorded trace to replay instead of a generated one")
+@click.option('--events', default=200, help="The number of events to generate (default: 200)")
+@click.option('--package-count', default=4, help="The number of packages (default: 4)")
+@click.option('--cores-per-package', default=8, help="The number of cores per package (default: 8)")
+@click.option('--threads-per-core', default=2, help="The number of threads per core (default: 2)")
+@click.option('--seed', default=0, help="The random seed used to generate the trace (default: 0)")
+def main(trace, events, package_count, cores_per_package, threads_per_core, seed):
+    log.setLevel(logging.WARNING)
+    shape = (package_count, cores_per_package, threads_per_core)
+
+    if trace is None:
+        trace_events = generate_trace(events, package_count * cores_per_package * threads_per_core, random.Random(seed))
+    else:
+        trace_events = read_trace(trace)
+
+    print("{:>12} {:>7} {:>9} {:>9} {:>9} {:>9} {:>10} {:>10}".format(
+        "incremental", "solves", "p50_ms", "p90_ms", "p99_ms", "max_ms", "cross_pkg", "shared_core"))
+    for incremental in [False, True]:
+        solve_times, cross_package_count, shared_core_count = replay(trace_events, shape, incremental)
+        percentiles = np.percentile(np.array(solve_times) * 1000, PERCENTILES) if len(solve_times) > 0 else [0] * 4
+        print("{:>12} {:>7} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f} {:>10.2f} {:>10.2f}".format(
+            str(incremental), len(solve_times), *percentiles, cross_package_count, shared_core_count))
+
+
+if __name__ == '__main__':
+    main()
@@ -25,6 +25,6 @@ setup(name='titus-isolate',
           "titus_isolate/metrics",
           "titus_isolate/model",
           "titus_isolate/model/processor"],
-      scripts=["startup/titus-isolate"],
+      scripts=["startup/titus-isolate", "startup/titus-isolate-precompute"],
       url="https://github.com/Netflix-Skunkworks/titus-isolate"
       )
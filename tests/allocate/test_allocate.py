@@ -3,16 +3,19 @@ import unittest
 import uuid
 
 from tests.utils import config_logs
+from titus_isolate.allocate.best_fit_cpu_allocator import BestFitCpuAllocator
 from titus_isolate.allocate.greedy_cpu_allocator import GreedyCpuAllocator
-from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator
+from titus_isolate.allocate.hierarchical_cpu_allocator import HierarchicalCpuAllocator
+from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator, solve_ip
 from titus_isolate.docker.constants import STATIC
+from titus_isolate.isolate.detect import get_cross_package_violations, get_shared_core_violations
 from titus_isolate.model.processor.config import get_cpu
 from titus_isolate.model.processor.utils import is_cpu_full, DEFAULT_TOTAL_THREAD_COUNT
 from titus_isolate.model.workload import Workload
 
 config_logs(logging.DEBUG)
 
-ALLOCATORS = [IntegerProgramCpuAllocator, GreedyCpuAllocator]
+ALLOCATORS = [IntegerProgramCpuAllocator, GreedyCpuAllocator, BestFitCpuAllocator, HierarchicalCpuAllocator]
 
 
 class TestCpu(unittest.TestCase):
@@ -299,7 +302,7 @@ class TestCpu(unittest.TestCase):
         (state=[2,2], req=[2,2]) but different layout
         """
         cpu = get_cpu()
-        allocator = IntegerProgramCpuAllocator(cpu)
+        allocator = IntegerProgramCpuAllocator(cpu, use_symmetry=False, incremental=False)
 
         allocator.assign_threads(Workload("a", 2, STATIC))
         self.assertEqual(1, len(allocator._IntegerProgramCpuAllocator__cache))
@@ -317,4 +320,109 @@ class TestCpu(unittest.TestCase):
         self.assertEqual(4, len(allocator._IntegerProgramCpuAllocator__cache))
 
         allocator.assign_threads(Workload("d", 2, STATIC))
-        self.assertEqual(5, len(allocator._IntegerProgramCpuAllocator__cache))
\ No newline at end of file
+        self.assertEqual(5, len(allocator._IntegerProgramCpuAllocator__cache))
+
+    def test_incremental_ip_keeps_other_packages(self):
+        cpu = get_cpu(4, 2, 2)
+        allocator = IntegerProgramCpuAllocator(cpu)
+        for workload_id in ["a", "b", "c", "d"]:
+            allocator.assign_threads(Workload(workload_id, 4, STATIC))
+        self.assertEqual(0, len(get_cross_package_violations(cpu)))
+        self.assertEqual(0, len(get_shared_core_violations(cpu)))
+
+        before = cpu.get_workload_ids_to_thread_ids()
+        allocator.free_threads("a")
+        delta = allocator.assign_threads(Workload("e", 2, STATIC))
+
+        # Only the package freed by 'a' was solved
+        self.assertEqual({"e"}, delta.get_workload_ids())
+        for workload_id in ["b", "c", "d"]:
+            self.assertEqual(sorted(before[workload_id]), sorted(cpu.get_workload_ids_to_thread_ids()[workload_id]))
+        self.assertTrue(set(cpu.get_workload_ids_to_thread_ids()["e"]) <= set(before["a"]))
+
+    def test_assign_threads_batch(self):
+        for allocator_class in [GreedyCpuAllocator, IntegerProgramCpuAllocator, BestFitCpuAllocator,
+                                HierarchicalCpuAllocator]:
+            cpu = get_cpu(2, 4, 2)
+            allocator = allocator_class(cpu)
+            allocator.assign_threads(Workload("a", 2, STATIC))
+
+            workloads = [Workload("b", 4, STATIC), Workload("c", 2, STATIC), Workload("d", 1, STATIC)]
+            delta = allocator.assign_threads_batch(workloads)
+
+            self.assertTrue({"b", "c", "d"} <= delta.get_workload_ids())
+            self.assertEqual({"b", "c", "d"}, delta.get_added_workload_ids())
+            for w in workloads:
+                self.assertEqual(w.get_thread_count(), len(cpu.get_workload_threads(w.get_id())))
+            self.assertEqual(9, len(cpu.get_claimed_threads()))
+
+    def test_ip_assign_threads_batch_solves_once(self):
+        cpu = get_cpu(2, 4, 2)
+        allocator = IntegerProgramCpuAllocator(cpu)
+        allocator.assign_threads_batch([Workload(str(i), 4, STATIC) for i in range(4)])
+
+        self.assertEqual(1, allocator.get_solution_cache().get_miss_count())
+        self.assertEqual(0, len(get_cross_package_violations(cpu)))
+        self.assertEqual(0, len(get_shared_core_violations(cpu)))
+
+        # Batched workloads are known to the allocator afterwards
+        allocator.free_threads("0")
+        self.assertEqual(12, len(cpu.get_claimed_threads()))
+
+    def test_ip_fast_free_does_not_solve(self):
+        cpu = get_cpu(2, 2, 2)
+        allocator = IntegerProgramCpuAllocator(cpu, fast_free=True)
+        for workload_id, thread_count in [("a", 3), ("b", 3), ("c", 2)]:
+            allocator.assign_threads(Workload(workload_id, thread_count, STATIC))
+        c_thread_ids = sorted([t.get_id() for t in cpu.get_workload_threads("c")])
+        miss_count = allocator.get_solution_cache().get_miss_count()
+
+        # Freeing 'a' leaves 'c' across both packages, until the placement is upgraded
+        delta = allocator.free_threads("a")
+        self.assertEqual(miss_count, allocator.get_solution_cache().get_miss_count())
+        self.assertEqual(0, len(delta.get_moved_workload_ids()))
+        self.assertEqual(5, len(cpu.get_claimed_threads()))
+        self.assertEqual(c_thread_ids, sorted([t.get_id() for t in cpu.get_workload_threads("c")]))
+
+        request = allocator.get_upgrade_request()
+        self.assertEqual(["b", "c"], sorted(request.get_workload_ids()))
+        allocator.apply_solution(request, *solve_ip(request.get_solver_args()))
+        self.assertEqual(0, len(get_cross_package_violations(cpu)))
+
+    def test_best_fit_uses_whole_cores_of_the_tightest_package(self):
+        cpu = get_cpu(2, 4, 2)
+        allocator = BestFitCpuAllocator(cpu)
+        allocator.assign_threads(Workload("a", 5, STATIC))
+        allocator.assign_threads(Workload("b", 2, STATIC))
+        allocator.assign_threads(Workload("c", 6, STATIC))
+
+        # 'b' fits on the whole core left empty by 'a', and 'c' gets the other package
+        self.assertEqual(0, len(get_cross_package_violations(cpu)))
+        self.assertEqual(0, len(get_shared_core_violations(cpu)))
+        self.assertTrue(cpu.get_packages()[0].has_workload("b"))
+        self.assertEqual(1, len([c for c in cpu.get_packages()[0].get_cores() if c.has_workload("b")]))
+
+    def test_best_fit_moves_a_workload_to_avoid_crossing_packages(self):
+        cpu = get_cpu(2, 4, 2)
+        allocator = BestFitCpuAllocator(cpu)
+        allocator.assign_threads(Workload("a", 4, STATIC))
+        allocator.assign_threads(Workload("b", 3, STATIC))
+        allocator.assign_threads(Workload("c", 4, STATIC))
+
+        # Neither package has 5 empty threads, but moving 'a' off the first package frees enough
+        delta = allocator.assign_threads(Workload("d", 5, STATIC))
+        self.assertEqual(0, len(get_cross_package_violations(cpu)))
+        self.assertEqual({"d"}, delta.get_added_workload_ids())
+        self.assertEqual({"a"}, delta.get_moved_workload_ids())
+        self.assertTrue(is_cpu_full(cpu))
+
+    def test_best_fit_spreads_a_workload_no_package_can_hold(self):
+        cpu = get_cpu(2, 4, 2)
+        allocator = BestFitCpuAllocator(cpu, max_moves=0)
+        allocator.assign_threads(Workload("a", 6, STATIC))
+        allocator.assign_threads(Workload("b", 6, STATIC))
+        allocator.assign_threads(Workload("c", 4, STATIC))
+
+        self.assertEqual({"c": [0, 1]}, {w_id: sorted([p.get_id() for p in cpu.get_packages() if p.has_workload(w_id)])
+                                         for w_id in get_cross_package_violations(cpu).keys()})
+        self.assertTrue(is_cpu_full(cpu))
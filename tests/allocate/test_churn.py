@@ -0,0 +1,120 @@
+import logging
+import unittest
+from unittest.mock import patch
+
+from tests.utils import config_logs
+from titus_isolate.allocate.best_fit_cpu_allocator import BestFitCpuAllocator
+from titus_isolate.allocate import integer_program_cpu_allocator
+from titus_isolate.allocate.churn import get_churn, is_package_aligned, keep_running_workloads, minimize_churn
+from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator
+from titus_isolate.allocate.placement_delta import PlacementDelta
+from titus_isolate.docker.constants import STATIC
+from titus_isolate.isolate.detect import get_cross_llc_violations, get_cross_package_violation_count
+from titus_isolate.model.processor.config import get_cpu, get_cpu_from_topology
+from titus_isolate.model.workload import Workload
+
+config_logs(logging.DEBUG)
+
+
+def get_thread_ids(package):
+    return [t.get_id() for t in package.get_threads()]
+
+
+def claim(cpu, thread_id_to_workload_id):
+    for t in cpu.get_threads():
+        if t.get_id() in thread_id_to_workload_id:
+            t.claim(thread_id_to_workload_id[t.get_id()])
+
+
+def get_split_cpu():
+    """
+    A 2x2x2 CPU with workload 'a' split over both packages
+    """
+    cpu = get_cpu(2, 2, 2)
+    cpu.get_packages()[0].get_cores()[0].get_threads()[0].claim("a")
+    cpu.get_packages()[1].get_cores()[0].get_threads()[0].claim("a")
+    return cpu
+
+
+class TestChurn(unittest.TestCase):
+
+    def test_get_churn(self):
+        delta = PlacementDelta({"a": [0, 1], "b": [2]}, {"a": [0, 3], "b": [], "c": [1]})
+        self.assertEqual((1, 1), get_churn(delta))
+        self.assertEqual((0, 0), get_churn(None))
+
+    def test_minimize_churn_undoes_a_package_swap(self):
+        cpu = get_cpu(2, 2, 2)
+        p0_thread_ids = get_thread_ids(cpu.get_packages()[0])
+        p1_thread_ids = get_thread_ids(cpu.get_packages()[1])
+        for t in cpu.get_packages()[0].get_threads()[:2]:
+            t.claim("a")
+
+        # The same placement with the packages swapped
+        proposed = {p1_thread_ids[0]: "a", p1_thread_ids[1]: "a", p0_thread_ids[0]: "b"}
+        relabeled = minimize_churn(cpu, proposed)
+
+        self.assertEqual({p0_thread_ids[0]: "a", p0_thread_ids[1]: "a", p1_thread_ids[0]: "b"}, relabeled)
+
+    def test_minimize_churn_keeps_a_placement_without_moves(self):
+        cpu = get_cpu(2, 2, 2)
+        proposed = {get_thread_ids(cpu.get_packages()[1])[0]: "a"}
+        self.assertIs(proposed, minimize_churn(cpu, proposed))
+
+    def test_minimize_churn_keeps_domains(self):
+        # Each package is split between 2 last level caches
+        topology = [[[0, 8], [1, 9], [2, 10], [3, 11]], [[4, 12], [5, 13], [6, 14], [7, 15]]]
+        cpu = get_cpu_from_topology(topology, llc_topology=[[0, 1, 8, 9], [2, 3, 10, 11], [4, 5, 12, 13],
+                                                            [6, 7, 14, 15]])
+        claim(cpu, {0: "a", 2: "a"})
+
+        # Keeping 'a' in place would keep it across both last level caches, which the proposed placement fixes
+        proposed = {0: "a", 1: "a"}
+        self.assertFalse(is_package_aligned(cpu))
+        self.assertEqual(1, len(get_cross_llc_violations(cpu)))
+        self.assertIs(proposed, minimize_churn(cpu, proposed))
+
+        # Without last level caches the cores of a package are interchangeable
+        cpu = get_cpu_from_topology(topology, [[0, 1, 2, 3, 8, 9, 10, 11], [4, 5, 6, 7, 12, 13, 14, 15]])
+        claim(cpu, {0: "a", 2: "a"})
+        self.assertTrue(is_package_aligned(cpu))
+        self.assertEqual({0: "a", 2: "a"}, minimize_churn(cpu, proposed))
+
+    def test_ip_minimizes_churn_only_when_penalized(self):
+        for churn_penalty, call_count in [(0, 0), (2, 1)]:
+            allocator = IntegerProgramCpuAllocator(get_split_cpu(), churn_penalty=churn_penalty)
+            with patch.object(integer_program_cpu_allocator, 'minimize_churn',
+                              side_effect=lambda cpu, mapping: mapping) as minimize:
+                allocator.assign_threads(Workload("b", 2, STATIC))
+            self.assertEqual(call_count, minimize.call_count)
+
+    def test_keep_running_workloads(self):
+        cpu = get_split_cpu()
+        a_thread_ids = [t.get_id() for t in cpu.get_workload_threads("a")]
+        p1_thread_ids = get_thread_ids(cpu.get_packages()[1])
+
+        # 'a' is moved onto the second package, and 'b' takes a thread 'a' leaves
+        proposed = {p1_thread_ids[0]: "a", p1_thread_ids[1]: "a", a_thread_ids[0]: "b"}
+        kept = keep_running_workloads(cpu, proposed)
+
+        self.assertEqual(sorted(a_thread_ids), sorted([t_id for t_id, w_id in kept.items() if w_id == "a"]))
+        self.assertEqual(1, len([w_id for w_id in kept.values() if w_id == "b"]))
+
+    def test_ip_churn_penalty(self):
+        for churn_penalty, moved_count in [(0, 1), (2, 1), (100, 0)]:
+            cpu = get_split_cpu()
+            allocator = IntegerProgramCpuAllocator(cpu, churn_penalty=churn_penalty)
+            delta = allocator.assign_threads(Workload("b", 2, STATIC))
+
+            self.assertEqual(moved_count, get_churn(delta)[0])
+            self.assertEqual(1 - moved_count, get_cross_package_violation_count(cpu))
+            self.assertEqual(2, len(cpu.get_workload_threads("b")))
+
+    def test_best_fit_churn_penalty(self):
+        for churn_penalty, moved_count in [(0, 1), (100, 0)]:
+            cpu = get_cpu(2, 4, 2)
+            allocator = BestFitCpuAllocator(cpu, churn_penalty=churn_penalty)
+            for workload_id, thread_count in [("a", 4), ("b", 3), ("c", 4), ("d", 5)]:
+                delta = allocator.assign_threads(Workload(workload_id, thread_count, STATIC))
+
+            self.assertEqual(moved_count, get_churn(delta)[0])
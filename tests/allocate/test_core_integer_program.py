@@ -0,0 +1,91 @@
+import logging
+import unittest
+
+from tests.utils import config_logs
+from titus_isolate.allocate.core_integer_program import CORE_FORMULATION, THREAD_FORMULATION, expand_to_threads, \
+    optimize_core_ip
+from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator, make_solver_request
+from titus_isolate.allocate.solution_cache_file import get_cache_version
+from titus_isolate.docker.constants import STATIC
+from titus_isolate.isolate.detect import get_cross_package_violation_count, get_shared_core_violation_count
+from titus_isolate.model.processor.config import get_cpu
+from titus_isolate.model.workload import Workload
+
+config_logs(logging.DEBUG)
+
+
+def get_slots(placement):
+    return [[t for t, v in enumerate(row) if v > 0.5] for row in placement]
+
+
+class TestCoreIntegerProgram(unittest.TestCase):
+
+    def test_expand_whole_and_half_cores(self):
+        # Core 0 is given to workload 1, workloads 0 and 2 share core 1
+        placement = expand_to_threads([1, None, None, None], [[], [2, 0], [], []], 8, 3)
+        self.assertEqual([[2], [0, 1], [3]], get_slots(placement))
+
+    def test_expand_keeps_previous_threads(self):
+        previous_allocation = [[0, 0, 1, 0], [0, 0, 0, 1]]
+        self.assertEqual([[2], [3]], get_slots(expand_to_threads([None, None], [[], [0, 1]], 4, 2)))
+        self.assertEqual([[2], [3]], get_slots(expand_to_threads([None, None], [[], [1, 0]], 4, 2,
+                                                                 previous_allocation)))
+        self.assertEqual([[3], [2]], get_slots(expand_to_threads([None, None], [[], [0, 1]], 4, 2,
+                                                                 [[0, 0, 0, 1], [0, 0, 1, 0]])))
+        self.assertEqual([[3]], get_slots(expand_to_threads([None, None], [[], [0]], 4, 1, [[0, 0, 0, 1]])))
+
+    def test_whole_cores_on_one_package(self):
+        placement, _ = optimize_core_ip([4, 2], 16, 2)
+        slots = get_slots(placement)
+        self.assertEqual([4, 2], [len(s) for s in slots])
+        for workload_slots in slots:
+            self.assertEqual(1, len(set([t // 8 for t in workload_slots])))
+            self.assertTrue(all([t + 1 in workload_slots for t in workload_slots if t % 2 == 0]))
+
+    def test_odd_workloads_share_cores_only_when_needed(self):
+        slots = get_slots(optimize_core_ip([1, 1], 8, 2)[0])
+        self.assertNotEqual(slots[0][0] // 2, slots[1][0] // 2)
+
+        # 4 odd workloads of 3 threads fill all 6 cores, sharing 2 of them
+        slots = get_slots(optimize_core_ip([3, 3, 3, 3], 12, 2)[0])
+        self.assertEqual(list(range(12)), sorted([t for s in slots for t in s]))
+
+    def test_previous_allocation_is_kept(self):
+        previous_allocation, _ = optimize_core_ip([3, 3, 2], 16, 2)
+        placement, _ = optimize_core_ip([3, 3, 2, 1], 16, 2, previous_allocation)
+        self.assertEqual(get_slots(previous_allocation), get_slots(placement)[:3])
+
+    def test_too_many_units(self):
+        with self.assertRaises(ValueError):
+            optimize_core_ip([5, 4], 8, 2)
+
+    def test_request_falls_back_to_threads(self):
+        request = make_solver_request([2], None, [[2, 2], [2, 2]], 1, formulation=CORE_FORMULATION)
+        self.assertEqual(CORE_FORMULATION, request.get_solver_args()[-1])
+
+        request = make_solver_request([2], None, [[1, 1], [1, 1]], 1, formulation=CORE_FORMULATION)
+        self.assertEqual(THREAD_FORMULATION, request.get_solver_args()[-1])
+
+    def test_allocator_with_core_formulation(self):
+        cpu = get_cpu(2, 4, 2)
+        allocator = IntegerProgramCpuAllocator(cpu, formulation=CORE_FORMULATION)
+        for workload_id, thread_count in [("a", 3), ("b", 2), ("c", 5), ("d", 3)]:
+            allocator.assign_threads(Workload(workload_id, thread_count, STATIC))
+        # The odd workloads are given a half core each, leaving their siblings empty
+        self.assertEqual(0, get_cross_package_violation_count(cpu))
+        self.assertEqual(0, get_shared_core_violation_count(cpu))
+
+        allocator.free_threads("c")
+        self.assertEqual(["a", "b", "d"], sorted(cpu.get_workload_ids()))
+        self.assertEqual(8, len(cpu.get_empty_threads()))
+
+    def test_set_formulation(self):
+        cpu = get_cpu(2, 4, 2)
+        allocator = IntegerProgramCpuAllocator(cpu)
+        allocator.assign_threads(Workload("a", 2, STATIC))
+        self.assertEqual(1, len(allocator.get_solution_cache()))
+
+        allocator.set_formulation(CORE_FORMULATION)
+        self.assertEqual(CORE_FORMULATION, allocator.get_formulation())
+        self.assertEqual(0, len(allocator.get_solution_cache()))
+        self.assertNotEqual(get_cache_version(cpu), get_cache_version(cpu, CORE_FORMULATION))
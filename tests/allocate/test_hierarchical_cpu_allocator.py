@@ -0,0 +1,95 @@
+import logging
+import unittest
+
+from tests.utils import config_logs, SynchronousExecutor
+from titus_isolate.allocate.core_integer_program import CORE_FORMULATION
+from titus_isolate.allocate.hierarchical_cpu_allocator import HierarchicalCpuAllocator, assign_packages
+from titus_isolate.docker.constants import STATIC
+from titus_isolate.isolate.detect import get_cross_package_violation_count
+from titus_isolate.model.processor.config import get_cpu
+from titus_isolate.model.workload import Workload
+
+config_logs(logging.DEBUG)
+
+
+def get_allocator(cpu, formulation=None):
+    if formulation is None:
+        return HierarchicalCpuAllocator(cpu, executor=SynchronousExecutor())
+    return HierarchicalCpuAllocator(cpu, executor=SynchronousExecutor(), formulation=formulation)
+
+
+def get_packages(cpu, workload_id):
+    return set([p_i for p_i, p in enumerate(cpu.get_packages())
+                for c in p.get_cores() for t in c.get_threads() if t.get_workload_id() == workload_id])
+
+
+class TestHierarchicalCpuAllocator(unittest.TestCase):
+
+    def test_assign_packages(self):
+        counts, _ = assign_packages([4, 3, 10], [[0] * 4] * 3, [8] * 4)
+        self.assertEqual([4, 3, 10], [sum(c) for c in counts])
+        self.assertEqual([1, 1, 2], [len([n for n in c if n > 0]) for c in counts])
+        self.assertTrue(all([sum([c[p] for c in counts]) <= 8 for p in range(4)]))
+
+    def test_running_workloads_stay_on_their_package(self):
+        # Balancing the packages is not worth moving the running workloads
+        counts, _ = assign_packages([4, 4, 2], [[4, 0], [4, 0], [0, 0]], [8, 8])
+        self.assertEqual([[4, 0], [4, 0], [0, 2]], counts)
+
+    def test_only_touched_packages_are_solved(self):
+        cpu = get_cpu(4, 4, 2)
+        allocator = get_allocator(cpu)
+        allocator.assign_threads(Workload("a", 4, STATIC))
+        self.assertEqual(1, allocator.get_solved_package_count())
+
+        allocator.assign_threads(Workload("b", 10, STATIC))
+        self.assertEqual(3, allocator.get_solved_package_count())
+        self.assertEqual(2, len(get_packages(cpu, "b")))
+        self.assertFalse(get_packages(cpu, "a") & get_packages(cpu, "b"))
+
+        a_thread_ids = [t.get_id() for t in cpu.get_workload_threads("a")]
+        delta = allocator.free_threads("b")
+        self.assertEqual(5, allocator.get_solved_package_count())
+        self.assertEqual(0, len(delta.get_moved_workload_ids()))
+        self.assertEqual(a_thread_ids, [t.get_id() for t in cpu.get_workload_threads("a")])
+        self.assertEqual(["a"], list(cpu.get_workload_ids()))
+
+    def test_batch_with_core_formulation(self):
+        cpu = get_cpu(4, 2, 2)
+        allocator = get_allocator(cpu, CORE_FORMULATION)
+        allocator.assign_threads_batch([Workload(w_id, 3, STATIC) for w_id in ["a", "b", "c", "d"]])
+        self.assertEqual(0, get_cross_package_violation_count(cpu))
+        self.assertEqual(12, len(cpu.get_claimed_threads()))
+        self.assertFalse(allocator.is_last_call_time_bound())
+
+    def test_solutions_are_cached(self):
+        cpu = get_cpu(2, 2, 2)
+        allocator = get_allocator(cpu)
+        allocator.assign_threads(Workload("a", 2, STATIC))
+        allocator.free_threads("a")
+        allocator.assign_threads(Workload("b", 2, STATIC))
+        self.assertEqual(1, allocator.get_solution_cache().get_hit_count())
+
+    def test_threads_of_unknown_workloads_are_kept(self):
+        cpu = get_cpu(2, 2, 2)
+        allocator = get_allocator(cpu)
+
+        # A workload placed behind the allocator's back, e.g. by a fallback allocator
+        x_threads = cpu.get_packages()[0].get_cores()[0].get_threads()
+        for t in x_threads:
+            t.claim("x")
+
+        allocator.assign_threads(Workload("a", 4, STATIC))
+        allocator.assign_threads(Workload("b", 2, STATIC))
+        self.assertEqual(x_threads, cpu.get_workload_threads("x"))
+        self.assertEqual({1}, get_packages(cpu, "a"))
+        self.assertEqual({0}, get_packages(cpu, "b"))
+
+        allocator.free_threads("b")
+        self.assertEqual(x_threads, cpu.get_workload_threads("x"))
+
+        a_thread_ids = [t.get_id() for t in cpu.get_workload_threads("a")]
+        delta = allocator.free_threads("x")
+        self.assertEqual(0, len(delta.get_moved_workload_ids()))
+        self.assertEqual(["a"], list(cpu.get_workload_ids()))
+        self.assertEqual(a_thread_ids, [t.get_id() for t in cpu.get_workload_threads("a")])
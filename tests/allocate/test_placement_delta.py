@@ -0,0 +1,71 @@
+import logging
+import unittest
+import uuid
+
+from tests.utils import config_logs
+from titus_isolate.allocate.greedy_cpu_allocator import GreedyCpuAllocator
+from titus_isolate.allocate.placement_delta import PlacementDelta, apply_thread_mapping, merge_deltas
+from titus_isolate.docker.constants import STATIC
+from titus_isolate.model.processor.config import get_cpu
+from titus_isolate.model.workload import Workload
+
+config_logs(logging.DEBUG)
+
+
+class TestPlacementDelta(unittest.TestCase):
+
+    def test_empty_delta(self):
+        delta = PlacementDelta({"a": [0, 1]}, {"a": [1, 0]})
+        self.assertTrue(delta.is_empty())
+        self.assertEqual({}, delta.get_updates())
+
+    def test_added_removed_and_moved(self):
+        before = {"a": [0, 1], "b": [2]}
+        after = {"a": [0, 3], "c": [4, 5]}
+        delta = PlacementDelta(before, after)
+
+        self.assertEqual({"c"}, delta.get_added_workload_ids())
+        self.assertEqual({"b"}, delta.get_removed_workload_ids())
+        self.assertEqual({"a"}, delta.get_moved_workload_ids())
+        self.assertEqual([3], delta.get_added_thread_ids("a"))
+        self.assertEqual([1], delta.get_removed_thread_ids("a"))
+        self.assertEqual([0, 1], delta.get_previous_thread_ids("a"))
+        self.assertEqual({"a": [0, 3], "c": [4, 5]}, delta.get_updates())
+
+    def test_merge_deltas(self):
+        first = PlacementDelta({"a": [0, 1]}, {"a": [2, 3], "b": [0]})
+        second = PlacementDelta({"a": [2, 3], "b": [0]}, {"a": [0, 1], "b": [0, 1]})
+        delta = merge_deltas([first, second])
+
+        # 'a' moved back, so only the addition of 'b' remains
+        self.assertEqual({"b"}, delta.get_workload_ids())
+        self.assertEqual({"b": [0, 1]}, delta.get_updates())
+
+    def test_apply_thread_mapping_only_changes_moved_threads(self):
+        cpu = get_cpu()
+        cpu.get_threads()[0].claim("a")
+        cpu.get_threads()[1].claim("a")
+        cpu.get_threads()[2].claim("b")
+        b_version = cpu.snapshot().get_placement()[0][1]
+
+        # Thread ids: get_threads()[0] -> 0, [1] -> 8, [2] -> 1, [4] -> 2
+        delta = apply_thread_mapping(cpu, {0: "a", 1: "b", 2: "a"})
+        self.assertEqual({"a"}, delta.get_moved_workload_ids())
+        self.assertEqual({"a": [0, 2]}, delta.get_updates())
+        self.assertEqual([0, 2], sorted([t.get_id() for t in cpu.get_workload_threads("a")]))
+
+        # Workload b's core was untouched
+        self.assertIs(b_version, cpu.snapshot().get_placement()[0][1])
+
+    def test_greedy_allocator_returns_delta(self):
+        cpu = get_cpu()
+        allocator = GreedyCpuAllocator(cpu)
+        w = Workload(uuid.uuid4(), 2, STATIC)
+
+        delta = allocator.assign_threads(w)
+        self.assertEqual({w.get_id()}, delta.get_added_workload_ids())
+        self.assertEqual([0, 8], delta.get_thread_ids(w.get_id()))
+
+        delta = allocator.free_threads(w.get_id())
+        self.assertEqual({w.get_id()}, delta.get_removed_workload_ids())
+        self.assertEqual({}, delta.get_updates())
@@ -0,0 +1,55 @@
+import logging
+import unittest
+
+from tests.utils import config_logs
+from titus_isolate.allocate.restriction import restrict
+
+config_logs(logging.DEBUG)
+
+# 4 packages of 2 cores of 2 threads
+CORE_THREAD_COUNTS = [[2, 2]] * 4
+
+
+def get_vector(*slots):
+    return [1 if s in slots else 0 for s in range(16)]
+
+
+class TestRestriction(unittest.TestCase):
+
+    def test_add_to_emptiest_package(self):
+        current_placement = [get_vector(0, 1, 2), get_vector(4, 5), get_vector(12)]
+        restriction = restrict([3, 2, 1, 2], current_placement, CORE_THREAD_COUNTS)
+
+        # The third package is empty, so only the new workload is solved, on its threads
+        self.assertEqual([2], restriction.get_requested_units())
+        self.assertIsNone(restriction.get_current_placement())
+        self.assertEqual(4, restriction.get_thread_count())
+        self.assertEqual(1, restriction.get_package_count())
+
+        restored = restriction.restore([[1, 1, 0, 0]])
+        self.assertEqual(current_placement + [get_vector(8, 9)], restored)
+
+    def test_add_larger_than_a_package(self):
+        restriction = restrict([6], None, CORE_THREAD_COUNTS)
+        self.assertEqual(2, restriction.get_package_count())
+        self.assertEqual([6], restriction.get_requested_units())
+
+    def test_remove_is_closed_under_spanning_workloads(self):
+        # 'b' spans the first two packages, so freeing 'a' solves both, with 'b' and 'c' but not 'd'
+        current_placement = [get_vector(0), get_vector(1, 4), get_vector(5), get_vector(12)]
+        restriction = restrict([0, 2, 1, 1], current_placement, CORE_THREAD_COUNTS)
+        self.assertEqual(2, restriction.get_package_count())
+        self.assertEqual([0, 2, 1], restriction.get_requested_units())
+        self.assertEqual([[1, 0, 0, 0, 0, 0, 0, 0], [0, 1, 0, 0, 1, 0, 0, 0], [0, 0, 0, 0, 0, 1, 0, 0]],
+                         restriction.get_current_placement())
+
+        # 'b' moves onto the first package, 'd' keeps its thread
+        restored = restriction.restore([[0] * 8, [1, 1, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0, 0]])
+        self.assertEqual([get_vector(), get_vector(0, 1), get_vector(4), get_vector(12)], restored)
+
+    def test_whole_cpu_is_not_restricted(self):
+        self.assertIsNone(restrict([16], None, CORE_THREAD_COUNTS))
+        self.assertIsNone(restrict([1], None, [[2], [1]]))
+
+        # Nothing changes
+        self.assertIsNone(restrict([1], [get_vector(0)], CORE_THREAD_COUNTS))
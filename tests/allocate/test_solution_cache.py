@@ -0,0 +1,87 @@
+import logging
+import unittest
+
+from tests.utils import config_logs
+from titus_isolate.allocate.solution_cache import SolutionCache, get_solution_key, pack_vectors, unpack_vectors
+
+config_logs(logging.DEBUG)
+
+
+def get_key(requested_units, placement=None, thread_count=16):
+    if placement is None:
+        placement = []
+    return get_solution_key(thread_count, requested_units, len(placement), pack_vectors(placement, thread_count))
+
+
+class TestSolutionCache(unittest.TestCase):
+
+    def test_pack_and_unpack(self):
+        vectors = [[1, 0, 0, 1, 1, 0, 0, 0, 0, 0, 1], [0, 1, 1, 0, 0, 0, 0, 0, 0, 0, 0]]
+        self.assertEqual(4, len(pack_vectors(vectors, 11)))
+        self.assertEqual(vectors, unpack_vectors(pack_vectors(vectors, 11), 2, 11))
+        self.assertEqual([], unpack_vectors(pack_vectors([], 11), 0, 11))
+
+    def test_keys_are_compact_and_distinct(self):
+        placement = [[1, 1] + [0] * 46]
+        key = get_key([2, 2], placement, 48)
+        self.assertLess(len(key), 20)
+
+        self.assertNotEqual(get_key([2]), get_key([2], [[0] * 16]))
+        self.assertNotEqual(get_key([2, 0], [[1, 1] + [0] * 14]), get_key([2, 2], [[1, 1] + [0] * 14]))
+        self.assertNotEqual(get_key([2]), get_key([2], thread_count=32))
+
+    def test_hit_and_miss(self):
+        cache = SolutionCache()
+        key = get_key([1])
+        self.assertIsNone(cache.get(key))
+
+        cache.put(key, [[1] + [0] * 15], 'optimal')
+        self.assertEqual(([[1] + [0] * 15], 'optimal'), cache.get(key))
+        self.assertEqual(1, len(cache))
+        self.assertEqual(1, cache.get_hit_count())
+        self.assertEqual(1, cache.get_miss_count())
+        self.assertEqual(0, cache.get_eviction_count())
+
+    def test_contains_does_not_count(self):
+        cache = SolutionCache()
+        key = get_key([1])
+        self.assertFalse(key in cache)
+
+        cache.put(key, [[1] + [0] * 15], 'optimal')
+        self.assertTrue(key in cache)
+        self.assertEqual(0, cache.get_hit_count())
+        self.assertEqual(0, cache.get_miss_count())
+
+    def test_entry_bound_evicts_least_recently_used(self):
+        cache = SolutionCache(max_entries=2)
+        placement = [[1] + [0] * 15]
+        cache.put(get_key([1]), placement, 'optimal')
+        cache.put(get_key([2]), placement, 'optimal')
+
+        # Touch [1] so [2] is the least recently used
+        cache.get(get_key([1]))
+        cache.put(get_key([3]), placement, 'optimal')
+
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.get_eviction_count())
+        self.assertIsNone(cache.get(get_key([2])))
+        self.assertIsNotNone(cache.get(get_key([1])))
+        self.assertIsNotNone(cache.get(get_key([3])))
+
+    def test_byte_bound(self):
+        cache = SolutionCache(max_bytes=1)
+        placement = [[1] + [0] * 15]
+        cache.put(get_key([1]), placement, 'optimal')
+        cache.put(get_key([2]), placement, 'optimal')
+
+        # The most recent entry is always kept
+        self.assertEqual(1, len(cache))
+        self.assertIsNotNone(cache.get(get_key([2])))
+
+        size_bytes = cache.get_size_bytes()
+        cache.put(get_key([2]), placement, 'optimal')
+        self.assertEqual(size_bytes, cache.get_size_bytes())
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            SolutionCache(max_entries=0)
@@ -0,0 +1,180 @@
+import logging
+import os
+import tempfile
+import unittest
+
+from tests.utils import config_logs
+from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator
+from titus_isolate.allocate.solution_cache import SolutionCache
+from titus_isolate.allocate.solution_cache_file import SolutionCacheFile, get_cache_version
+from titus_isolate.docker.constants import STATIC
+from titus_isolate.model.processor.config import get_cpu
+from titus_isolate.model.workload import Workload
+from titus_optimize.compute import IP_SOLUTION_OPTIMAL, IP_SOLUTION_TIME_BOUND
+
+config_logs(logging.DEBUG)
+
+PLACEMENT = [[1, 1, 0, 0, 0, 0, 0, 0], [0, 0, 1, 0, 0, 0, 0, 0]]
+
+
+def load(path, version='v1'):
+    cache = SolutionCache()
+    cache_file = SolutionCacheFile(path, version)
+    cache_file.load(cache)
+    return cache, cache_file
+
+
+class TestSolutionCacheFile(unittest.TestCase):
+
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'cache', 'solutions')
+            cache, cache_file = load(path)
+            self.assertEqual(0, len(cache))
+
+            cache_file.append(b'a', PLACEMENT, 'optimal')
+            cache_file.append(b'b', [], 'time_bound')
+            cache_file.close()
+
+            cache, cache_file = load(path)
+            self.assertEqual(2, len(cache))
+            self.assertEqual((PLACEMENT, 'optimal'), cache.get(b'a'))
+            self.assertEqual(([], 'time_bound'), cache.get(b'b'))
+            self.assertEqual(2, cache_file.get_record_count())
+            cache_file.close()
+
+    def test_other_version_is_discarded(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'solutions')
+            _, cache_file = load(path, 'v1')
+            cache_file.append(b'a', PLACEMENT, 'optimal')
+            cache_file.close()
+
+            cache, cache_file = load(path, 'v2')
+            self.assertEqual(0, len(cache))
+            cache_file.close()
+
+            # The file was rewritten for the new version
+            cache, cache_file = load(path, 'v2')
+            self.assertEqual(0, len(cache))
+            cache_file.close()
+
+    def test_truncated_record_is_dropped(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'solutions')
+            _, cache_file = load(path)
+            cache_file.append(b'a', PLACEMENT, 'optimal')
+            cache_file.append(b'b', PLACEMENT, 'optimal')
+            cache_file.close()
+
+            with open(path, 'r+b') as f:
+                f.truncate(os.path.getsize(path) - 3)
+
+            cache, cache_file = load(path)
+            self.assertEqual(1, len(cache))
+            self.assertIsNotNone(cache.get(b'a'))
+
+            # The file was compacted, so appending after the dropped record works
+            cache_file.append(b'c', PLACEMENT, 'optimal')
+            cache_file.close()
+            cache, cache_file = load(path)
+            self.assertEqual(2, len(cache))
+            cache_file.close()
+
+    def test_compaction(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'solutions')
+            cache = SolutionCache(max_entries=1)
+            cache_file = SolutionCacheFile(path, 'v1')
+            cache_file.load(cache)
+
+            for key in [b'a', b'b', b'c']:
+                cache.put(key, PLACEMENT, 'optimal')
+                cache_file.append(key, PLACEMENT, 'optimal')
+            self.assertEqual(3, cache_file.get_record_count())
+
+            cache_file.compact(cache)
+            self.assertEqual(1, cache_file.get_record_count())
+            cache_file.close()
+
+            cache, cache_file = load(path)
+            self.assertEqual(1, len(cache))
+            self.assertIsNotNone(cache.get(b'c'))
+            cache_file.close()
+
+    def test_allocator_reuses_persisted_solutions(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'solutions')
+
+            allocator = IntegerProgramCpuAllocator(get_cpu())
+            allocator.set_solution_cache_path(path)
+            allocator.assign_threads(Workload("a", 2, STATIC))
+            allocator.assign_threads(Workload("b", 4, STATIC))
+            self.assertEqual(2, allocator.get_solution_cache().get_miss_count())
+
+            # A restarted allocator solves the same requests from the file
+            allocator = IntegerProgramCpuAllocator(get_cpu())
+            allocator.set_solution_cache_path(path)
+            allocator.assign_threads(Workload("c", 2, STATIC))
+            allocator.assign_threads(Workload("d", 4, STATIC))
+            self.assertEqual(0, allocator.get_solution_cache().get_miss_count())
+            self.assertEqual(2, allocator.get_solution_cache().get_hit_count())
+
+            # A different topology shape does not
+            allocator = IntegerProgramCpuAllocator(get_cpu(1, 8, 2))
+            allocator.set_solution_cache_path(path)
+            self.assertEqual(0, len(allocator.get_solution_cache()))
+
+    def test_allocator_persists_only_optimal_solutions(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'solutions')
+            allocator = IntegerProgramCpuAllocator(get_cpu())
+            allocator.set_solution_cache_path(path)
+
+            request = allocator.get_assign_request([Workload("a", 2, STATIC)])
+            allocator.put_solution(request, PLACEMENT, IP_SOLUTION_TIME_BOUND)
+            self.assertEqual((PLACEMENT, IP_SOLUTION_TIME_BOUND), allocator.get_cached_solution(request))
+
+            # A restarted allocator does not reuse the solution the solver was stopped early on
+            allocator = IntegerProgramCpuAllocator(get_cpu())
+            allocator.set_solution_cache_path(path)
+            self.assertIsNone(allocator.get_cached_solution(request))
+
+            # An optimal solution replaces it and is persisted, and a later time bound one does not replace it
+            allocator.put_solution(request, PLACEMENT, IP_SOLUTION_TIME_BOUND)
+            allocator.put_solution(request, PLACEMENT, IP_SOLUTION_OPTIMAL)
+            allocator.put_solution(request, [[1, 0, 1, 0, 0, 0, 0, 0]], IP_SOLUTION_TIME_BOUND)
+            self.assertEqual((PLACEMENT, IP_SOLUTION_OPTIMAL), allocator.get_cached_solution(request))
+
+            allocator = IntegerProgramCpuAllocator(get_cpu())
+            allocator.set_solution_cache_path(path)
+            self.assertEqual((PLACEMENT, IP_SOLUTION_OPTIMAL), allocator.get_cached_solution(request))
+
+    def test_compaction_drops_time_bound_solutions(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, 'solutions')
+            cache, cache_file = load(path)
+            cache.put(b'a', PLACEMENT, IP_SOLUTION_OPTIMAL)
+            cache.put(b'b', PLACEMENT, IP_SOLUTION_TIME_BOUND)
+            cache_file.compact(cache)
+            cache_file.close()
+
+            cache, cache_file = load(path)
+            self.assertEqual(1, len(cache))
+            self.assertIsNone(cache.get(b'b'))
+            cache_file.close()
+
+    def test_cache_version_includes_shape(self):
+        self.assertNotEqual(get_cache_version(get_cpu(2, 4, 2)), get_cache_version(get_cpu(1, 8, 2)))
+        self.assertEqual(get_cache_version(get_cpu(2, 4, 2)), get_cache_version(get_cpu(2, 4, 2)))
+
+    def test_unusable_path_disables_persistence(self):
+        with tempfile.TemporaryDirectory() as root:
+            blocker = os.path.join(root, 'file')
+            with open(blocker, 'w') as f:
+                f.write('')
+
+            allocator = IntegerProgramCpuAllocator(get_cpu())
+            allocator.set_solution_cache_path(os.path.join(blocker, 'solutions'))
+            allocator.assign_threads(Workload("a", 2, STATIC))
+            self.assertEqual(1, len(allocator.get_solution_cache()))
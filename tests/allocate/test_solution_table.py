@@ -0,0 +1,72 @@
+import logging
+import os
+import tempfile
+import unittest
+
+from tests.utils import config_logs
+from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator
+from titus_isolate.allocate.precompute import precompute_solutions
+from titus_isolate.allocate.solution_cache_file import get_cache_version
+from titus_isolate.allocate.solution_table import SolutionTable, get_solution_table_name, get_solution_table_path, \
+    write_solution_table
+from titus_isolate.docker.constants import STATIC
+from titus_isolate.model.processor.config import get_cpu, get_cpu_from_topology
+from titus_isolate.model.workload import Workload
+
+config_logs(logging.DEBUG)
+
+SHAPE = (1, 4, 2)
+
+
+def place(allocator, workloads):
+    for w in workloads:
+        allocator.assign_threads(w)
+    return allocator.get_cpu().get_workload_ids_to_thread_ids()
+
+
+class TestSolutionTable(unittest.TestCase):
+
+    def test_table_name(self):
+        self.assertEqual('2x24x2.solutions', get_solution_table_name(get_cpu(2, 24, 2)))
+        self.assertIsNone(get_solution_table_name(get_cpu_from_topology([[[0, 1], [2]]])))
+
+    def test_precomputed_solutions_are_used(self):
+        cpu = get_cpu(*SHAPE)
+        solutions = precompute_solutions(cpu, request_sizes=[1, 2], max_workloads=2, solver_max_runtime_secs=2)
+
+        # 2 adds to the empty CPU, 4 adds and 2 removes from the 2 states they lead to, then 8 removes from the last 4
+        # states, less any duplicates
+        self.assertTrue(8 <= len(solutions) <= 16)
+
+        with tempfile.TemporaryDirectory() as directory:
+            write_solution_table(get_solution_table_path(directory, cpu), get_cache_version(cpu), solutions)
+
+            allocator = IntegerProgramCpuAllocator(get_cpu(*SHAPE))
+            allocator.set_solution_table_dir(directory)
+            self.assertEqual(len(solutions), len(allocator.get_solution_table()))
+
+            workloads = [Workload("a", 2, STATIC), Workload("b", 1, STATIC)]
+            placement = place(allocator, workloads)
+            self.assertEqual(2, allocator.get_solution_table().get_hit_count())
+            self.assertEqual(0, allocator.get_solution_table().get_miss_count())
+
+            allocator.free_threads("a")
+            self.assertEqual(3, allocator.get_solution_table().get_hit_count())
+
+            # The same placement as solving online
+            self.assertEqual(placement, place(IntegerProgramCpuAllocator(get_cpu(*SHAPE)), workloads))
+
+    def test_table_of_other_version_is_ignored(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'table')
+            write_solution_table(path, 'v1', {b'a': ([[1, 0]], 'optimal')})
+            self.assertEqual(1, len(SolutionTable.load(path, 'v1')))
+            self.assertEqual(0, len(SolutionTable.load(path, 'v2')))
+            self.assertEqual(0, len(SolutionTable.load(os.path.join(directory, 'missing'), 'v1')))
+
+    def test_missing_table(self):
+        with tempfile.TemporaryDirectory() as directory:
+            allocator = IntegerProgramCpuAllocator(get_cpu(*SHAPE))
+            allocator.set_solution_table_dir(directory)
+            allocator.assign_threads(Workload("a", 2, STATIC))
+            self.assertEqual(1, allocator.get_solution_table().get_miss_count())
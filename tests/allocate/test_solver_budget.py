@@ -0,0 +1,99 @@
+import logging
+import unittest
+from unittest.mock import patch
+
+from tests.utils import config_logs
+from titus_isolate.allocate.core_integer_program import CORE_FORMULATION, THREAD_FORMULATION
+from titus_isolate.allocate import integer_program_cpu_allocator
+from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator
+from titus_isolate.allocate.solver_budget import RuntimeModel, SolverBudget, get_problem_size
+from titus_isolate.docker.constants import STATIC
+from titus_isolate.model.processor.config import get_cpu
+from titus_isolate.model.workload import Workload
+from titus_optimize.compute import IP_SOLUTION_OPTIMAL, IP_SOLUTION_TIME_BOUND
+
+config_logs(logging.DEBUG)
+
+
+def get_solver_args(workload_count, thread_count=16, max_runtime_secs=1.5, formulation=THREAD_FORMULATION):
+    return [1] * workload_count, thread_count, 2, None, max_runtime_secs, formulation
+
+
+class TestSolverBudget(unittest.TestCase):
+
+    def test_problem_size(self):
+        self.assertEqual(48, get_problem_size(get_solver_args(3)))
+        self.assertEqual(24, get_problem_size(get_solver_args(3, formulation=CORE_FORMULATION)))
+
+    def test_runtime_model(self):
+        model = RuntimeModel(min_samples=3)
+        model.record(10, 0.01, 1.5, IP_SOLUTION_OPTIMAL)
+        model.record(100, 0.1, 1.5, IP_SOLUTION_OPTIMAL)
+        self.assertIsNone(model.predict(1000))
+
+        # Time bound solves only measure the overhead
+        model.record(1000, 1.7, 1.5, IP_SOLUTION_TIME_BOUND)
+        self.assertIsNone(model.predict(1000))
+        self.assertAlmostEqual(0.2, model.get_overhead_secs())
+
+        model.record(1000, 1.0, 1.5, IP_SOLUTION_OPTIMAL)
+        self.assertAlmostEqual(10.0, model.predict(10000))
+
+    def test_default_budget_without_slo(self):
+        budget = SolverBudget(1.5)
+        for _ in range(10):
+            budget.record(get_solver_args(2), 0.01, IP_SOLUTION_OPTIMAL)
+        self.assertEqual(1.5, budget.budget(get_solver_args(2))[4])
+
+    def test_budget_within_slo(self):
+        budget = SolverBudget(1.5, slo_secs=1.0, min_samples=2)
+        self.assertEqual(1.0, budget.get_budget(get_solver_args(2)))
+
+        budget.record(get_solver_args(1), 0.01, IP_SOLUTION_OPTIMAL)
+        budget.record(get_solver_args(4), 0.04, IP_SOLUTION_OPTIMAL)
+        self.assertAlmostEqual(0.16, budget.get_budget(get_solver_args(8)))
+        self.assertAlmostEqual(0.08, budget.get_last_predicted_secs())
+        self.assertEqual(0.1, budget.get_budget(get_solver_args(1)))
+        self.assertEqual(1.0, budget.get_budget(get_solver_args(100)))
+
+        # Solves take 0.2s beyond their limit, which comes out of the SLO
+        budget.record(get_solver_args(100, max_runtime_secs=1.0), 1.2, IP_SOLUTION_TIME_BOUND)
+        self.assertAlmostEqual(0.8, budget.get_budget(get_solver_args(100)))
+        self.assertEqual(1, budget.get_slo_miss_count())
+        self.assertAlmostEqual(1 / 3, budget.get_time_bound_ratio())
+
+        # Other topologies are modeled separately
+        self.assertEqual(1.0, budget.get_budget(get_solver_args(8, thread_count=8)))
+
+    def test_allocator_records_solves(self):
+        allocator = IntegerProgramCpuAllocator(get_cpu(2, 4, 2), solver_latency_slo_secs=5.0)
+        allocator.assign_threads(Workload("a", 2, STATIC))
+        allocator.assign_threads(Workload("b", 2, STATIC))
+        allocator.free_threads("a")
+
+        # Requests found in the solution cache are not solved
+        solver_budget = allocator.get_solver_budget()
+        self.assertEqual(allocator.get_solution_cache().get_miss_count(), solver_budget.get_solve_count())
+        self.assertTrue(solver_budget.get_solve_count() >= 2)
+        self.assertEqual(1.5, solver_budget.get_last_budget_secs())
+        self.assertEqual(0, solver_budget.get_slo_miss_count())
+
+    def test_time_bound_solutions_of_reduced_budgets_are_not_cached(self):
+        solve_ip = integer_program_cpu_allocator.solve_ip
+
+        def time_bound_solve_ip(solver_args):
+            return solve_ip(solver_args)[0], IP_SOLUTION_TIME_BOUND
+
+        with patch.object(integer_program_cpu_allocator, 'solve_ip', time_bound_solve_ip):
+            # The SLO cuts the time limit below the default one
+            allocator = IntegerProgramCpuAllocator(get_cpu(2, 4, 2), solver_latency_slo_secs=0.5)
+            request = allocator.get_assign_request([Workload("a", 2, STATIC)])
+            allocator.assign_threads(Workload("a", 2, STATIC))
+            self.assertEqual(0.5, allocator.get_solver_budget().get_last_budget_secs())
+            self.assertIsNone(allocator.get_cached_solution(request))
+            self.assertEqual(0, len(allocator.get_solution_cache()))
+
+            # Solves given the full time limit are cached
+            allocator = IntegerProgramCpuAllocator(get_cpu(2, 4, 2))
+            allocator.assign_threads(Workload("a", 2, STATIC))
+            self.assertEqual(IP_SOLUTION_TIME_BOUND, allocator.get_cached_solution(request)[1])
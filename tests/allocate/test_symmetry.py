@@ -0,0 +1,57 @@
+import logging
+import unittest
+
+from tests.utils import config_logs
+from titus_isolate.allocate.symmetry import canonicalize
+
+config_logs(logging.DEBUG)
+
+# 2 packages of 2 cores of 2 threads
+CORE_THREAD_COUNTS = [[2, 2], [2, 2]]
+
+
+def get_vector(*slots):
+    return [1 if s in slots else 0 for s in range(8)]
+
+
+class TestSymmetry(unittest.TestCase):
+
+    def test_empty_placement_is_identity(self):
+        self.assertTrue(canonicalize([2], None, CORE_THREAD_COUNTS).is_identity())
+        self.assertTrue(canonicalize([2], [], CORE_THREAD_COUNTS).is_identity())
+
+    def test_non_uniform_cpu_is_identity(self):
+        canonicalization = canonicalize([1, 1], [[1, 0, 0]], [[2], [1]])
+        self.assertTrue(canonicalization.is_identity())
+        self.assertEqual([[1, 0, 0]], canonicalization.get_current_placement())
+
+    def test_permuted_packages_and_cores_are_equivalent(self):
+        # A 2 thread workload on the second core of the first package, or on the first core of the second package
+        a = canonicalize([2, 1], [get_vector(2, 3)], CORE_THREAD_COUNTS)
+        b = canonicalize([2, 1], [get_vector(4, 5)], CORE_THREAD_COUNTS)
+        self.assertEqual(a.get_current_placement(), b.get_current_placement())
+        self.assertEqual(a.get_requested_units(), b.get_requested_units())
+
+    def test_reordered_workloads_are_equivalent(self):
+        a = canonicalize([2, 1, 4], [get_vector(0, 1), get_vector(4)], CORE_THREAD_COUNTS)
+        b = canonicalize([1, 2, 4], [get_vector(4), get_vector(0, 1)], CORE_THREAD_COUNTS)
+        self.assertEqual(a.get_current_placement(), b.get_current_placement())
+        self.assertEqual(a.get_requested_units(), b.get_requested_units())
+
+        # The new workload, which has no placement yet, keeps its position
+        self.assertEqual(4, a.get_requested_units()[-1])
+
+    def test_different_layouts_are_not_equivalent(self):
+        # Two workloads sharing a core is not the same as two workloads on separate cores
+        a = canonicalize([1, 1], [get_vector(0), get_vector(1)], CORE_THREAD_COUNTS)
+        b = canonicalize([1, 1], [get_vector(0), get_vector(2)], CORE_THREAD_COUNTS)
+        self.assertNotEqual(a.get_current_placement(), b.get_current_placement())
+
+    def test_restore(self):
+        current_placement = [get_vector(6, 7), get_vector(2)]
+        canonicalization = canonicalize([2, 1, 1], current_placement, CORE_THREAD_COUNTS)
+        self.assertFalse(canonicalization.is_identity())
+
+        # Restoring the canonical current placement, plus an empty row for the new workload, gives back the original
+        canonical_placement = canonicalization.get_current_placement() + [[0] * 8]
+        self.assertEqual(current_placement + [[0] * 8], canonicalization.restore(canonical_placement))
@@ -43,7 +43,9 @@ class TestStatus(unittest.TestCase):
     def test_get_cpu_endpoint(self):
         set_wm(self.__get_default_workload_manager())
 
-        cpu_dict = json.loads(status.get_cpu())
+        response = status.app.test_client().get('/cpu')
+        self.assertEqual(200, response.status_code)
+        cpu_dict = json.loads(response.get_data(as_text=True))
         self.assertEqual(1, len(cpu_dict))
         self.assertEqual(DEFAULT_PACKAGE_COUNT, len(cpu_dict["packages"]))
         for p in cpu_dict["packages"]:
@@ -51,11 +53,27 @@ class TestStatus(unittest.TestCase):
             for c in p["cores"]:
                 self.assertEqual(DEFAULT_THREAD_COUNT, len(c["threads"]))
 
+    def test_get_cpu_endpoint_etag(self):
+        override_config_manager(ConfigManager(TestPropertyProvider({})))
+        workload_manager = self.__get_default_workload_manager()
+        set_wm(workload_manager)
+        client = status.app.test_client()
+
+        response = client.get('/cpu')
+        self.assertEqual(200, response.status_code)
+        etag = response.headers['ETag']
+        self.assertEqual(304, client.get('/cpu', headers={'If-None-Match': etag}).status_code)
+
+        workload_manager.add_workload(Workload(str(uuid.uuid4()), 2, STATIC))
+        response = client.get('/cpu', headers={'If-None-Match': etag})
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response.headers['ETag'])
+
     def test_get_violations_endpoint(self):
         set_wm(self.__get_default_workload_manager())
 
         violations = json.loads(get_violations())
-        self.assertEqual(2, len(violations))
+        self.assertEqual(3, len(violations))
 
     def test_get_wm_status_endpoint(self):
         set_wm(self.__get_default_workload_manager())
@@ -1,3 +1,4 @@
+import json
 import logging
 import unittest
 import uuid
@@ -131,3 +132,32 @@ class TestEvents(unittest.TestCase):
 
         manager.stop_processing_events()
 
+
+    def test_create_events_are_added_in_batches(self):
+        workloads = [Workload(str(i), DEFAULT_CPU_COUNT, STATIC) for i in range(4)]
+        docker_client = MockDockerClient([MockContainer(w) for w in workloads])
+        test_context = TestContext(docker_client)
+
+        events = [get_container_create_event(w.get_thread_count(), STATIC, w.get_id(), w.get_id()) for w in workloads]
+        event_count = len(events)
+        groomed_events = [json.loads(e.decode("utf-8")) for e in events]
+        test_context.get_create_event_handler().handle_batch(groomed_events)
+
+        self.assertEqual(event_count, test_context.get_create_event_handler().get_handled_event_count())
+        self.assertEqual(event_count, test_context.get_workload_manager().get_added_count())
+        self.assertEqual(1, test_context.get_workload_manager().get_ip_solution_cache().get_miss_count())
+        empty_thread_count = DEFAULT_TOTAL_THREAD_COUNT - event_count * DEFAULT_CPU_COUNT
+        self.assertEqual(empty_thread_count, len(test_context.get_cpu().get_empty_threads()))
+
+    def test_unparsable_event_fails_batch_without_side_effects(self):
+        test_context = TestContext()
+        unknown_event = get_event(
+            CONTAINER,
+            CREATE,
+            uuid.uuid4(),
+            {NAME: "container-name", CPU_LABEL_KEY: "1", WORKLOAD_TYPE_LABEL_KEY: "unknown"})
+        events = [json.loads(e.decode("utf-8")) for e in [get_container_create_event(1), unknown_event]]
+
+        with self.assertRaises(ValueError):
+            test_context.get_create_event_handler().handle_batch(events)
+        self.assertEqual(0, test_context.get_workload_manager().get_added_count())
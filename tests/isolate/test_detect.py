@@ -6,8 +6,9 @@ from tests.utils import config_logs
 from titus_isolate import log
 from titus_isolate.docker.constants import STATIC
 from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator
-from titus_isolate.isolate.detect import get_cross_package_violations, get_shared_core_violations
-from titus_isolate.model.processor.config import get_cpu
+from titus_isolate.isolate.detect import get_cross_package_violations, get_shared_core_violations, \
+    get_cross_llc_violations
+from titus_isolate.model.processor.config import get_cpu, get_cpu_from_topology
 from titus_isolate.model.workload import Workload
 
 config_logs(logging.DEBUG)
@@ -59,3 +60,27 @@ class TestDetect(unittest.TestCase):
         violations = get_shared_core_violations(cpu)
         log.info("shared core violations: {}".format(violations))
         self.assertEqual(2, len(violations))
+
+    def test_cross_llc_violation(self):
+        # 1 package of 4 cores, split between 2 last level caches
+        topology = [[[0, 4], [1, 5], [2, 6], [3, 7]]]
+        cpu = get_cpu_from_topology(topology, llc_topology=[[0, 1, 4, 5], [2, 3, 6, 7]])
+        threads = {t.get_id(): t for t in cpu.get_threads()}
+        self.assertEqual(0, len(get_cross_llc_violations(cpu)))
+
+        w_a = uuid.uuid4()
+        w_b = uuid.uuid4()
+        threads[0].claim(w_a)
+        threads[1].claim(w_a)
+        threads[2].claim(w_b)
+        self.assertEqual(0, len(get_cross_llc_violations(cpu)))
+
+        threads[3].claim(w_a)
+        violations = get_cross_llc_violations(cpu)
+        self.assertEqual({w_a: [0, 1]}, violations)
+        self.assertEqual(violations, get_cross_llc_violations(cpu.snapshot()))
+
+    def test_no_llc_information_has_no_cross_llc_violations(self):
+        cpu = get_cpu()
+        cpu.get_threads()[0].claim(uuid.uuid4())
+        self.assertEqual(0, len(get_cross_llc_violations(cpu)))
@@ -0,0 +1,79 @@
+import logging
+import unittest
+
+from tests.cgroup.mock_cgroup_manager import MockCgroupManager
+from tests.utils import config_logs, DeferredExecutor, SynchronousExecutor
+from titus_isolate.allocate.greedy_cpu_allocator import GreedyCpuAllocator
+from titus_isolate.docker.constants import STATIC
+from titus_isolate.isolate.presolver import Presolver, get_likely_thread_counts
+from titus_isolate.isolate.workload_manager import WorkloadManager
+from titus_isolate.model.processor.config import get_cpu
+from titus_isolate.model.workload import Workload
+
+config_logs(logging.DEBUG)
+
+
+class MockEventManager:
+    def __init__(self):
+        self.queue_depth = 0
+
+    def get_queue_depth(self):
+        return self.queue_depth
+
+
+class TestPresolver(unittest.TestCase):
+
+    def test_likely_thread_counts(self):
+        self.assertEqual([1, 2, 4, 8], get_likely_thread_counts([]))
+        self.assertEqual([3, 2, 1, 4], get_likely_thread_counts([2, 3, 3, 0]))
+        self.assertEqual([3, 2], get_likely_thread_counts([2, 3, 3], max_count=2))
+
+    def test_presolved_events_hit_the_cache(self):
+        wm = WorkloadManager(get_cpu(2, 4, 2), MockCgroupManager())
+        wm.add_workload(Workload("a", 3, STATIC))
+        self.assertEqual([3], wm.get_recent_request_sizes())
+
+        presolver = Presolver(wm, MockEventManager(), SynchronousExecutor())
+        presolver.presolve()
+        self.assertTrue(wm.get_presolved_count() > 0)
+        self.assertEqual([], wm.get_presolve_requests(get_likely_thread_counts([3]), 8))
+
+        # Adding a workload of the most frequent size, then removing one, finds their solutions in the cache
+        cache = wm.get_ip_solution_cache()
+        miss_count = cache.get_miss_count()
+        wm.add_workload(Workload("b", 3, STATIC))
+        wm.remove_workload("a")
+        self.assertEqual(miss_count, cache.get_miss_count())
+        self.assertEqual(0, wm.get_error_count())
+
+    def test_one_request_at_a_time(self):
+        wm = WorkloadManager(get_cpu(2, 4, 2), MockCgroupManager())
+        wm.add_workload(Workload("a", 3, STATIC))
+
+        executor = DeferredExecutor()
+        presolver = Presolver(wm, MockEventManager(), executor)
+        self.assertTrue(presolver.presolve())
+        self.assertFalse(presolver.presolve())
+        self.assertEqual(1, executor.get_pending_count())
+
+        # Each completed request submits the next one
+        executor.run_pending()
+        self.assertEqual(1, wm.get_presolved_count())
+        self.assertEqual(1, executor.get_pending_count())
+
+    def test_no_presolving_while_events_are_queued(self):
+        wm = WorkloadManager(get_cpu(2, 4, 2), MockCgroupManager())
+        event_manager = MockEventManager()
+        event_manager.queue_depth = 1
+
+        presolver = Presolver(wm, event_manager, SynchronousExecutor())
+        self.assertFalse(presolver.presolve())
+        self.assertEqual(1, presolver.get_skipped_count())
+        self.assertEqual(0, wm.get_presolved_count())
+
+    def test_no_presolving_without_ip_allocator(self):
+        wm = WorkloadManager(get_cpu(2, 4, 2), MockCgroupManager(), allocator_class=GreedyCpuAllocator)
+        wm.add_workload(Workload("a", 3, STATIC))
+
+        self.assertFalse(Presolver(wm, MockEventManager(), SynchronousExecutor()).presolve())
+        self.assertEqual(0, wm.get_presolved_count())
@@ -0,0 +1,101 @@
+import logging
+import unittest
+
+from tests.cgroup.mock_cgroup_manager import MockCgroupManager
+from tests.utils import config_logs
+from titus_isolate.allocate.greedy_cpu_allocator import GreedyCpuAllocator
+from titus_isolate.docker.constants import STATIC
+from titus_isolate.isolate.detect import get_cross_package_violation_count
+from titus_isolate.isolate.rebalancer import Rebalancer, get_candidate_placement
+from titus_isolate.isolate.workload_manager import WorkloadManager
+from titus_isolate.model.processor.config import get_cpu
+from titus_isolate.model.workload import Workload
+
+config_logs(logging.DEBUG)
+
+
+class MockEventManager:
+    def __init__(self):
+        self.queue_depth = 0
+        self.processed_count = 0
+
+    def get_queue_depth(self):
+        return self.queue_depth
+
+    def get_processed_count(self):
+        return self.processed_count
+
+
+def get_degraded_workload_manager():
+    """
+    Greedily places workload 'c' across both packages of a 2x4x2 CPU
+    """
+    wm = WorkloadManager(get_cpu(2, 4, 2), MockCgroupManager(), allocator_class=GreedyCpuAllocator)
+    for workload_id, thread_count in [("a", 4), ("b", 4), ("c", 6)]:
+        wm.add_workload(Workload(workload_id, thread_count, STATIC))
+    return wm
+
+
+class TestRebalancer(unittest.TestCase):
+
+    def test_candidate_placement(self):
+        cpu = get_degraded_workload_manager().get_cpu_snapshot()
+        self.assertEqual(1, get_cross_package_violation_count(cpu))
+
+        candidate = cpu.remap(get_candidate_placement(cpu))
+        self.assertEqual(0, get_cross_package_violation_count(candidate))
+        self.assertEqual(cpu.get_claimed_thread_count(), candidate.get_claimed_thread_count())
+
+    def test_rebalance(self):
+        wm = get_degraded_workload_manager()
+        rebalancer = Rebalancer(wm, MockEventManager(), min_rebalance_interval=0)
+
+        # The queue must have been idle since a previous check
+        self.assertFalse(rebalancer.rebalance())
+        self.assertEqual(1, rebalancer.get_skipped_count())
+
+        self.assertTrue(rebalancer.rebalance())
+        self.assertEqual(0, get_cross_package_violation_count(wm.get_cpu_snapshot()))
+        self.assertEqual(1, wm.get_applied_rebalance_count())
+        self.assertTrue(wm.get_moved_workload_count() > 0)
+
+        # There is nothing left to improve
+        self.assertFalse(rebalancer.rebalance())
+        self.assertEqual(1, rebalancer.get_rejected_count())
+
+    def test_rebalance_waits_for_idle_events(self):
+        event_manager = MockEventManager()
+        rebalancer = Rebalancer(get_degraded_workload_manager(), event_manager, min_rebalance_interval=0)
+        rebalancer.rebalance()
+
+        event_manager.processed_count += 1
+        self.assertFalse(rebalancer.rebalance())
+        event_manager.queue_depth = 1
+        self.assertFalse(rebalancer.rebalance())
+        self.assertEqual(3, rebalancer.get_skipped_count())
+
+    def test_rebalance_is_rate_limited(self):
+        wm = get_degraded_workload_manager()
+        rebalancer = Rebalancer(wm, MockEventManager(), min_rebalance_interval=3600)
+        rebalancer.rebalance()
+        self.assertTrue(rebalancer.rebalance())
+
+        wm.add_workload(Workload("d", 2, STATIC))
+        wm.remove_workload("a")
+        self.assertFalse(rebalancer.rebalance())
+        self.assertEqual(2, rebalancer.get_skipped_count())
+
+    def test_rebalance_respects_churn_budget(self):
+        wm = get_degraded_workload_manager()
+        rebalancer = Rebalancer(wm, MockEventManager(), churn_budget=1, min_rebalance_interval=0)
+        rebalancer.rebalance()
+
+        self.assertFalse(rebalancer.rebalance())
+        self.assertEqual(1, rebalancer.get_rejected_count())
+        self.assertEqual(1, get_cross_package_violation_count(wm.get_cpu_snapshot()))
+
+    def test_stale_placement_is_discarded(self):
+        wm = get_degraded_workload_manager()
+        self.assertFalse(wm.rebalance(wm.get_cpu_snapshot().fingerprint() + 1, {}))
+        self.assertEqual(1, wm.get_discarded_rebalance_count())
+        self.assertEqual(14, wm.get_cpu_snapshot().get_claimed_thread_count())
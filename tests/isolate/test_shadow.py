@@ -0,0 +1,144 @@
+import logging
+import unittest
+
+from tests.cgroup.mock_cgroup_manager import MockCgroupManager
+from tests.utils import config_logs, wait_until, DeferredExecutor, SynchronousExecutor
+from titus_isolate.allocate.best_fit_cpu_allocator import BestFitCpuAllocator
+from titus_isolate.allocate.greedy_cpu_allocator import GreedyCpuAllocator
+from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator
+from titus_isolate.docker.constants import STATIC, BURST
+from titus_isolate.isolate.shadow import ShadowEvaluator
+from titus_isolate.isolate.workload_manager import WorkloadManager
+from titus_isolate.model.processor.config import get_cpu
+from titus_isolate.model.workload import Workload
+
+config_logs(logging.DEBUG)
+
+
+class FailingCpuAllocator(GreedyCpuAllocator):
+    def assign_threads(self, workload):
+        raise ValueError("Failing to assign threads to workload: '{}'".format(workload.get_id()))
+
+
+def get_shadowed_workload_manager(shadow_allocator_class=BestFitCpuAllocator, executor=None):
+    if executor is None:
+        executor = SynchronousExecutor()
+
+    return WorkloadManager(
+        get_cpu(2, 4, 2),
+        MockCgroupManager(),
+        allocator_class=GreedyCpuAllocator,
+        shadow_allocator_class=shadow_allocator_class,
+        shadow_executor=executor)
+
+
+def get_placement(cpu):
+    return {t.get_id(): t.get_workload_id() for t in cpu.get_claimed_threads()}
+
+
+class TestShadow(unittest.TestCase):
+
+    def test_replay_adds_and_removes(self):
+        wm = get_shadowed_workload_manager()
+        for workload_id, thread_count in [("a", 4), ("b", 4), ("c", 6)]:
+            wm.add_workload(Workload(workload_id, thread_count, STATIC))
+
+        shadow_evaluator = wm.get_shadow_evaluator()
+        self.assertEqual(BestFitCpuAllocator.__name__, shadow_evaluator.get_allocator_name())
+        self.assertEqual(sorted(wm.get_cpu().get_workload_ids()),
+                         sorted(shadow_evaluator.get_shadow_cpu().get_workload_ids()))
+
+        # The greedy allocator spreads the last workload over both packages, best fit does not
+        live_stats = shadow_evaluator.get_live_stats()
+        shadow_stats = shadow_evaluator.get_shadow_stats()
+        self.assertEqual(3, live_stats.get_call_count())
+        self.assertEqual(3, shadow_stats.get_call_count())
+        self.assertEqual(1, live_stats.get_cross_package_violation_count())
+        self.assertEqual(0, shadow_stats.get_cross_package_violation_count())
+        self.assertTrue(shadow_stats.get_call_duration_sum_secs() > 0)
+
+        wm.remove_workload("c")
+        self.assertEqual(4, live_stats.get_call_count())
+        self.assertEqual(4, shadow_stats.get_call_count())
+        self.assertEqual(0, live_stats.get_cross_package_violation_count())
+        self.assertEqual(["a", "b"], sorted(shadow_evaluator.get_shadow_cpu().get_workload_ids()))
+        self.assertEqual(0, shadow_stats.get_error_count())
+
+    def test_replay_batch(self):
+        wm = get_shadowed_workload_manager()
+        wm.add_workloads([Workload("a", 4, STATIC), Workload("b", 2, STATIC), Workload("c", 1, BURST)])
+
+        shadow_evaluator = wm.get_shadow_evaluator()
+        self.assertEqual(1, shadow_evaluator.get_shadow_stats().get_call_count())
+        self.assertEqual(["a", "b"], sorted(shadow_evaluator.get_shadow_cpu().get_workload_ids()))
+
+    def test_burst_workloads_are_not_replayed(self):
+        wm = get_shadowed_workload_manager()
+        wm.add_workload(Workload("a", 2, BURST))
+        self.assertEqual(0, wm.get_shadow_evaluator().get_shadow_stats().get_call_count())
+
+    def test_replay_in_background(self):
+        executor = DeferredExecutor()
+        wm = get_shadowed_workload_manager(executor=executor)
+        wm.add_workload(Workload("a", 4, STATIC))
+
+        shadow_evaluator = wm.get_shadow_evaluator()
+        self.assertEqual(1, len(wm.get_cpu().get_workload_ids()))
+        self.assertEqual(0, len(shadow_evaluator.get_shadow_cpu().get_workload_ids()))
+        self.assertEqual(1, executor.get_pending_count())
+
+        executor.run_pending()
+        self.assertEqual(["a"], sorted(shadow_evaluator.get_shadow_cpu().get_workload_ids()))
+        self.assertEqual(1, shadow_evaluator.get_live_stats().get_call_count())
+
+    def test_replay_in_worker_process(self):
+        wm = WorkloadManager(
+            get_cpu(2, 4, 2),
+            MockCgroupManager(),
+            allocator_class=GreedyCpuAllocator,
+            shadow_allocator_class=BestFitCpuAllocator)
+        for workload_id in ["a", "b"]:
+            wm.add_workload(Workload(workload_id, 4, STATIC))
+
+        shadow_evaluator = wm.get_shadow_evaluator()
+        wait_until(lambda: shadow_evaluator.get_shadow_stats().get_call_count() == 2)
+        self.assertEqual(["a", "b"], sorted(shadow_evaluator.get_shadow_cpu().get_workload_ids()))
+        self.assertEqual(2, shadow_evaluator.get_live_stats().get_call_count())
+        self.assertEqual(0, shadow_evaluator.get_shadow_stats().get_error_count())
+
+    def test_start_from_live_placement(self):
+        cpu = get_cpu(2, 4, 2)
+        GreedyCpuAllocator(cpu).assign_threads(Workload("a", 3, STATIC))
+
+        shadow_evaluator = ShadowEvaluator(cpu, BestFitCpuAllocator, SynchronousExecutor())
+        self.assertEqual(get_placement(cpu), get_placement(shadow_evaluator.get_shadow_cpu()))
+        self.assertEqual(1, shadow_evaluator.get_reset_count())
+
+    def test_burst_removal_is_not_replayed(self):
+        wm = get_shadowed_workload_manager(shadow_allocator_class=IntegerProgramCpuAllocator)
+        wm.add_workload(Workload("a", 2, STATIC))
+        wm.add_workload(Workload("b", 2, BURST))
+        wm.remove_workload("b")
+
+        shadow_evaluator = wm.get_shadow_evaluator()
+        self.assertEqual(1, shadow_evaluator.get_shadow_stats().get_call_count())
+        self.assertEqual(0, shadow_evaluator.get_shadow_stats().get_error_count())
+        self.assertEqual(1, shadow_evaluator.get_reset_count())
+        self.assertEqual(0, wm.get_error_count())
+
+    def test_reset_to_live_placement_on_failure(self):
+        wm = get_shadowed_workload_manager(shadow_allocator_class=FailingCpuAllocator)
+        wm.add_workload(Workload("a", 4, STATIC))
+        self.assertEqual(1, wm.get_added_count())
+        self.assertEqual(0, wm.get_error_count())
+
+        shadow_evaluator = wm.get_shadow_evaluator()
+        self.assertEqual(1, shadow_evaluator.get_shadow_stats().get_error_count())
+        self.assertEqual(0, shadow_evaluator.get_shadow_stats().get_call_count())
+        self.assertEqual(2, shadow_evaluator.get_reset_count())
+        self.assertEqual(get_placement(wm.get_cpu()), get_placement(shadow_evaluator.get_shadow_cpu()))
+
+        # The shadow allocator frees the workload it was reset with
+        wm.remove_workload("a")
+        self.assertEqual(1, shadow_evaluator.get_shadow_stats().get_call_count())
+        self.assertEqual(0, len(shadow_evaluator.get_shadow_cpu().get_claimed_threads()))
@@ -53,3 +53,18 @@ class TestUpdate(unittest.TestCase):
         updates = get_updates(cur_cpu, new_cpu)
         self.assertEqual(1, len(updates))
         self.assertEqual(updates[workload_id], [8])
+
+    def test_get_updates_from_snapshots(self):
+        cpu = get_cpu()
+        cpu.get_threads()[0].claim("a")
+        cpu.get_threads()[8].claim("b")
+        cur_cpu = cpu.snapshot()
+
+        # Move "a", leave "b" alone and add "c"
+        cpu.get_threads()[0].free()
+        cpu.get_threads()[1].claim("a")
+        cpu.get_threads()[2].claim("c")
+        new_cpu = cpu.snapshot()
+
+        updates = get_updates(cur_cpu, new_cpu)
+        self.assertEqual({"a": [8], "c": [1]}, updates)
@@ -4,13 +4,15 @@ import unittest
 from tests.config.test_property_provider import TestPropertyProvider
 from tests.utils import config_logs
 from titus_isolate import log
+from titus_isolate.allocate.best_fit_cpu_allocator import BestFitCpuAllocator
 from titus_isolate.allocate.greedy_cpu_allocator import GreedyCpuAllocator
 from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator
 from titus_isolate.allocate.noop_allocator import NoopCpuAllocator
 from titus_isolate.config.config_manager import ConfigManager
 from titus_isolate.config.constants import ALLOCATOR_KEY, NOOP, AB_TEST, GREEDY, CPU_ALLOCATOR_B, CPU_ALLOCATOR_A, IP, \
-    EC2_INSTANCE_ID
-from titus_isolate.isolate.utils import get_allocator_class, get_ab_bucket, _get_ab_bucket_int
+    EC2_INSTANCE_ID, BEST_FIT, SHADOW_ALLOCATOR_KEY
+from titus_isolate.isolate.utils import get_allocator_class, get_ab_bucket, _get_ab_bucket_int, \
+    get_shadow_allocator_class
 
 config_logs(logging.DEBUG)
 
@@ -26,6 +28,18 @@ class TestUtils(unittest.TestCase):
         allocator_class = get_allocator_class(config_manager)
         self.assertEqual(NoopCpuAllocator, allocator_class)
 
+    def test_get_best_fit_cpu_allocator(self):
+        config_manager = ConfigManager(TestPropertyProvider({ALLOCATOR_KEY: BEST_FIT}))
+        self.assertEqual(BestFitCpuAllocator, get_allocator_class(config_manager))
+
+    def test_get_shadow_cpu_allocator(self):
+        self.assertIsNone(get_shadow_allocator_class(ConfigManager(TestPropertyProvider({}))))
+        config_manager = ConfigManager(TestPropertyProvider({SHADOW_ALLOCATOR_KEY: AB_TEST}))
+        self.assertIsNone(get_shadow_allocator_class(config_manager))
+
+        config_manager = ConfigManager(TestPropertyProvider({SHADOW_ALLOCATOR_KEY: BEST_FIT}))
+        self.assertEqual(BestFitCpuAllocator, get_shadow_allocator_class(config_manager))
+
     def test_ab_allocator_selection(self):
         even_instance_id = 'i-0cfefd19c9a8db976'
         property_provider = TestPropertyProvider(
@@ -6,10 +6,11 @@ from tests.cgroup.mock_cgroup_manager import MockCgroupManager
 from tests.config.test_property_provider import TestPropertyProvider
 from tests.docker.mock_docker import MockDockerClient, MockContainer
 from tests.allocate.crashing_allocators import CrashingAllocator, CrashingAssignAllocator
-from tests.utils import config_logs
+from tests.utils import config_logs, DeferredExecutor, SynchronousExecutor
 from titus_isolate import log
 from titus_isolate.config.config_manager import ConfigManager
 from titus_isolate.docker.constants import STATIC, BURST
+from titus_isolate.allocate.best_fit_cpu_allocator import BestFitCpuAllocator
 from titus_isolate.allocate.greedy_cpu_allocator import GreedyCpuAllocator
 from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator
 from titus_isolate.isolate.detect import get_cross_package_violations, get_shared_core_violations
@@ -199,3 +200,166 @@ class TestWorkloadManager(unittest.TestCase):
         wm.add_workload(Workload("foo", 1, STATIC))
 
         self.assertEqual(1, wm.get_error_count())
+
+    def test_cpu_snapshot_is_published(self):
+        workload = Workload(uuid.uuid4(), 2, STATIC)
+        workload_manager = WorkloadManager(get_cpu(), MockCgroupManager(), allocator_class=GreedyCpuAllocator)
+
+        snapshot = workload_manager.get_cpu_snapshot()
+        self.assertEqual(0, snapshot.get_claimed_thread_count())
+
+        workload_manager.add_workload(workload)
+        self.assertEqual(0, snapshot.get_claimed_thread_count())
+        self.assertEqual(2, workload_manager.get_cpu_snapshot().get_claimed_thread_count())
+        self.assertEqual(workload_manager.get_cpu().get_version(), workload_manager.get_cpu_snapshot().get_version())
+
+        workload_manager.remove_workload(workload.get_id())
+        self.assertEqual(0, workload_manager.get_cpu_snapshot().get_claimed_thread_count())
+
+        # Burst workloads do not change the placement, so the published snapshot is kept
+        snapshot = workload_manager.get_cpu_snapshot()
+        workload_manager.add_workload(Workload(uuid.uuid4(), 2, BURST))
+        self.assertIs(snapshot, workload_manager.get_cpu_snapshot())
+
+    def test_anytime_upgrade_is_applied(self):
+        cpu = get_cpu(package_count=2, cores_per_package=2, threads_per_core=2)
+        cgroup_manager = MockCgroupManager()
+        wm = WorkloadManager(cpu, cgroup_manager, anytime=True, upgrade_executor=SynchronousExecutor())
+        self.assertTrue(wm.is_anytime())
+
+        for workload_id in ["a", "b", "c", "d"]:
+            wm.add_workload(Workload(workload_id, 2, STATIC))
+        wm.remove_workload("a")
+        wm.remove_workload("b")
+
+        # The greedy placement of 'e' spans both packages until the integer program moves 'c' or 'd' out of its way
+        wm.add_workload(Workload("e", 4, STATIC))
+        self.assertEqual(0, len(get_cross_package_violations(wm.get_cpu())))
+        self.assertLessEqual(1, wm.get_applied_upgrade_count())
+        self.assertEqual(0, wm.get_error_count())
+
+        for workload_id in ["c", "d", "e"]:
+            self.assertEqual(
+                sorted([t.get_id() for t in wm.get_cpu().get_workload_threads(workload_id)]),
+                sorted(cgroup_manager.container_update_map[workload_id]))
+        self.assertEqual(wm.get_cpu().get_version(), wm.get_cpu_snapshot().get_version())
+
+    def test_anytime_stale_upgrade_is_discarded(self):
+        cpu = get_cpu(package_count=2, cores_per_package=2, threads_per_core=2)
+        executor = DeferredExecutor()
+        wm = WorkloadManager(cpu, MockCgroupManager(), anytime=True, upgrade_executor=executor)
+
+        # Workloads are placed right away, one upgrade is in flight and the other requests are coalesced
+        wm.add_workload(Workload("a", 3, STATIC))
+        wm.add_workload(Workload("b", 3, STATIC))
+        self.assertEqual(6, len(wm.get_cpu().get_claimed_threads()))
+        self.assertEqual(1, executor.get_pending_count())
+
+        # The upgrade solved for 'a' alone is stale, and the coalesced request for 'a' and 'b' replaces it
+        executor.run_pending()
+        self.assertEqual(1, wm.get_discarded_upgrade_count())
+        self.assertEqual(1, executor.get_pending_count())
+
+        executor.run_pending()
+        self.assertEqual(0, executor.get_pending_count())
+        self.assertEqual(6, len(wm.get_cpu().get_claimed_threads()))
+        self.assertEqual(0, wm.get_error_count())
+
+    def test_anytime_requires_ip_allocator(self):
+        wm = WorkloadManager(get_cpu(), MockCgroupManager(), allocator_class=GreedyCpuAllocator, anytime=True)
+        self.assertFalse(wm.is_anytime())
+
+    def test_fast_free_compacts_in_background(self):
+        executor = DeferredExecutor()
+        wm = WorkloadManager(get_cpu(2, 2, 2), MockCgroupManager(), fast_free=True, upgrade_executor=executor)
+        self.assertTrue(wm.is_fast_free())
+        for workload_id, thread_count in [("a", 3), ("b", 3), ("c", 2)]:
+            wm.add_workload(Workload(workload_id, thread_count, STATIC))
+        self.assertEqual(1, len(get_cross_package_violations(wm.get_cpu())))
+
+        # Freeing 'a' only releases its threads, and the cross package violation left requests a compaction
+        wm.remove_workload("a")
+        self.assertEqual(5, len(wm.get_cpu().get_claimed_threads()))
+        self.assertEqual(1, len(get_cross_package_violations(wm.get_cpu())))
+        self.assertEqual(1, wm.get_requested_compaction_count())
+        self.assertEqual(1, executor.get_pending_count())
+
+        executor.run_pending()
+        self.assertEqual(1, wm.get_applied_upgrade_count())
+        self.assertEqual(0, len(get_cross_package_violations(wm.get_cpu())))
+        self.assertEqual(0, wm.get_error_count())
+
+    def test_fast_free_below_thresholds_does_not_compact(self):
+        executor = DeferredExecutor()
+        wm = WorkloadManager(get_cpu(2, 2, 2), MockCgroupManager(), fast_free=True, upgrade_executor=executor)
+        for workload_id in ["a", "b"]:
+            wm.add_workload(Workload(workload_id, 4, STATIC))
+
+        wm.remove_workload("a")
+        self.assertEqual(0, wm.get_requested_compaction_count())
+        self.assertEqual(0, executor.get_pending_count())
+        self.assertEqual(4, len(wm.get_cpu().get_claimed_threads()))
+
+    def test_fast_free_from_ip_placement_does_not_compact(self):
+        executor = DeferredExecutor()
+        wm = WorkloadManager(get_cpu(2, 4, 2), MockCgroupManager(), fast_free=True, upgrade_executor=executor)
+        for workload_id in ["a", "b", "c", "d", "e"]:
+            wm.add_workload(Workload(workload_id, 2, STATIC))
+
+        # The integer program leaves the siblings of most claimed threads empty, which is no reason to compact
+        for workload_id in ["a", "b", "c"]:
+            wm.remove_workload(workload_id)
+            self.assertEqual(0, wm.get_requested_compaction_count())
+            self.assertEqual(0, executor.get_pending_count())
+        self.assertEqual(4, len(wm.get_cpu().get_claimed_threads()))
+        self.assertEqual(0, wm.get_discarded_upgrade_count())
+
+    def test_fast_free_requires_ip_allocator(self):
+        wm = WorkloadManager(get_cpu(), MockCgroupManager(), allocator_class=GreedyCpuAllocator, fast_free=True)
+        self.assertFalse(wm.is_fast_free())
+        wm = WorkloadManager(get_cpu(), MockCgroupManager(), anytime=True, fast_free=True)
+        self.assertFalse(wm.is_fast_free())
+
+    def test_add_workloads(self):
+        cgroup_manager = MockCgroupManager()
+        wm = WorkloadManager(get_cpu(2, 4, 2), cgroup_manager)
+        wm.add_workload(Workload("x", 2, BURST))
+
+        workloads = [Workload("a", 4, STATIC), Workload("b", 2, STATIC), Workload("c", 2, BURST)]
+        wm.add_workloads(workloads)
+
+        self.assertEqual(4, wm.get_added_count())
+        self.assertEqual(0, wm.get_error_count())
+        self.assertEqual(1, wm.get_ip_solution_cache().get_miss_count())
+        self.assertEqual(6, len(wm.get_cpu().get_claimed_threads()))
+
+        # Each workload's cpuset is written once, and the burst workloads got the remaining threads
+        self.assertEqual(1, cgroup_manager.container_update_counts["a"])
+        self.assertEqual(1, cgroup_manager.container_update_counts["b"])
+        self.assertEqual(1, cgroup_manager.container_update_counts["c"])
+        empty_thread_ids = [t.get_id() for t in wm.get_cpu().get_empty_threads()]
+        self.assertEqual(empty_thread_ids, cgroup_manager.container_update_map["c"])
+        self.assertEqual(empty_thread_ids, cgroup_manager.container_update_map["x"])
+        self.assertEqual(wm.get_cpu().get_version(), wm.get_cpu_snapshot().get_version())
+
+    def test_add_workloads_one_at_a_time_after_failure(self):
+        wm = WorkloadManager(get_cpu(2, 2, 2), MockCgroupManager())
+
+        # All of them do not fit, but the first two do
+        wm.add_workloads([Workload("a", 4, STATIC), Workload("b", 4, STATIC), Workload("c", 2, STATIC)])
+
+        self.assertEqual({"a", "b"}, set(wm.get_cpu().get_workload_ids_to_thread_ids().keys()))
+        self.assertEqual(["a", "b"], sorted([w.get_id() for w in wm.get_workloads()]))
+        self.assertEqual(2, wm.get_added_count())
+
+    def test_churn_is_counted(self):
+        wm = WorkloadManager(get_cpu(2, 4, 2), MockCgroupManager(), allocator_class=BestFitCpuAllocator)
+        for workload_id, thread_count in [("a", 4), ("b", 3), ("c", 4)]:
+            wm.add_workload(Workload(workload_id, thread_count, STATIC))
+        self.assertEqual(0, wm.get_moved_workload_count())
+        self.assertEqual(0, wm.get_moved_thread_count())
+
+        # Adding 'd' moves 'a' to the other package
+        wm.add_workload(Workload("d", 5, STATIC))
+        self.assertEqual(1, wm.get_moved_workload_count())
+        self.assertEqual(4, wm.get_moved_thread_count())
@@ -1,21 +1,32 @@
 import logging
 import unittest
 import uuid
+from unittest.mock import MagicMock
 
 from spectator import Registry
 
 from tests.docker.mock_docker import MockEventProvider, get_container_create_event, get_container_die_event
 from tests.docker.test_events import DEFAULT_CPU_COUNT
-from tests.utils import wait_until, config_logs, TestContext, get_mock_file_manager
+from tests.cgroup.mock_cgroup_manager import MockCgroupManager
+from tests.utils import wait_until, config_logs, TestContext, get_mock_file_manager, SynchronousExecutor
 from titus_isolate import log
+from titus_isolate.allocate.best_fit_cpu_allocator import BestFitCpuAllocator
+from titus_isolate.allocate.greedy_cpu_allocator import GreedyCpuAllocator
+from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator
 from titus_isolate.docker.constants import STATIC
 from titus_isolate.docker.event_manager import EventManager
+from titus_isolate.isolate.shadow import LIVE, SHADOW
+from titus_isolate.isolate.workload_manager import WorkloadManager
 from titus_isolate.metrics.internal_metrics_reporter import ADDED_KEY, SUCCEEDED_KEY, FAILED_KEY, \
     PACKAGE_VIOLATIONS_KEY, \
     CORE_VIOLATIONS_KEY, QUEUE_DEPTH_KEY, InternalMetricsReporter, REMOVED_KEY, \
     WORKLOAD_COUNT_KEY, EVENT_SUCCEEDED_KEY, EVENT_FAILED_KEY, EVENT_PROCESSED_KEY, RUNNING, \
-    FALLBACK_ALLOCATOR_COUNT, IP_ALLOCATOR_TIMEBOUND_COUNT, ALLOCATOR_CALL_DURATION
+    FALLBACK_ALLOCATOR_COUNT, IP_ALLOCATOR_TIMEBOUND_COUNT, ALLOCATOR_CALL_DURATION, IP_SOLUTION_CACHE_MISS_KEY, \
+    IP_SOLUTION_CACHE_SIZE_KEY, IP_SOLUTION_CACHE_EVICTION_KEY, MOVED_WORKLOADS_KEY, MOVED_THREADS_KEY, \
+    SHADOW_CALL_COUNT_KEY, SHADOW_PACKAGE_VIOLATIONS_KEY, SHADOW_ROLE_TAG, SHADOW_ALLOCATOR_TAG, \
+    IP_SOLVER_BUDGET_KEY, IP_SOLVER_TIME_BOUND_RATIO_KEY, IP_SOLVER_SLO_MISS_KEY
 from titus_isolate.model.processor.config import get_cpu
+from titus_isolate.model.workload import Workload
 
 config_logs(logging.DEBUG)
 
@@ -96,15 +107,18 @@ class TestInternalMetricsReporter(unittest.TestCase):
         wait_until(lambda: self.__gauge_value_equals(registry, EVENT_PROCESSED_KEY, 1))
         wait_until(lambda: self.__gauge_value_equals(registry, FALLBACK_ALLOCATOR_COUNT, 0))
         wait_until(lambda: self.__gauge_value_equals(registry, IP_ALLOCATOR_TIMEBOUND_COUNT, 0))
+        wait_until(lambda: self.__gauge_value_equals(registry, MOVED_WORKLOADS_KEY, 0))
+        wait_until(lambda: self.__gauge_value_equals(registry, MOVED_THREADS_KEY, 0))
 
         event_manager.stop_processing_events()
 
     def test_edge_case_ip_allocator_metrics(self):
         # this is a specific scenario causing troubles to the solver.
         # we should hit the time-bound limit and report it.
+        # Solving incrementally or in batches avoids the trouble, so the whole CPU is solved for each event.
 
         cpu = get_cpu(2, 16, 2)
-        test_context = TestContext(cpu=cpu)
+        test_context = TestContext(cpu=cpu, allocator_class=lambda c: IntegerProgramCpuAllocator(c, incremental=False))
         test_context.get_workload_manager().get_allocator().set_solver_max_runtime_secs(0.01)
         events = []
         cnt_evts = 0
@@ -126,7 +140,8 @@ class TestInternalMetricsReporter(unittest.TestCase):
             MockEventProvider(events),
             test_context.get_event_handlers(),
             get_mock_file_manager(),
-            5.0)
+            5.0,
+            max_batch_size=1)
         
         wait_until(lambda: event_count == event_manager.get_processed_count(), timeout=20)
 
@@ -151,9 +166,55 @@ class TestInternalMetricsReporter(unittest.TestCase):
         wait_until(lambda: self.__gauge_value_equals(registry, EVENT_PROCESSED_KEY, 26))
         wait_until(lambda: self.__gauge_value_reached(registry, IP_ALLOCATOR_TIMEBOUND_COUNT, 1))
         wait_until(lambda: self.__gauge_value_reached(registry, ALLOCATOR_CALL_DURATION, 0.1))
+        wait_until(lambda: self.__gauge_value_reached(registry, IP_SOLUTION_CACHE_MISS_KEY, 1))
+        wait_until(lambda: self.__gauge_value_reached(registry, IP_SOLUTION_CACHE_SIZE_KEY, 1))
+        wait_until(lambda: self.__gauge_value_equals(registry, IP_SOLUTION_CACHE_EVICTION_KEY, 0))
 
         event_manager.stop_processing_events()
 
+    def test_edge_case_ip_allocator_metrics_with_defaults(self):
+        # the same scenario with the default allocator and event batching, which should not need the fallback
+        cpu = get_cpu(2, 16, 2)
+        test_context = TestContext(cpu=cpu)
+        events = [get_container_create_event(2, name=str(i), id=str(i)) for i in range(15)]
+        events.append(get_container_create_event(1, name="15", id="15"))
+        events += [get_container_create_event(2, name=str(i), id=str(i)) for i in range(16, 25)]
+        events.append(get_container_die_event(name="15", id="15"))
+
+        event_count = len(events)
+        event_manager = EventManager(
+            MockEventProvider(events),
+            test_context.get_event_handlers(),
+            get_mock_file_manager(),
+            5.0)
+
+        try:
+            wait_until(lambda: event_count == event_manager.get_processed_count(), timeout=20)
+
+            workload_manager = test_context.get_workload_manager()
+            registry = Registry()
+            reporter = InternalMetricsReporter(workload_manager, event_manager)
+            reporter.set_registry(registry)
+            reporter.report_metrics({})
+
+            wait_until(lambda: self.__gauge_value_equals(registry, RUNNING, 1))
+            wait_until(lambda: self.__gauge_value_equals(registry, ADDED_KEY, 25))
+            wait_until(lambda: self.__gauge_value_equals(registry, REMOVED_KEY, 1))
+            wait_until(lambda: self.__gauge_value_equals(registry, SUCCEEDED_KEY, 26))
+            wait_until(lambda: self.__gauge_value_equals(registry, FAILED_KEY, 0))
+            wait_until(lambda: self.__gauge_value_equals(registry, QUEUE_DEPTH_KEY, 0))
+            wait_until(lambda: self.__gauge_value_equals(registry, WORKLOAD_COUNT_KEY, 24))
+            wait_until(lambda: self.__gauge_value_equals(registry, PACKAGE_VIOLATIONS_KEY, 0))
+            wait_until(lambda: self.__gauge_value_equals(registry, EVENT_SUCCEEDED_KEY, 3 * 26))
+            wait_until(lambda: self.__gauge_value_equals(registry, EVENT_FAILED_KEY, 0))
+            wait_until(lambda: self.__gauge_value_equals(registry, EVENT_PROCESSED_KEY, 26))
+            wait_until(lambda: self.__gauge_value_equals(registry, FALLBACK_ALLOCATOR_COUNT, 0))
+            wait_until(lambda: self.__gauge_value_reached(registry, IP_SOLUTION_CACHE_MISS_KEY, 1))
+            wait_until(lambda: self.__gauge_value_reached(registry, IP_SOLUTION_CACHE_SIZE_KEY, 1))
+            wait_until(lambda: self.__gauge_value_equals(registry, IP_SOLUTION_CACHE_EVICTION_KEY, 0))
+        finally:
+            event_manager.stop_processing_events()
+
     def test_crash_ip_allocator_metrics(self):
 
         cpu = get_cpu(2, 16, 2)
@@ -188,4 +249,53 @@ class TestInternalMetricsReporter(unittest.TestCase):
         wait_until(lambda: self.__gauge_value_equals(registry, WORKLOAD_COUNT_KEY, 1))
         wait_until(lambda: self.__gauge_value_equals(registry, FALLBACK_ALLOCATOR_COUNT, 1))
 
-        event_manager.stop_processing_events()
\ No newline at end of file
+        event_manager.stop_processing_events()
+
+    def test_shadow_metrics(self):
+        workload_manager = WorkloadManager(
+            get_cpu(2, 4, 2),
+            MockCgroupManager(),
+            allocator_class=GreedyCpuAllocator,
+            shadow_allocator_class=BestFitCpuAllocator,
+            shadow_executor=SynchronousExecutor())
+        for workload_id, thread_count in [("a", 4), ("b", 4), ("c", 6)]:
+            workload_manager.add_workload(Workload(workload_id, thread_count, STATIC))
+
+        event_manager = MagicMock()
+        event_manager.get_queue_depth.return_value = 0
+        event_manager.get_success_count.return_value = 0
+        event_manager.get_error_count.return_value = 0
+        event_manager.get_processed_count.return_value = 0
+
+        registry = Registry()
+        reporter = InternalMetricsReporter(workload_manager, event_manager)
+        reporter.set_registry(registry)
+        reporter.report_metrics({})
+
+        live_tags = {SHADOW_ROLE_TAG: LIVE, SHADOW_ALLOCATOR_TAG: BestFitCpuAllocator.__name__}
+        shadow_tags = {SHADOW_ROLE_TAG: SHADOW, SHADOW_ALLOCATOR_TAG: BestFitCpuAllocator.__name__}
+        self.assertEqual(3, registry.gauge(SHADOW_CALL_COUNT_KEY, live_tags).get())
+        self.assertEqual(3, registry.gauge(SHADOW_CALL_COUNT_KEY, shadow_tags).get())
+        self.assertEqual(1, registry.gauge(SHADOW_PACKAGE_VIOLATIONS_KEY, live_tags).get())
+        self.assertEqual(0, registry.gauge(SHADOW_PACKAGE_VIOLATIONS_KEY, shadow_tags).get())
+
+    def test_solver_budget_metrics(self):
+        workload_manager = WorkloadManager(get_cpu(2, 4, 2), MockCgroupManager())
+        workload_manager.get_allocator().get_solver_budget().set_slo_secs(5.0)
+        workload_manager.add_workload(Workload("a", 2, STATIC))
+
+        event_manager = MagicMock()
+        event_manager.get_queue_depth.return_value = 0
+        event_manager.get_success_count.return_value = 0
+        event_manager.get_error_count.return_value = 0
+        event_manager.get_processed_count.return_value = 0
+
+        registry = Registry()
+        reporter = InternalMetricsReporter(workload_manager, event_manager)
+        reporter.set_registry(registry)
+        reporter.report_metrics({})
+
+        # Too few solves were recorded to predict their runtime, so the default budget was used
+        self.assertEqual(1.5, registry.gauge(IP_SOLVER_BUDGET_KEY).get())
+        self.assertEqual(0, registry.gauge(IP_SOLVER_TIME_BOUND_RATIO_KEY).get())
+        self.assertEqual(0, registry.gauge(IP_SOLVER_SLO_MISS_KEY).get())
@@ -1,10 +1,13 @@
 import logging
 import unittest
 import uuid
+from unittest.mock import patch
 
 from tests.utils import config_logs
+from titus_isolate.model.processor.config import get_cpu, get_cpu_from_topology, get_empty_cpu
 from titus_isolate.model.processor.core import Core
 from titus_isolate.model.processor.cpu import Cpu
+from titus_isolate.model.processor.domain import Domain
 from titus_isolate.model.processor.package import Package
 from titus_isolate.model.processor.thread import Thread
 
@@ -65,3 +68,128 @@ class TestCpu(unittest.TestCase):
         # When an equal number of threads are claimed on both packages, the first should be returned
         t4.claim(uuid.uuid4())
         self.assertEqual(p0, cpu.get_emptiest_package())
+
+    def test_empty_and_claimed_thread_counts(self):
+        t0 = Thread(0)
+        t1 = Thread(1)
+        t2 = Thread(2)
+        t3 = Thread(3)
+
+        p0 = Package(0, [Core(0, [t0, t2])])
+        p1 = Package(1, [Core(0, [t1, t3])])
+        cpu = Cpu([p0, p1])
+        self.assertEqual(4, cpu.get_empty_thread_count())
+        self.assertEqual(0, cpu.get_claimed_thread_count())
+
+        t2.claim("a")
+        t3.claim("b")
+        self.assertEqual(2, cpu.get_empty_thread_count())
+        self.assertEqual([t2, t3], cpu.get_claimed_threads())
+        self.assertEqual([t0, t1], cpu.get_empty_threads())
+        self.assertEqual(1, p0.get_empty_thread_count())
+        self.assertEqual(1, p1.get_cores()[0].get_claimed_thread_count())
+        self.assertEqual({"a": [2], "b": [3]}, dict(cpu.get_workload_ids_to_thread_ids()))
+
+        cpu.clear()
+        self.assertEqual(4, cpu.get_empty_thread_count())
+
+    def test_workload_reverse_index(self):
+        t0 = Thread(0)
+        t1 = Thread(1)
+        t2 = Thread(2)
+        t3 = Thread(3)
+
+        p0 = Package(0, [Core(0, [t0, t2])])
+        p1 = Package(1, [Core(0, [t1, t3])])
+        cpu = Cpu([p0, p1])
+
+        t0.claim("a")
+        t3.claim("a")
+        t2.claim("b")
+        self.assertEqual({"a", "b"}, cpu.get_workload_ids())
+        self.assertEqual([t0, t3], cpu.get_workload_threads("a"))
+        self.assertEqual([t3], p1.get_workload_threads("a"))
+        self.assertTrue(p1.has_workload("a"))
+        self.assertFalse(p1.has_workload("b"))
+        self.assertFalse(cpu.has_workload("c"))
+        self.assertEqual([], cpu.get_workload_threads("c"))
+
+        t3.free()
+        self.assertFalse(p1.has_workload("a"))
+        self.assertEqual([t0], cpu.get_workload_threads("a"))
+
+    def test_domains(self):
+        threads = [Thread(i) for i in range(4)]
+        cpu = Cpu([Package(0, [Core(0, threads[:2]), Core(1, threads[2:])])], llcs=[Domain(0, [threads[0], threads[2]])])
+        self.assertEqual([], cpu.get_numa_nodes())
+
+        llc = cpu.get_llcs()[0]
+        self.assertEqual(2, llc.get_empty_thread_count())
+
+        w_id = uuid.uuid4()
+        threads[2].claim(w_id)
+        threads[3].claim(w_id)
+        self.assertEqual(1, llc.get_empty_thread_count())
+        self.assertEqual([threads[0]], llc.get_empty_threads())
+        self.assertEqual([threads[2]], llc.get_workload_threads(w_id))
+        self.assertTrue(llc.has_workload(w_id))
+
+        llc_snapshot = cpu.snapshot().get_llcs()[0]
+        self.assertEqual([0, 2], [t.get_id() for t in llc_snapshot.get_threads()])
+        self.assertTrue(llc_snapshot.has_workload(w_id))
+
+    def test_domain_with_unknown_thread(self):
+        threads = [Thread(i) for i in range(2)]
+        with self.assertRaises(ValueError):
+            Cpu([Package(0, [Core(0, threads)])], numa_nodes=[Domain(0, [Thread(7)])])
+
+    def test_fingerprint(self):
+        cpu_a = get_cpu()
+        cpu_b = get_cpu()
+        self.assertEqual(0, cpu_a.fingerprint())
+
+        # Equal placements reached in different orders have equal fingerprints
+        cpu_a.get_threads()[0].claim("a")
+        cpu_a.get_threads()[5].claim("b")
+        cpu_b.get_threads()[5].claim("b")
+        cpu_b.get_threads()[0].claim("a")
+        self.assertNotEqual(0, cpu_a.fingerprint())
+        self.assertEqual(cpu_a.fingerprint(), cpu_b.fingerprint())
+        self.assertEqual(cpu_a.fingerprint(), cpu_a.snapshot().fingerprint())
+
+        # Swapping the workloads of two threads changes the fingerprint
+        cpu_b.get_threads()[0].claim("b")
+        cpu_b.get_threads()[5].claim("a")
+        self.assertNotEqual(cpu_a.fingerprint(), cpu_b.fingerprint())
+
+        cpu_a.clear()
+        self.assertEqual(0, cpu_a.fingerprint())
+
+    def test_empty_cpu_keeps_domains(self):
+        topology = [[[0, 4], [1, 5]], [[2, 6], [3, 7]]]
+        cpu = get_cpu_from_topology(topology, [[0, 1, 4, 5], [2, 3, 6, 7]], [[0, 4], [1, 5], [2, 6], [3, 7]])
+        cpu.get_threads()[0].claim("a")
+
+        empty_cpu = get_empty_cpu(cpu.snapshot())
+        self.assertEqual(0, len(empty_cpu.get_claimed_threads()))
+        self.assertEqual([[0, 1, 4, 5], [2, 3, 6, 7]],
+                         [[t.get_id() for t in d.get_threads()] for d in empty_cpu.get_numa_nodes()])
+        self.assertEqual([[0, 4], [1, 5], [2, 6], [3, 7]],
+                         [[t.get_id() for t in d.get_threads()] for d in empty_cpu.get_llcs()])
+
+        empty_cpu = get_empty_cpu(get_cpu())
+        self.assertEqual(0, len(empty_cpu.get_numa_nodes()))
+        self.assertEqual(0, len(empty_cpu.get_llcs()))
+
+    def test_cores_and_packages_share_the_cpu_occupancy(self):
+        with patch('titus_isolate.model.processor.core.Occupancy') as core_occupancy, \
+                patch('titus_isolate.model.processor.package.Occupancy') as package_occupancy:
+            cpu = get_cpu(2, 2, 2)
+            cpu.get_threads()[0].claim("a")
+            package = cpu.get_packages()[0]
+            self.assertEqual(1, package.get_claimed_thread_count())
+            self.assertEqual(1, len(package.get_cores()[0].get_empty_threads()))
+            self.assertEqual(package.get_cores()[1], package.get_emptiest_core())
+
+        core_occupancy.assert_not_called()
+        package_occupancy.assert_not_called()
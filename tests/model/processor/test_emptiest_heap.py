@@ -0,0 +1,38 @@
+import logging
+import unittest
+
+from tests.utils import config_logs
+from titus_isolate.model.processor.emptiest_heap import EmptiestHeap
+
+config_logs(logging.DEBUG)
+
+
+class TestEmptiestHeap(unittest.TestCase):
+
+    def test_invalid_heap(self):
+        with self.assertRaises(ValueError):
+            EmptiestHeap([])
+
+    def test_get_emptiest(self):
+        heap = EmptiestHeap([2, 2, 2])
+
+        # Ties go to the lowest position
+        self.assertEqual(0, heap.get_emptiest())
+
+        heap.update(0, 1)
+        self.assertEqual(1, heap.get_emptiest())
+
+        heap.update(2, 3)
+        self.assertEqual(2, heap.get_emptiest())
+
+        heap.update(2, 2)
+        heap.update(0, 2)
+        self.assertEqual(0, heap.get_emptiest())
+        self.assertEqual(2, heap.get_empty_count(2))
+
+    def test_many_updates(self):
+        heap = EmptiestHeap([0] * 4)
+        for i in range(100):
+            heap.update(i % 4, i)
+        self.assertEqual(3, heap.get_emptiest())
+        self.assertEqual(99, heap.get_empty_count(3))
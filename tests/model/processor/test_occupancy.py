@@ -0,0 +1,56 @@
+import logging
+import unittest
+
+from tests.utils import config_logs
+from titus_isolate.model.processor.occupancy import Occupancy, get_bit_count, get_bit_indices, get_range_mask
+from titus_isolate.model.processor.thread import Thread
+
+config_logs(logging.DEBUG)
+
+
+class TestOccupancy(unittest.TestCase):
+
+    def test_mask_helpers(self):
+        self.assertEqual(0b1100, get_range_mask(2, 2))
+        self.assertEqual(3, get_bit_count(0b10101))
+        self.assertEqual([0, 2, 4], list(get_bit_indices(0b10101)))
+        self.assertEqual([], list(get_bit_indices(0)))
+
+    def test_claim_and_free(self):
+        threads = [Thread(i) for i in range(4)]
+        occupancy = Occupancy(threads)
+        self.assertEqual(0, occupancy.get_claimed_mask())
+
+        threads[1].claim("a")
+        threads[3].claim("b")
+        self.assertEqual(0b1010, occupancy.get_claimed_mask())
+        self.assertEqual([threads[1], threads[3]], occupancy.get_threads_in_mask(occupancy.get_claimed_mask()))
+        self.assertEqual("a", occupancy.get_workload_id(1))
+        self.assertEqual(None, occupancy.get_workload_id(0))
+        self.assertEqual({"a", "b"}, occupancy.get_workload_ids())
+
+        self.assertEqual(0b0010, occupancy.get_workload_mask("a"))
+        self.assertEqual(1, occupancy.get_workload_thread_count("b"))
+
+        threads[1].free()
+        self.assertEqual(0b1000, occupancy.get_claimed_mask())
+        self.assertEqual({"b"}, occupancy.get_workload_ids())
+        self.assertEqual(0, occupancy.get_workload_mask("a"))
+        self.assertEqual(0, occupancy.get_workload_thread_count("a"))
+
+    def test_reclaim_by_other_workload(self):
+        threads = [Thread(i) for i in range(2)]
+        occupancy = Occupancy(threads)
+
+        threads[0].claim("a")
+        threads[0].claim("b")
+        self.assertEqual("b", occupancy.get_workload_id(0))
+        self.assertEqual({"b"}, occupancy.get_workload_ids())
+
+    def test_existing_claims_are_imported(self):
+        threads = [Thread(i) for i in range(2)]
+        threads[1].claim("a")
+
+        occupancy = Occupancy(threads)
+        self.assertEqual(0b10, occupancy.get_claimed_mask())
+        self.assertEqual("a", occupancy.get_workload_id(1))
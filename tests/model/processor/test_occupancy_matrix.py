@@ -0,0 +1,81 @@
+import logging
+import unittest
+
+from tests.utils import config_logs
+from titus_isolate.model.processor.config import get_cpu, get_cpu_from_topology
+from titus_isolate.model.processor.occupancy import FREE_INDEX
+
+config_logs(logging.DEBUG)
+
+
+class TestOccupancyMatrix(unittest.TestCase):
+
+    def test_empty_cpu(self):
+        matrix = get_cpu().get_occupancy_matrix()
+        self.assertEqual([FREE_INDEX] * 16, matrix.get_workload_indices().tolist())
+        self.assertEqual((2, 4, 2), matrix.get_workload_index_array().shape)
+        self.assertEqual((0, 16), matrix.get_one_hot().shape)
+        self.assertEqual({}, matrix.get_cross_package_violations())
+        self.assertEqual({}, matrix.get_shared_core_violations())
+        self.assertEqual(0, matrix.get_cross_package_violation_count())
+        self.assertEqual(0, matrix.get_shared_core_violation_count())
+
+    def test_matrix_is_cached_until_mutation(self):
+        cpu = get_cpu()
+        matrix = cpu.get_occupancy_matrix()
+        self.assertIs(matrix, cpu.get_occupancy_matrix())
+
+        cpu.get_threads()[0].claim("a")
+        self.assertIsNot(matrix, cpu.get_occupancy_matrix())
+        self.assertEqual([FREE_INDEX] * 16, matrix.get_workload_indices().tolist())
+        self.assertEqual(1, cpu.get_occupancy_matrix().get_one_hot().sum())
+
+    def test_placement_vectors(self):
+        cpu = get_cpu()
+        threads = cpu.get_threads()
+        threads[0].claim("a")
+        threads[3].claim("b")
+        threads[5].claim("a")
+
+        vectors = cpu.get_occupancy_matrix().get_placement_vectors(["b", "a", "c"])
+        self.assertEqual([0, 0, 0, 1] + [0] * 12, vectors[0].tolist())
+        self.assertEqual([1, 0, 0, 0, 0, 1] + [0] * 10, vectors[1].tolist())
+        self.assertEqual([0] * 16, vectors[2].tolist())
+        self.assertEqual([t.get_id() for t in threads], cpu.get_occupancy_matrix().get_thread_ids().tolist())
+
+    def test_violations(self):
+        cpu = get_cpu()
+        package_0_threads = cpu.get_packages()[0].get_threads()
+        package_1_threads = cpu.get_packages()[1].get_threads()
+
+        # "a" spans both packages and shares core 0 of package 0 with "b"
+        package_0_threads[0].claim("a")
+        package_0_threads[1].claim("b")
+        package_1_threads[0].claim("a")
+
+        for c in [cpu, cpu.snapshot()]:
+            matrix = c.get_occupancy_matrix()
+            self.assertEqual({"a": [0, 1]}, matrix.get_cross_package_violations())
+            self.assertEqual(1, matrix.get_cross_package_violation_count())
+            self.assertEqual(["0:0"], list(matrix.get_shared_core_violations().keys()))
+            self.assertEqual({"a", "b"}, set(matrix.get_shared_core_violations()["0:0"]))
+            self.assertEqual(1, matrix.get_shared_core_violation_count())
+
+    def test_freed_workload_rows_are_empty(self):
+        cpu = get_cpu()
+        cpu.get_threads()[0].claim("a")
+        cpu.get_threads()[2].claim("b")
+        cpu.get_threads()[0].free()
+
+        matrix = cpu.get_occupancy_matrix()
+        self.assertEqual([0, 1], matrix.get_one_hot().sum(axis=1).tolist())
+        self.assertEqual(0, matrix.get_shared_core_violation_count())
+
+    def test_non_uniform_topology(self):
+        cpu = get_cpu_from_topology([[[0, 2], [1]]])
+        cpu.get_threads()[2].claim("a")
+
+        matrix = cpu.get_occupancy_matrix()
+        self.assertEqual([[0, 1]], matrix.get_workload_core_counts().tolist())
+        with self.assertRaises(ValueError):
+            matrix.get_workload_index_array()
@@ -0,0 +1,73 @@
+import logging
+import unittest
+
+from tests.utils import config_logs
+from titus_isolate.model.processor.config import get_cpu
+from titus_isolate.model.processor.utils import DEFAULT_TOTAL_THREAD_COUNT, DEFAULT_PACKAGE_COUNT, DEFAULT_CORE_COUNT
+
+config_logs(logging.DEBUG)
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_snapshot_matches_cpu(self):
+        cpu = get_cpu()
+        cpu.get_threads()[0].claim("a")
+        cpu.get_threads()[5].claim("b")
+
+        snapshot = cpu.snapshot()
+        self.assertEqual(DEFAULT_PACKAGE_COUNT, len(snapshot.get_packages()))
+        self.assertEqual(DEFAULT_CORE_COUNT, len(snapshot.get_packages()[0].get_cores()))
+        self.assertEqual([t.get_id() for t in cpu.get_threads()], [t.get_id() for t in snapshot.get_threads()])
+        self.assertEqual(DEFAULT_TOTAL_THREAD_COUNT - 2, snapshot.get_empty_thread_count())
+        self.assertEqual({"a", "b"}, snapshot.get_workload_ids())
+        self.assertEqual(dict(cpu.get_workload_ids_to_thread_ids()), dict(snapshot.get_workload_ids_to_thread_ids()))
+        self.assertTrue(snapshot.get_packages()[0].has_workload("a"))
+        self.assertFalse(snapshot.get_packages()[1].has_workload("a"))
+
+    def test_snapshot_is_immutable(self):
+        cpu = get_cpu()
+        snapshot = cpu.snapshot()
+
+        cpu.get_threads()[0].claim("a")
+        self.assertEqual(0, snapshot.get_claimed_thread_count())
+        self.assertEqual(1, cpu.snapshot().get_claimed_thread_count())
+        self.assertTrue(cpu.snapshot().get_version() > snapshot.get_version())
+
+    def test_snapshots_share_untouched_nodes(self):
+        cpu = get_cpu()
+        before = cpu.snapshot()
+
+        # Thread 0 lives on package 0, core 0
+        cpu.get_threads()[0].claim("a")
+        after = cpu.snapshot()
+
+        self.assertIs(before.get_placement()[1], after.get_placement()[1])
+        self.assertIs(before.get_placement()[0][1], after.get_placement()[0][1])
+        self.assertIsNot(before.get_placement()[0][0], after.get_placement()[0][0])
+
+    def test_get_changed_workload_ids(self):
+        cpu = get_cpu()
+        cpu.get_threads()[0].claim("a")
+        cpu.get_threads()[8].claim("b")
+        before = cpu.snapshot()
+
+        cpu.get_threads()[0].free()
+        cpu.get_threads()[2].claim("c")
+        after = cpu.snapshot()
+
+        self.assertEqual({"a", "c"}, after.get_changed_workload_ids(before))
+        self.assertEqual(set(), after.get_changed_workload_ids(after))
+
+    def test_remap(self):
+        cpu = get_cpu(2, 2, 2)
+        cpu.get_threads()[0].claim("a")
+        snapshot = cpu.snapshot()
+
+        remapped = snapshot.remap({1: "b", 2: "b"})
+        self.assertEqual(["b"], list(remapped.get_workload_ids()))
+        self.assertEqual([1, 2], sorted([t.get_id() for t in remapped.get_workload_threads("b")]))
+        self.assertIsNone(remapped.fingerprint())
+
+        # The snapshot itself is unchanged
+        self.assertEqual(["a"], list(snapshot.get_workload_ids()))
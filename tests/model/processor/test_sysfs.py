@@ -0,0 +1,130 @@
+import logging
+import os
+import tempfile
+import unittest
+
+from tests.utils import config_logs
+from titus_isolate.model.processor.config import LinuxProcessor, get_cpu
+from titus_isolate.model.processor.sysfs import parse_cpu_list, get_cpu_topology, get_online_cpu_ids, \
+    get_numa_topology, get_llc_topology
+
+config_logs(logging.DEBUG)
+
+
+def write_file(path, value):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(value + '\n')
+
+
+def write_fake_sysfs(root, package_count, cores_per_package, threads_per_core, offline_cpu_ids=()):
+    """
+    Writes the topology files of a CPU enumerated the way Intel hosts usually are: every first hyperthread of every
+    core, then every second hyperthread, and so on.
+    """
+    core_count = package_count * cores_per_package
+    cpu_count = core_count * threads_per_core
+    online = [i for i in range(cpu_count) if i not in offline_cpu_ids]
+
+    cpu_root = os.path.join(root, 'devices/system/cpu')
+    write_file(os.path.join(cpu_root, 'online'), ','.join([str(i) for i in online]))
+    for cpu_id in range(cpu_count):
+        core_index = cpu_id % core_count
+        siblings = [core_index + row * core_count for row in range(threads_per_core)]
+        topology_path = os.path.join(cpu_root, 'cpu{}'.format(cpu_id), 'topology')
+        write_file(os.path.join(topology_path, 'physical_package_id'), str(core_index // cores_per_package))
+        write_file(os.path.join(topology_path, 'core_id'), str(core_index % cores_per_package))
+        write_file(os.path.join(topology_path, 'thread_siblings_list'), ','.join([str(s) for s in siblings]))
+
+
+def write_fake_numa_and_caches(root, package_count, cores_per_package, threads_per_core, llcs_per_package=1):
+    """
+    Writes one NUMA node per package and splits the cores of every package evenly between its last level caches, as
+    on chiplet based parts.  Each thread also gets private level 1 instruction and data caches.
+    """
+    core_count = package_count * cores_per_package
+    cpu_count = core_count * threads_per_core
+    cores_per_llc = cores_per_package // llcs_per_package
+
+    def get_thread_ids(core_indices):
+        return ','.join([str(c + row * core_count) for row in range(threads_per_core) for c in core_indices])
+
+    for p_i in range(package_count):
+        node_path = os.path.join(root, 'devices/system/node/node{}'.format(p_i))
+        write_file(os.path.join(node_path, 'cpulist'), get_thread_ids(
+            range(p_i * cores_per_package, (p_i + 1) * cores_per_package)))
+
+    for cpu_id in range(cpu_count):
+        core_index = cpu_id % core_count
+        llc_start = core_index - core_index % cores_per_llc
+        cache_path = os.path.join(root, 'devices/system/cpu/cpu{}/cache'.format(cpu_id))
+        caches = [
+            (1, 'Data', get_thread_ids([core_index])),
+            (1, 'Instruction', get_thread_ids([core_index])),
+            (3, 'Unified', get_thread_ids(range(llc_start, llc_start + cores_per_llc)))]
+        for i, (level, cache_type, shared_cpu_list) in enumerate(caches):
+            index_path = os.path.join(cache_path, 'index{}'.format(i))
+            write_file(os.path.join(index_path, 'level'), str(level))
+            write_file(os.path.join(index_path, 'type'), cache_type)
+            write_file(os.path.join(index_path, 'shared_cpu_list'), shared_cpu_list)
+
+
+class TestSysfs(unittest.TestCase):
+
+    def test_parse_cpu_list(self):
+        self.assertEqual([0, 1, 2, 3, 8, 10, 11], parse_cpu_list('0-3,8,10-11\n'))
+        self.assertEqual([5], parse_cpu_list('5'))
+        self.assertEqual([], parse_cpu_list(''))
+
+    def test_uniform_topology_matches_get_cpu(self):
+        with tempfile.TemporaryDirectory() as root:
+            write_fake_sysfs(root, 2, 4, 2)
+            self.assertEqual(list(range(16)), get_online_cpu_ids(root))
+
+            cpu = LinuxProcessor(sysfs_root=root).get_cpu()
+            expected = get_cpu(2, 4, 2)
+            self.assertEqual(
+                [t.get_id() for t in expected.get_threads()],
+                [t.get_id() for t in cpu.get_threads()])
+
+    def test_offline_cpus_are_excluded(self):
+        with tempfile.TemporaryDirectory() as root:
+            # cpu 9 is the second hyperthread of core 1 on package 0
+            write_fake_sysfs(root, 2, 4, 2, offline_cpu_ids=[9])
+
+            topology = get_cpu_topology(root)
+            self.assertEqual(2, len(topology))
+            self.assertEqual([[0, 8], [1], [2, 10], [3, 11]], topology[0])
+            self.assertEqual(15, len(LinuxProcessor(sysfs_root=root).get_cpu().get_threads()))
+
+    def test_core_id_fallback(self):
+        with tempfile.TemporaryDirectory() as root:
+            write_fake_sysfs(root, 1, 2, 2)
+            for cpu_id in range(4):
+                os.remove(os.path.join(root, 'devices/system/cpu/cpu{}/topology/thread_siblings_list'.format(cpu_id)))
+
+            self.assertEqual([[[0, 2], [1, 3]]], get_cpu_topology(root))
+
+    def test_numa_and_llc_topology(self):
+        with tempfile.TemporaryDirectory() as root:
+            write_fake_sysfs(root, 2, 4, 2)
+            write_fake_numa_and_caches(root, 2, 4, 2, llcs_per_package=2)
+
+            self.assertEqual([[0, 1, 2, 3, 8, 9, 10, 11], [4, 5, 6, 7, 12, 13, 14, 15]], get_numa_topology(root))
+            self.assertEqual([[0, 1, 8, 9], [2, 3, 10, 11], [4, 5, 12, 13], [6, 7, 14, 15]], get_llc_topology(root))
+
+            cpu = LinuxProcessor(sysfs_root=root).get_cpu()
+            self.assertEqual(2, len(cpu.get_numa_nodes()))
+            self.assertEqual(4, len(cpu.get_llcs()))
+            self.assertEqual([2, 3, 10, 11], [t.get_id() for t in cpu.get_llcs()[1].get_threads()])
+
+    def test_missing_numa_and_cache_information(self):
+        with tempfile.TemporaryDirectory() as root:
+            write_fake_sysfs(root, 1, 2, 2)
+
+            self.assertIsNone(get_numa_topology(root))
+            self.assertIsNone(get_llc_topology(root))
+
+            cpu = LinuxProcessor(sysfs_root=root).get_cpu()
+            self.assertEqual([], cpu.get_numa_nodes())
+            self.assertEqual([], cpu.get_llcs())
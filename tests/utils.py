@@ -1,10 +1,12 @@
 import logging
 import time
+from concurrent.futures import Future
 from unittest.mock import MagicMock
 
 from tests.cgroup.mock_cgroup_manager import MockCgroupManager
 from tests.docker.mock_docker import MockDockerClient
 from titus_isolate import LOG_FMT_STRING
+from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator
 from titus_isolate.cgroup.file_manager import FileManager
 from titus_isolate.docker.create_event_handler import CreateEventHandler
 from titus_isolate.docker.event_logger import EventLogger
@@ -27,6 +29,40 @@ def wait_until(func, timeout=DEFAULT_TIMEOUT_SECONDS, period=0.01):
         "Function did not succeed within timeout: '{}'.".format(timeout))
 
 
+class DeferredExecutor:
+    """
+    An executor which runs submitted calls in the calling thread, only when asked to.
+    """
+
+    def __init__(self):
+        self.__calls = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.__calls.append((future, fn, args))
+        return future
+
+    def get_pending_count(self):
+        return len(self.__calls)
+
+    def run_pending(self):
+        calls = self.__calls
+        self.__calls = []
+        for future, fn, args in calls:
+            future.set_result(fn(*args))
+
+
+class SynchronousExecutor(DeferredExecutor):
+    """
+    An executor which runs submitted calls right away in the calling thread.
+    """
+
+    def submit(self, fn, *args):
+        future = super().submit(fn, *args)
+        self.run_pending()
+        return future
+
+
 def config_logs(level):
     logging.basicConfig(
         format=LOG_FMT_STRING,
@@ -41,11 +77,11 @@ def get_mock_file_manager():
 
 
 class TestContext:
-    def __init__(self, docker_client=MockDockerClient(), cpu=None):
+    def __init__(self, docker_client=MockDockerClient(), cpu=None, allocator_class=IntegerProgramCpuAllocator):
         if cpu is None:
             cpu = get_cpu()
         self.__docker_client = docker_client
-        self.__workload_manager = WorkloadManager(cpu, MockCgroupManager())
+        self.__workload_manager = WorkloadManager(cpu, MockCgroupManager(), allocator_class=allocator_class)
         self.__event_logger = EventLogger()
         self.__create_event_handler = CreateEventHandler(self.__workload_manager)
         self.__free_event_handler = FreeEventHandler(self.__workload_manager)
@@ -0,0 +1,205 @@
+from itertools import combinations
+
+from titus_isolate import log
+from titus_isolate.allocate.churn import CROSS_PACKAGE_VIOLATION_COST, DEFAULT_CHURN_PENALTY
+from titus_isolate.allocate.cpu_allocator import CpuAllocator
+from titus_isolate.allocate.placement_delta import PlacementDelta, get_workload_thread_ids
+
+# The number of placed workloads the local search may move to keep a new workload on one package
+DEFAULT_MAX_MOVES = 2
+
+
+def get_core_key(core, thread_count):
+    """
+    Orders cores for a workload which still needs the given number of threads: cores no other workload uses first,
+    then cores absorbing the most of the request, then the tightest fit.
+    """
+    empty_count = core.get_empty_thread_count()
+    return core.get_claimed_thread_count() > 0, -min(empty_count, thread_count), empty_count
+
+
+def get_core_plan(package, thread_count):
+    """
+    Picks, best fit, the cores of the package on which to place the given number of threads.
+
+    :return: a list of (core, thread count) tuples, and the number of those cores which other workloads use
+    """
+    cores = [c for c in package.get_cores() if c.get_empty_thread_count() > 0]
+    plan = []
+    shared_count = 0
+    while thread_count > 0:
+        core = min(cores, key=lambda c: get_core_key(c, thread_count))
+        cores.remove(core)
+
+        count = min(core.get_empty_thread_count(), thread_count)
+        plan.append((core, count))
+        if core.get_claimed_thread_count() > 0:
+            shared_count += 1
+        thread_count -= count
+
+    return plan, shared_count
+
+
+def get_package_targets(sizes, capacities):
+    """
+    Assigns, best fit decreasing, each size to the package with the least capacity which still holds it.
+
+    :param sizes: dictionary mapping workload ids to thread counts
+    :param capacities: dictionary mapping package indices to empty thread counts
+    :return: dictionary mapping workload ids to package indices, or None if some size does not fit
+    """
+    capacities = dict(capacities)
+    targets = {}
+    for workload_id in sorted(sizes.keys(), key=lambda w_id: -sizes[w_id]):
+        size = sizes[workload_id]
+        fitting = [p_i for p_i, capacity in capacities.items() if capacity >= size]
+        if len(fitting) == 0:
+            return None
+
+        p_i = min(fitting, key=lambda i: (capacities[i], i))
+        capacities[p_i] -= size
+        targets[workload_id] = p_i
+
+    return targets
+
+
+class BestFitCpuAllocator(CpuAllocator):
+    """
+    Places static workloads by best fit bin packing, first over packages and then over whole cores.
+
+    A new workload goes to the package where it shares the fewest cores and leaves the fewest empty threads.  When no
+    package has room for it, a small local search moves at most max_moves other workloads off one package so that it
+    fits there, otherwise it is spread over as few packages as possible.  Unlike the integer program this never solves
+    anything, so it decides in microseconds.
+    """
+
+    def __init__(self, cpu, max_moves=DEFAULT_MAX_MOVES, churn_penalty=DEFAULT_CHURN_PENALTY):
+        """
+        :param churn_penalty: the isolation cost, in shared core violations, of moving one thread of a running
+        workload.  Workloads are only moved when the cross package violation avoided outweighs the penalty.
+        """
+        self.__cpu = cpu
+        self.__max_moves = max_moves
+        self.__churn_penalty = churn_penalty
+
+    def get_cpu(self):
+        return self.__cpu
+
+    def assign_threads(self, workload):
+        thread_count = workload.get_thread_count()
+        if thread_count == 0:
+            return PlacementDelta()
+
+        if thread_count > self.__cpu.get_empty_thread_count():
+            raise ValueError("Cannot assign workload: '{}' requesting {} threads to CPU with {} empty threads".format(
+                workload.get_id(), thread_count, self.__cpu.get_empty_thread_count()))
+
+        log.info("Assigning '{}' thread(s) to workload: '{}'".format(thread_count, workload.get_id()))
+        packages = self.__cpu.get_packages()
+        fitting = [p for p in packages if p.get_empty_thread_count() >= thread_count]
+        if len(fitting) > 0:
+            package = min(fitting, key=lambda p: self.__get_package_key(p, thread_count))
+            before = get_workload_thread_ids(self.__cpu, [workload.get_id()])
+            self.__place(workload.get_id(), thread_count, package)
+            return PlacementDelta(before, get_workload_thread_ids(self.__cpu, [workload.get_id()]))
+
+        moves = self.__get_moves(thread_count)
+        if moves is None:
+            log.info("No package can hold workload: '{}', spreading it over packages".format(workload.get_id()))
+            before = get_workload_thread_ids(self.__cpu, [workload.get_id()])
+            self.__spread(workload.get_id(), thread_count)
+            return PlacementDelta(before, get_workload_thread_ids(self.__cpu, [workload.get_id()]))
+
+        p_i, targets = moves
+        log.info("Moving workloads: '{}' to keep workload: '{}' on package: '{}'".format(
+            sorted([str(w_id) for w_id in targets.keys()]), workload.get_id(), packages[p_i].get_id()))
+        workload_ids = [workload.get_id()] + list(targets.keys())
+        before = get_workload_thread_ids(self.__cpu, workload_ids)
+        for workload_id in targets.keys():
+            for t in self.__cpu.get_workload_threads(workload_id):
+                t.free()
+        for workload_id, target in targets.items():
+            self.__place(workload_id, len(before[workload_id]), packages[target])
+        self.__place(workload.get_id(), thread_count, packages[p_i])
+
+        return PlacementDelta(before, get_workload_thread_ids(self.__cpu, workload_ids))
+
+    def assign_threads_batch(self, workloads):
+        """
+        Assigns the largest workloads first, i.e. best fit decreasing, which packs a batch tighter than its arrival
+        order would.
+        """
+        return super().assign_threads_batch(sorted(workloads, key=lambda w: -w.get_thread_count()))
+
+    def get_churn_penalty(self):
+        return self.__churn_penalty
+
+    def set_churn_penalty(self, churn_penalty):
+        self.__churn_penalty = churn_penalty
+
+    def free_threads(self, workload_id):
+        before = get_workload_thread_ids(self.__cpu, [workload_id])
+        for t in self.__cpu.get_workload_threads(workload_id):
+            t.free()
+        return PlacementDelta(before, {})
+
+    @staticmethod
+    def __get_package_key(package, thread_count):
+        _, shared_count = get_core_plan(package, thread_count)
+        return shared_count, package.get_empty_thread_count() - thread_count
+
+    def __get_moves(self, thread_count):
+        """
+        Looks for the fewest threads to move, in at most max_moves workloads, so that one package can hold the given
+        number of threads.  Only workloads held by a single package are moved, each to another package with room.
+
+        :return: the index of the package, and a dictionary mapping the workloads to move to their target package
+        indices, or None if there is no such move
+        """
+        if self.__max_moves <= 0:
+            return None
+
+        packages = self.__cpu.get_packages()
+        capacities = {p_i: p.get_empty_thread_count() for p_i, p in enumerate(packages)}
+        sizes = {w_id: len(thread_ids) for w_id, thread_ids in self.__cpu.get_workload_ids_to_thread_ids().items()}
+
+        best = None
+        for p_i, package in enumerate(packages):
+            deficit = thread_count - capacities[p_i]
+            candidates = [w_id for w_id in sizes.keys()
+                          if package.has_workload(w_id) and len(package.get_workload_threads(w_id)) == sizes[w_id]]
+            other_capacities = {i: c for i, c in capacities.items() if i != p_i}
+
+            for move_count in range(1, min(self.__max_moves, len(candidates)) + 1):
+                for moved in combinations(candidates, move_count):
+                    moved_thread_count = sum([sizes[w_id] for w_id in moved])
+                    if moved_thread_count < deficit or \
+                            self.__churn_penalty * moved_thread_count >= CROSS_PACKAGE_VIOLATION_COST:
+                        continue
+                    if best is not None and (moved_thread_count, move_count) >= best[0]:
+                        continue
+
+                    targets = get_package_targets({w_id: sizes[w_id] for w_id in moved}, other_capacities)
+                    if targets is not None:
+                        best = ((moved_thread_count, move_count), p_i, targets)
+
+        if best is None:
+            return None
+
+        return best[1], best[2]
+
+    def __spread(self, workload_id, thread_count):
+        for package in sorted(self.__cpu.get_packages(), key=lambda p: -p.get_empty_thread_count()):
+            count = min(thread_count, package.get_empty_thread_count())
+            if count > 0:
+                self.__place(workload_id, count, package)
+                thread_count -= count
+
+    @staticmethod
+    def __place(workload_id, thread_count, package):
+        plan, _ = get_core_plan(package, thread_count)
+        for core, count in plan:
+            for t in core.get_empty_threads()[:count]:
+                log.debug("Claiming package:core:thread '{}:{}:{}' for workload '{}'".format(
+                    package.get_id(), core.get_id(), t.get_id(), workload_id))
+                t.claim(workload_id)
@@ -0,0 +1,191 @@
+from collections import Counter
+
+from titus_isolate.isolate.detect import get_cross_package_violation_count, get_shared_core_violation_count
+
+# By default moving workloads costs nothing, so allocators place them purely for isolation
+DEFAULT_CHURN_PENALTY = 0.0
+
+# A cross package violation costs as much as this many shared core violations
+CROSS_PACKAGE_VIOLATION_COST = 10.0
+
+
+def get_churn(delta):
+    """
+    Moving a running workload costs it its warm caches and a cgroup update, so this counts what a placement change
+    moved.  Workloads being added or removed are not counted.
+
+    :return: the number of workloads moved by the PlacementDelta, and the number of threads they left
+    """
+    if delta is None:
+        return 0, 0
+
+    moved_workload_ids = delta.get_moved_workload_ids()
+    return len(moved_workload_ids), sum([len(delta.get_removed_thread_ids(w_id)) for w_id in moved_workload_ids])
+
+
+def get_moved_thread_count(cpu, thread_id_to_workload_id):
+    """
+    :return: the number of threads of the CPU which workloads present in the mapping would leave, were it applied
+    """
+    workload_ids = set(thread_id_to_workload_id.values())
+    return len([t for t in cpu.get_claimed_threads() if t.get_workload_id() in workload_ids and
+                thread_id_to_workload_id.get(t.get_id()) != t.get_workload_id()])
+
+
+def keep_running_workloads(cpu, thread_id_to_workload_id):
+    """
+    :return: a placement of the same workloads as the given one, in which running workloads keep their threads and
+    new ones take free threads, preferably those the given placement gives them, then free threads on the cores and
+    packages it gives them
+    """
+    sizes = Counter(thread_id_to_workload_id.values())
+    kept = {t.get_id(): t.get_workload_id() for t in cpu.get_claimed_threads() if t.get_workload_id() in sizes}
+    running_workload_ids = set(kept.values())
+
+    locations = {}
+    for p_i, package in enumerate(cpu.get_packages()):
+        for core in package.get_cores():
+            for t in core.get_threads():
+                locations[t.get_id()] = (p_i, core.get_id())
+    free_thread_ids = [t.get_id() for t in cpu.get_threads() if not t.is_claimed()]
+
+    new_workload_ids = sorted([w_id for w_id in sizes.keys() if w_id not in running_workload_ids],
+                              key=lambda w_id: -sizes[w_id])
+    for workload_id in new_workload_ids:
+        proposed = set([t_id for t_id, w_id in thread_id_to_workload_id.items() if w_id == workload_id])
+        packages = set([locations[t_id][0] for t_id in proposed])
+        cores = set([locations[t_id] for t_id in proposed])
+
+        free_thread_ids.sort(key=lambda t_id: (
+            t_id not in proposed, locations[t_id] not in cores, locations[t_id][0] not in packages))
+        for t_id in free_thread_ids[:sizes[workload_id]]:
+            kept[t_id] = workload_id
+        free_thread_ids = free_thread_ids[sizes[workload_id]:]
+
+    return kept
+
+
+def get_isolation_cost(cpu):
+    return CROSS_PACKAGE_VIOLATION_COST * get_cross_package_violation_count(cpu) + get_shared_core_violation_count(cpu)
+
+
+def get_penalized_cost(cpu, moved_thread_count, churn_penalty):
+    """
+    :param churn_penalty: the isolation cost, in shared core violations, of moving one thread of a running workload
+    :return: the isolation cost of the CPU's placement, plus the penalty for the threads moved to reach it
+    """
+    return get_isolation_cost(cpu) + churn_penalty * moved_thread_count
+
+
+def minimize_churn(cpu, thread_id_to_workload_id):
+    """
+    Relabels a proposed placement by a permutation of packages, of cores within a package and of threads within a core
+    so it keeps as many threads of running workloads where they are as possible.  Such permutations preserve isolation
+    on a uniform CPU whose NUMA nodes and last level caches are its packages, so the relabeled placement is as good as
+    the proposed one but moves fewer threads.  On other CPUs the proposed placement is returned.
+
+    Cores and then packages are matched greedily by the number of threads they could keep.
+
+    :param thread_id_to_workload_id: the proposed placement
+    :return: the relabeled placement, or the proposed one if relabeling moves no fewer threads
+    """
+    packages = cpu.get_packages()
+    if not is_uniform(packages) or not is_package_aligned(cpu) or \
+            get_moved_thread_count(cpu, thread_id_to_workload_id) == 0:
+        return thread_id_to_workload_id
+
+    def get_labels(core):
+        return [thread_id_to_workload_id.get(t.get_id(), None) for t in core.get_threads()]
+
+    def get_current_labels(core):
+        return [t.get_workload_id() for t in core.get_threads()]
+
+    # Only workloads which stay on the CPU can be kept in place
+    staying_workload_ids = set(thread_id_to_workload_id.values())
+    proposed_counts = [[count_labels(get_labels(c), staying_workload_ids) for c in p.get_cores()] for p in packages]
+    current_counts = [[count_labels(get_current_labels(c), staying_workload_ids) for c in p.get_cores()]
+                      for p in packages]
+
+    core_matches = {}
+    package_weights = {}
+    for p_i in range(len(packages)):
+        for q_i in range(len(packages)):
+            weights = {(c_i, d_i): get_overlap(proposed_counts[p_i][c_i], current_counts[q_i][d_i])
+                       for c_i in range(len(proposed_counts[p_i]))
+                       for d_i in range(len(current_counts[q_i]))}
+            core_matches[(p_i, q_i)] = match(weights)
+            package_weights[(p_i, q_i)] = sum([weights[pair] for pair in core_matches[(p_i, q_i)].items()])
+
+    relabeled = {}
+    for p_i, q_i in match(package_weights).items():
+        for c_i, d_i in core_matches[(p_i, q_i)].items():
+            proposed_core = packages[p_i].get_cores()[c_i]
+            current_core = packages[q_i].get_cores()[d_i]
+            relabeled.update(relabel_core(get_labels(proposed_core), current_core))
+
+    if get_moved_thread_count(cpu, relabeled) >= get_moved_thread_count(cpu, thread_id_to_workload_id):
+        return thread_id_to_workload_id
+
+    return relabeled
+
+
+def is_uniform(packages):
+    return len(set([len(p.get_cores()) for p in packages])) == 1 and \
+        len(set([len(c.get_threads()) for p in packages for c in p.get_cores()])) == 1
+
+
+def is_package_aligned(cpu):
+    """
+    :return: True if each NUMA node and last level cache of the CPU holds the threads of exactly one package, so
+    permuting packages or the cores within one keeps every workload within the same domains
+    """
+    package_thread_ids = set([frozenset([t.get_id() for t in p.get_threads()]) for p in cpu.get_packages()])
+    return all([frozenset([t.get_id() for t in d.get_threads()]) in package_thread_ids
+                for d in cpu.get_numa_nodes() + cpu.get_llcs()])
+
+
+def count_labels(labels, workload_ids):
+    return Counter([label for label in labels if label in workload_ids])
+
+
+def get_overlap(proposed_counts, current_counts):
+    return sum([min(count, current_counts[w_id]) for w_id, count in proposed_counts.items()])
+
+
+def match(weights):
+    """
+    Greedily matches the left items of the weighted pairs to right items, heaviest pairs first and otherwise in order.
+
+    :param weights: dictionary mapping (left, right) pairs to weights
+    :return: dictionary mapping left items to right items
+    """
+    matches = {}
+    matched = set()
+    for (left, right), _ in sorted(weights.items(), key=lambda item: (-item[1], item[0])):
+        if left not in matches and right not in matched:
+            matches[left] = right
+            matched.add(right)
+
+    return matches
+
+
+def relabel_core(labels, core):
+    """
+    :param labels: the workload ids proposed for the threads of some core, None for free threads
+    :return: dictionary mapping the thread ids of the given core to the same workload ids, keeping as many threads as
+    possible with the workload they hold
+    """
+    remaining = Counter([label for label in labels if label is not None])
+    relabeled = {}
+    free_threads = []
+    for t in core.get_threads():
+        if remaining[t.get_workload_id()] > 0:
+            relabeled[t.get_id()] = t.get_workload_id()
+            remaining[t.get_workload_id()] -= 1
+        else:
+            free_threads.append(t)
+
+    for t, label in zip(free_threads, remaining.elements()):
+        relabeled[t.get_id()] = label
+
+    return relabeled
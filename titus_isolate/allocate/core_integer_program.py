@@ -0,0 +1,184 @@
+import cvxpy as cp
+import numpy as np
+
+from titus_optimize.compute import IP_SOLUTION_OPTIMAL, IP_SOLUTION_TIME_BOUND
+
+# Solve over every thread, with optimize_ip
+THREAD_FORMULATION = 'thread'
+# Solve over cores, with optimize_core_ip
+CORE_FORMULATION = 'core'
+FORMULATIONS = [THREAD_FORMULATION, CORE_FORMULATION]
+
+ALPHA_NU = 1000.0
+ALPHA_LLC = 10.0
+ALPHA_SHARED = 100.0
+ALPHA_ORDER = 1.0
+ALPHA_PREV = 1000.0
+
+
+def get_previous_cores(previous_allocation, core_count, workload_count, odd_indices):
+    """
+    :return: for each core and workload, whether the workload held both threads of the core, and for each core and odd
+    workload, whether it held exactly one of them
+    """
+    prev_whole = np.zeros((core_count, workload_count), dtype=np.int32)
+    prev_half = np.zeros((core_count, len(odd_indices)), dtype=np.int32)
+    if previous_allocation is None:
+        return prev_whole, prev_half
+
+    odd_positions = {j: o for o, j in enumerate(odd_indices)}
+    for j, v in enumerate(previous_allocation[:workload_count]):
+        for l in range(core_count):
+            held = int(v[2 * l] > 0.5) + int(v[2 * l + 1] > 0.5)
+            if held == 2:
+                prev_whole[l, j] = 1
+            elif held == 1 and j in odd_positions:
+                prev_half[l, odd_positions[j]] = 1
+
+    return prev_whole, prev_half
+
+
+def expand_to_threads(whole, half, thread_count, workload_count, previous_allocation=None):
+    """
+    Maps a placement over cores to compute units.  A workload given a whole core gets both of its units.  Workloads
+    given half of a core get one unit each, the one they held before if any, otherwise the first unit goes to the
+    workload with the lowest index.
+
+    :param whole: for each core, the index of the workload given the whole core, or None
+    :param half: for each core, the indices of the odd workloads given half of it
+    :return: an array of binary assignment vectors, as returned by optimize_ip
+    """
+    placement = [[0] * thread_count for _ in range(workload_count)]
+
+    def held(j, t):
+        return previous_allocation is not None and j < len(previous_allocation) and previous_allocation[j][t] > 0.5
+
+    for l in range(thread_count // 2):
+        first, second = 2 * l, 2 * l + 1
+        if whole[l] is not None:
+            placement[whole[l]][first] = 1
+            placement[whole[l]][second] = 1
+            continue
+
+        halves = sorted(half[l])
+        if len(halves) == 1:
+            j = halves[0]
+            placement[j][second if held(j, second) and not held(j, first) else first] = 1
+        elif len(halves) == 2:
+            if held(halves[0], second) or held(halves[1], first):
+                halves.reverse()
+            placement[halves[0]][first] = 1
+            placement[halves[1]][second] = 1
+
+    return placement
+
+
+def optimize_core_ip(requested_cus, total_available_cus, num_sockets, previous_allocation=None, verbose=False,
+                     max_runtime_secs=2, solver='GLPK_MI'):
+    """
+    Finds a placement of workloads on the compute units of the instance, as optimize_ip does, but solves over physical
+    cores rather than over compute units, so the program has about half as many variables.
+
+    A workload requesting r units gets r // 2 whole cores, and when r is odd, one half of a core, which it may share
+    with another odd workload.  Sharing a core is penalized, as is spanning packages, and moving away from the previous
+    allocation.  The placement over cores is then mapped to compute units deterministically, see expand_to_threads.
+
+    Compute units are laid out as for optimize_ip: units 2l and 2l + 1 are the hyperthreads of core l, and packages
+    hold contiguous blocks of cores.
+
+    :return: an array of binary assignment vectors, and the status of the solution
+    """
+    d = total_available_cus
+    n = num_sockets
+    c = d // 2
+    b = c // n  # number of cores per socket
+    k = len(requested_cus)
+
+    if sum(requested_cus) > d:
+        raise ValueError("The total # of compute units requested is higher than the total available on the instance.")
+    if d % 2 != 0:
+        raise ValueError("Odd number of compute units on the instance not allowed.")
+
+    r = np.array(requested_cus)
+    whole_counts = r // 2
+    odd_indices = [j for j in range(k) if r[j] % 2 == 1]
+    m = len(odd_indices)
+
+    prev_whole, prev_half = get_previous_cores(previous_allocation, c, k, odd_indices)
+
+    V = np.zeros((c, k))
+    for l in range(c):
+        for j in range(k):
+            V[l, j] = (l + 1) * (j + 1) * (l // b + 1)
+    sV = max(np.sum(V), 1)
+
+    W = cp.Variable((c, k), boolean=True)
+    X = cp.Variable((n, k), integer=True)
+    U = cp.Variable(1, integer=True)
+    H = None
+    S = None
+    if m > 0:
+        H = cp.Variable((c, m), boolean=True)
+        S = cp.Variable(c, integer=True)
+
+    def get_package_units(t, j):
+        units = 2 * cp.sum(W[t * b: (t + 1) * b, j])
+        if j in odd_indices:
+            units = units + cp.sum(H[t * b: (t + 1) * b, odd_indices.index(j)])
+        return units
+
+    def get_busy_units(t):
+        units = 2 * cp.sum(W[t * b: (t + 1) * b, :])
+        if m > 0:
+            units = units + cp.sum(H[t * b: (t + 1) * b, :])
+        return units
+
+    # 1) Penalize placements where workloads span multiple sockets
+    cost = -(ALPHA_NU / (n * k)) * cp.sum(X)
+
+    # 2) Try to even the # of busy compute units per socket
+    cost += (ALPHA_LLC / n) * sum([cp.abs(U - get_busy_units(t)) for t in range(n)])
+
+    # 3) Favor contiguous indexing, for a deterministic placement
+    cost += (ALPHA_ORDER / (c * k * sV)) * cp.sum(cp.multiply(V, W))
+
+    # 4) If starting from a previous allocation, penalize moving away from it
+    if previous_allocation is not None:
+        cost += (ALPHA_PREV / (c * k)) * cp.sum(cp.abs(W - prev_whole))
+        if m > 0:
+            cost += (ALPHA_PREV / (c * k)) * cp.sum(cp.abs(H - prev_half))
+
+    constraints = [cp.sum(W, axis=0) == whole_counts, X <= 1]
+    constraints += [X[t, j] <= (1.0 / max(r[j], 1)) * get_package_units(t, j) for t in range(n) for j in range(k)]
+
+    if m > 0:
+        # 5) Penalize cores whose siblings are shared by two odd workloads
+        cost += (ALPHA_SHARED / c) * cp.sum(S)
+        constraints += [cp.sum(H, axis=0) == 1, S >= 0, S >= cp.sum(H, axis=1) - 1]
+        constraints += [2 * cp.sum(W, axis=1) + cp.sum(H, axis=1) <= 2]
+    else:
+        constraints += [cp.sum(W, axis=1) <= 1]
+
+    prob = cp.Problem(cp.Minimize(cost), constraints)
+
+    try:
+        extra_args = {} if solver != 'GLPK_MI' else {"tm_lim": int(1000 * max_runtime_secs)}
+        prob.solve(solver=solver, verbose=verbose, **extra_args)
+    except Exception as e:
+        msg = "Solver crashed. (requested_cus=%s , previous_allocation=%s)" % (requested_cus, previous_allocation)
+        raise Exception(msg).with_traceback(e.__traceback__)
+
+    if prob.status not in ('optimal', 'optimal_inaccurate'):
+        raise Exception("Could not solve the integer program: `%s`" % (prob.status,))
+
+    status = IP_SOLUTION_OPTIMAL if prob.status == 'optimal' else IP_SOLUTION_TIME_BOUND
+
+    whole = [None] * c
+    half = [[] for _ in range(c)]
+    for l, j in zip(*np.nonzero(W.value > 0.5)):
+        whole[int(l)] = int(j)
+    if m > 0:
+        for l, o in zip(*np.nonzero(H.value > 0.5)):
+            half[int(l)].append(odd_indices[int(o)])
+
+    return expand_to_threads(whole, half, d, k, previous_allocation), status
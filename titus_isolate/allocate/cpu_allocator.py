@@ -1,5 +1,7 @@
 import abc
 
+from titus_isolate.allocate.placement_delta import merge_deltas
+
 
 class CpuAllocator(abc.ABC):
 
@@ -9,8 +11,35 @@ class CpuAllocator(abc.ABC):
 
     @abc.abstractmethod
     def assign_threads(self, workload):
+        """
+        Claims threads on the cpu for the given workload, possibly moving other static workloads.
+
+        :return: a PlacementDelta describing every workload whose threads changed, or None if the allocator does not
+        track its changes, in which case callers must diff the cpu themselves
+        """
         pass
 
+    def assign_threads_batch(self, workloads):
+        """
+        Claims threads on the cpu for all the given workloads at once, possibly moving other static workloads.
+        Allocators which can place several workloads in one pass should override this, by default workloads are
+        assigned one after the other.
+
+        :return: a PlacementDelta describing every workload whose threads changed, or None if the allocator does not
+        track its changes, in which case callers must diff the cpu themselves
+        """
+        deltas = [self.assign_threads(workload) for workload in workloads]
+        if None in deltas:
+            return None
+
+        return merge_deltas(deltas)
+
     @abc.abstractmethod
     def free_threads(self, workload_id):
+        """
+        Releases the threads of the given workload, possibly moving other static workloads.
+
+        :return: a PlacementDelta describing every workload whose threads changed, or None if the allocator does not
+        track its changes, in which case callers must diff the cpu themselves
+        """
         pass
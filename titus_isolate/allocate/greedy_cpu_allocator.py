@@ -1,5 +1,6 @@
 from titus_isolate import log
 from titus_isolate.allocate.cpu_allocator import CpuAllocator
+from titus_isolate.allocate.placement_delta import PlacementDelta, get_workload_thread_ids
 from titus_isolate.model.processor.utils import get_emptiest_core, is_cpu_full
 from titus_isolate.model.workload import Workload
 
@@ -13,6 +14,11 @@ class GreedyCpuAllocator(CpuAllocator):
         return self.__cpu
 
     def assign_threads(self, workload):
+        before = get_workload_thread_ids(self.__cpu, [workload.get_id()])
+        self.__assign_threads(workload)
+        return PlacementDelta(before, get_workload_thread_ids(self.__cpu, [workload.get_id()]))
+
+    def __assign_threads(self, workload):
         thread_count = workload.get_thread_count()
         claimed_threads = []
 
@@ -26,7 +32,7 @@ class GreedyCpuAllocator(CpuAllocator):
 
         package = self.__cpu.get_emptiest_package()
 
-        while thread_count > 0 and len(package.get_empty_threads()) > 0:
+        while thread_count > 0 and package.get_empty_thread_count() > 0:
             core = get_emptiest_core(package)
             empty_threads = core.get_empty_threads()[:thread_count]
 
@@ -37,9 +43,10 @@ class GreedyCpuAllocator(CpuAllocator):
                 claimed_threads.append(empty_thread)
                 thread_count -= 1
 
-        return claimed_threads + self.assign_threads(Workload(workload.get_id(), thread_count, workload.get_type()))
+        return claimed_threads + self.__assign_threads(Workload(workload.get_id(), thread_count, workload.get_type()))
 
     def free_threads(self, workload_id):
-        for t in self.__cpu.get_threads():
-            if t.get_workload_id() == workload_id:
-                t.free()
+        before = get_workload_thread_ids(self.__cpu, [workload_id])
+        for t in self.__cpu.get_workload_threads(workload_id):
+            t.free()
+        return PlacementDelta(before, {})
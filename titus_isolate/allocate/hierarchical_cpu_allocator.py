@@ -0,0 +1,286 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import cvxpy as cp
+import numpy as np
+
+from titus_isolate import log
+from titus_isolate.allocate.churn import minimize_churn
+from titus_isolate.allocate.core_integer_program import THREAD_FORMULATION
+from titus_isolate.allocate.cpu_allocator import CpuAllocator
+from titus_isolate.allocate.integer_program_cpu_allocator import make_solver_request, solve_ip
+from titus_isolate.allocate.placement_delta import PlacementDelta, apply_thread_mapping
+from titus_isolate.allocate.solution_cache import SolutionCache
+from titus_optimize.compute import IP_SOLUTION_OPTIMAL, IP_SOLUTION_TIME_BOUND
+
+DEFAULT_PACKAGE_SOLVER_MAX_RUNTIME_SECS = 0.5
+
+# The weights of assign_packages: a workload spanning an extra package is worth moving up to 10 threads of running
+# workloads, and moving a thread is worth making the busiest package busier by up to 10 threads
+PACKAGE_SPAN_COST = 1000.0
+PACKAGE_MOVE_COST = 100.0
+PACKAGE_LOAD_COST = 10.0
+
+
+def assign_packages(requested_units, current_counts, package_thread_counts, max_runtime_secs=None):
+    """
+    Decides how many threads of each workload go to each package, a small knapsack over packages rather than threads.
+
+    Spanning an extra package costs more than moving a few threads of running workloads between packages, which costs
+    more than making the busiest package busier, see the PACKAGE_*_COST weights.
+
+    :param requested_units: the number of threads requested by each workload
+    :param current_counts: for each workload, the number of threads it holds on each package, all zero if it is new
+    :param package_thread_counts: the number of threads of each package
+    :return: for each workload, the number of threads it gets on each package, and the status of the solution
+    """
+    k = len(requested_units)
+    n = len(package_thread_counts)
+    r = np.array(requested_units)
+    capacities = np.array(package_thread_counts)
+    current = np.asarray(current_counts, dtype=np.int32).reshape(k, n)
+
+    if r.sum() > capacities.sum():
+        raise ValueError("The total # of compute units requested is higher than the total available on the instance.")
+
+    # Only the threads of running workloads can move
+    running = np.tile((current.sum(axis=1) > 0).reshape(k, 1), (1, n))
+    V = np.array([[(p + 1) * (j + 1) for p in range(n)] for j in range(k)])
+
+    Z = cp.Variable((k, n), integer=True)
+    X = cp.Variable((k, n), boolean=True)
+    U = cp.Variable(1, integer=True)
+
+    # 1) Penalize workloads spanning multiple packages
+    cost = PACKAGE_SPAN_COST * cp.sum(X)
+    # 2) Penalize moving threads of running workloads to other packages, each move counts twice
+    cost += (PACKAGE_MOVE_COST / 2) * cp.sum(cp.multiply(running, cp.abs(Z - current)))
+    # 3) Try to keep the busiest package as idle as possible
+    cost += PACKAGE_LOAD_COST * U
+    # 4) Favor low package indices, for a deterministic assignment
+    cost += (1.0 / max(V.sum(), 1)) * cp.sum(cp.multiply(V, Z))
+
+    constraints = [
+        Z >= 0,
+        cp.sum(Z, axis=1) == r,
+        cp.sum(Z, axis=0) <= capacities,
+        U >= cp.sum(Z, axis=0),
+        Z <= cp.multiply(np.tile(capacities, (k, 1)), X)]
+
+    prob = cp.Problem(cp.Minimize(cost), constraints)
+    try:
+        extra_args = {} if max_runtime_secs is None else {"tm_lim": int(1000 * max_runtime_secs)}
+        prob.solve(solver='GLPK_MI', **extra_args)
+    except Exception as e:
+        msg = "Solver crashed. (requested_units=%s , current_counts=%s)" % (requested_units, current_counts)
+        raise Exception(msg).with_traceback(e.__traceback__)
+
+    if prob.status not in ('optimal', 'optimal_inaccurate'):
+        raise Exception("Could not assign workloads to packages: `%s`" % (prob.status,))
+
+    status = IP_SOLUTION_OPTIMAL if prob.status == 'optimal' else IP_SOLUTION_TIME_BOUND
+    return np.rint(Z.value).astype(np.int32).tolist(), status
+
+
+class HierarchicalCpuAllocator(CpuAllocator):
+    """
+    Places static workloads in two levels, so the solve time grows with the size of a package rather than with the
+    size of the CPU.
+
+    Workloads are first assigned to packages by a small integer program over packages, see assign_packages.  Then the
+    placement within each package whose assignment changed is solved independently, as an integer program over that
+    package only, in parallel across packages.  Packages an event does not touch are left as they are.
+
+    Threads held by workloads this allocator did not place, e.g. placed by a fallback allocator, are fixed capacity:
+    they are left out of both levels and keep their workloads.
+    """
+
+    def __init__(self, cpu, solver_max_runtime_secs=DEFAULT_PACKAGE_SOLVER_MAX_RUNTIME_SECS, executor=None,
+                 formulation=THREAD_FORMULATION):
+        """
+        :param solver_max_runtime_secs: the time limit of each solve, at either level
+        :param executor: the executor solving packages in parallel, by default a process per package, created when two
+        packages or more must be solved
+        :param formulation: the integer program solving each package, see core_integer_program
+        """
+        self.__cpu = cpu
+        self.__solver_max_runtime_secs = solver_max_runtime_secs
+        self.__executor = executor
+        self.__formulation = formulation
+        self.__cache = SolutionCache()
+        self.__last_call_time_bound = False
+        self.__solved_package_count = 0
+
+        # Workload ids in the order they were placed
+        self.__workload_ids = sorted(cpu.get_workload_ids_to_thread_ids().keys(), key=lambda w_id: str(w_id))
+        if len(self.__workload_ids) > 0:
+            log.warn("CPU already has assigned workloads.")
+
+    def get_cpu(self):
+        return self.__cpu
+
+    def __get_package_cores(self, workload_ids):
+        """
+        :return: for each package, the threads of each of its cores which are empty or held by the given workloads,
+        leaving out cores with none
+        """
+        known = set(workload_ids)
+        package_cores = []
+        for p in self.__cpu.get_packages():
+            cores = [[t for t in c.get_threads() if not t.is_claimed() or t.get_workload_id() in known]
+                     for c in p.get_cores()]
+            package_cores.append([threads for threads in cores if len(threads) > 0])
+        return package_cores
+
+    def __get_package_threads(self, workload_ids):
+        return [[t for threads in cores for t in threads] for cores in self.__get_package_cores(workload_ids)]
+
+    def __get_current_counts(self, workload_ids):
+        packages = self.__get_package_threads(workload_ids)
+        counts = [[0] * len(packages) for _ in workload_ids]
+        indices = {w_id: i for i, w_id in enumerate(workload_ids)}
+        for p_i, threads in enumerate(packages):
+            for t in threads:
+                if t.get_workload_id() in indices:
+                    counts[indices[t.get_workload_id()]][p_i] += 1
+        return counts
+
+    def assign_threads(self, workload):
+        return self.assign_threads_batch([workload])
+
+    def assign_threads_batch(self, workloads):
+        if len(workloads) == 0:
+            return PlacementDelta()
+
+        workload_ids = self.__workload_ids + [w.get_id() for w in workloads]
+        current_counts = self.__get_current_counts(workload_ids)
+        requested_units = [sum(counts) for counts in current_counts[:len(self.__workload_ids)]] + \
+                          [w.get_thread_count() for w in workloads]
+        package_thread_counts = [len(threads) for threads in self.__get_package_threads(workload_ids)]
+
+        counts, status = assign_packages(
+            requested_units, current_counts, package_thread_counts, self.__solver_max_runtime_secs)
+        delta = self.__place(workload_ids, current_counts, counts, status)
+        self.__workload_ids = workload_ids
+        return delta
+
+    def free_threads(self, workload_id):
+        if not self.__cpu.has_workload(workload_id):
+            raise Exception("workload_id=`%s` is not placed on the instance. Cannot free it." % (workload_id,))
+
+        if workload_id not in self.__workload_ids:
+            log.info("Releasing the threads of workload: '{}' placed by another allocator".format(workload_id))
+            self.__last_call_time_bound = False
+            return apply_thread_mapping(self.__cpu, {t.get_id(): t.get_workload_id()
+                                                     for t in self.__cpu.get_claimed_threads()
+                                                     if t.get_workload_id() != workload_id})
+
+        workload_ids = list(self.__workload_ids)
+        current_counts = self.__get_current_counts(workload_ids)
+        counts = [[0] * len(c) if w_id == workload_id else c for w_id, c in zip(workload_ids, current_counts)]
+        delta = self.__place(workload_ids, current_counts, counts, IP_SOLUTION_OPTIMAL)
+        self.__workload_ids.remove(workload_id)
+        return delta
+
+    def __place(self, workload_ids, current_counts, counts, status):
+        """
+        Solves the placement within every package whose assignment changed, then applies the placements.
+        """
+        package_cores = self.__get_package_cores(workload_ids)
+        packages = [[t for threads in cores for t in threads] for cores in package_cores]
+        touched = [p_i for p_i in range(len(packages))
+                   if any([c[p_i] != p[p_i] for c, p in zip(counts, current_counts)])]
+        log.info("Solving the placement of packages: {}".format(touched))
+
+        requests = [self.__get_package_request(workload_ids, counts, package_cores[p_i], p_i) for p_i in touched]
+        solutions = self.__solve(requests)
+
+        thread_id_to_workload_id = {t.get_id(): t.get_workload_id() for t in self.__cpu.get_claimed_threads()}
+        for p_i, (request, rows), (placement, package_status) in zip(touched, requests, solutions):
+            for t in packages[p_i]:
+                thread_id_to_workload_id.pop(t.get_id(), None)
+            if len(rows) == 0:
+                continue
+
+            for row, vector in zip(rows, request.restore(placement)):
+                for slot, claimed in enumerate(vector):
+                    if claimed > 0.5:
+                        thread_id_to_workload_id[packages[p_i][slot].get_id()] = workload_ids[row]
+
+            if package_status == IP_SOLUTION_TIME_BOUND:
+                status = IP_SOLUTION_TIME_BOUND
+
+        self.__last_call_time_bound = status == IP_SOLUTION_TIME_BOUND
+        self.__solved_package_count += len(touched)
+        return apply_thread_mapping(self.__cpu, minimize_churn(self.__cpu, thread_id_to_workload_id))
+
+    def __get_package_request(self, workload_ids, counts, cores, p_i):
+        """
+        :param cores: the threads of each core of the package the workloads can be placed on
+        :return: the SolverRequest placing the workloads assigned to the package within it, or None if there are
+        none, and their rows
+        """
+        threads = [t for core_threads in cores for t in core_threads]
+        rows = [row for row in range(len(workload_ids)) if counts[row][p_i] > 0]
+        if len(rows) == 0:
+            return None, rows
+
+        current_placement = [[0] * len(threads) for _ in rows]
+        indices = {workload_ids[row]: i for i, row in enumerate(rows)}
+        for slot, t in enumerate(threads):
+            if t.get_workload_id() in indices:
+                current_placement[indices[t.get_workload_id()]][slot] = 1
+
+        core_thread_counts = [[len(core_threads) for core_threads in cores]]
+        request = make_solver_request(
+            [counts[row][p_i] for row in rows],
+            current_placement if any([sum(v) > 0 for v in current_placement]) else None,
+            core_thread_counts,
+            self.__solver_max_runtime_secs,
+            incremental=False,
+            formulation=self.__formulation)
+        return request, rows
+
+    def __solve(self, requests):
+        """
+        :return: the (placement, status) solving each request, from the cache or solved in parallel
+        """
+        solutions = [self.__cache.get(request.get_key()) if len(rows) > 0 else ([], IP_SOLUTION_OPTIMAL)
+                     for request, rows in requests]
+        unsolved = [i for i, solution in enumerate(solutions) if solution is None]
+
+        if len(unsolved) == 1:
+            solutions[unsolved[0]] = solve_ip(requests[unsolved[0]][0].get_solver_args())
+        elif len(unsolved) > 1:
+            if self.__executor is None:
+                self.__executor = ProcessPoolExecutor(max_workers=len(self.__cpu.get_packages()))
+            futures = {i: self.__executor.submit(solve_ip, requests[i][0].get_solver_args()) for i in unsolved}
+            for i, future in futures.items():
+                solutions[i] = future.result()
+
+        for i in unsolved:
+            self.__cache.put(requests[i][0].get_key(), *solutions[i])
+
+        return solutions
+
+    def get_solution_cache(self):
+        return self.__cache
+
+    def get_solved_package_count(self):
+        """
+        :return: the number of package placements solved or looked up since creation
+        """
+        return self.__solved_package_count
+
+    def get_formulation(self):
+        return self.__formulation
+
+    def set_formulation(self, formulation):
+        if formulation != self.__formulation:
+            self.__formulation = formulation
+            self.__cache = SolutionCache()
+
+    def is_last_call_time_bound(self):
+        return self.__last_call_time_bound
+
+    def set_solver_max_runtime_secs(self, val):
+        self.__solver_max_runtime_secs = val
@@ -1,18 +1,173 @@
 import time
 
+import numpy as np
+
 from titus_isolate import log
+from titus_isolate.allocate.churn import DEFAULT_CHURN_PENALTY, get_moved_thread_count, get_penalized_cost, \
+    keep_running_workloads, minimize_churn
+from titus_isolate.allocate.core_integer_program import CORE_FORMULATION, THREAD_FORMULATION, optimize_core_ip
 from titus_isolate.allocate.cpu_allocator import CpuAllocator
-from titus_optimize.compute import IP_SOLUTION_TIME_BOUND, optimize_ip
+from titus_isolate.allocate.placement_delta import PlacementDelta, apply_thread_mapping, get_workload_thread_ids
+from titus_isolate.allocate.restriction import restrict
+from titus_isolate.allocate.solution_cache import SolutionCache, get_solver_request, pack_vectors
+from titus_isolate.allocate.solution_cache_file import SolutionCacheFile, get_cache_version
+from titus_isolate.allocate.solution_table import SolutionTable, get_solution_table_path
+from titus_isolate.allocate.solver_budget import SolverBudget
+from titus_optimize.compute import IP_SOLUTION_OPTIMAL, IP_SOLUTION_TIME_BOUND, optimize_ip
+
+
+def solve_ip(solver_args):
+    """
+    Solves a request with the integer program solver.  It is a module level function so it can be run in a process
+    pool.
+
+    :param solver_args: the solver arguments of a SolverRequest
+    :return: (placement, status)
+    """
+    requested_units, thread_count, package_count, current_placement, max_runtime_secs, formulation = solver_args
+    optimize = optimize_core_ip if formulation == CORE_FORMULATION else optimize_ip
+    return optimize(
+        requested_units,
+        thread_count,
+        package_count,
+        current_placement,
+        verbose=False,
+        max_runtime_secs=max_runtime_secs)
+
+
+def make_solver_request(requested_units, current_placement, core_thread_counts, max_runtime_secs, use_symmetry=True,
+                        incremental=True, packed_placement=None, fingerprint=None, workload_ids=None,
+                        skipped_workload_id=None, formulation=THREAD_FORMULATION):
+    """
+    Prepares a request for the integer program solver.
+
+    :param current_placement: the current placement vectors, or None
+    :param core_thread_counts: a list, per package, of the thread count of each of its cores
+    :param use_symmetry: pose the request in the canonical form of its symmetry class
+    :param incremental: restrict the request to the packages affected by the workloads being added or removed
+    :param packed_placement: the current placement vectors as packed by pack_vectors, when already known
+    :param formulation: the integer program to solve, see core_integer_program.  The core formulation only applies to
+    cores of two threads, requests over other cores are solved over threads.
+    :return: a SolverRequest
+    """
+    restriction = None
+    if incremental:
+        restriction = restrict(requested_units, current_placement, core_thread_counts)
+
+    if restriction is not None:
+        requested_units = restriction.get_requested_units()
+        current_placement = restriction.get_current_placement()
+        core_thread_counts = restriction.get_core_thread_counts()
+        packed_placement = None
+
+    if any([count != 2 for counts in core_thread_counts for count in counts]):
+        formulation = THREAD_FORMULATION
+
+    thread_count = sum([sum(counts) for counts in core_thread_counts])
+    canonicalization, key = get_solver_request(
+        thread_count,
+        requested_units,
+        current_placement,
+        core_thread_counts,
+        use_symmetry=use_symmetry,
+        packed_placement=packed_placement)
+
+    solver_args = (
+        canonicalization.get_requested_units(),
+        thread_count,
+        len(core_thread_counts),
+        canonicalization.get_current_placement(),
+        max_runtime_secs,
+        formulation)
+    return SolverRequest(
+        fingerprint, workload_ids, skipped_workload_id, canonicalization, restriction, key, solver_args)
+
+
+class SolverRequest:
+    """
+    A request to the integer program solver, with what is needed to map a solution of it back onto the CPU.
+    """
+
+    def __init__(self, fingerprint, workload_ids, skipped_workload_id, canonicalization, restriction, key, solver_args):
+        """
+        :param fingerprint: the fingerprint of the CPU when the request was made
+        :param workload_ids: the ids of the workloads, in the order of the requested units
+        :param skipped_workload_id: the id of a workload being removed, whose threads are released
+        :param restriction: the Restriction of the request to some packages, or None
+        """
+        self.__fingerprint = fingerprint
+        self.__workload_ids = workload_ids
+        self.__skipped_workload_id = skipped_workload_id
+        self.__canonicalization = canonicalization
+        self.__restriction = restriction
+        self.__key = key
+        self.__solver_args = solver_args
+
+    def get_fingerprint(self):
+        return self.__fingerprint
+
+    def get_workload_ids(self):
+        return self.__workload_ids
+
+    def get_skipped_workload_id(self):
+        return self.__skipped_workload_id
+
+    def get_canonicalization(self):
+        return self.__canonicalization
+
+    def get_restriction(self):
+        return self.__restriction
+
+    def restore(self, placement):
+        """
+        :param placement: placement vectors solving the request as posed to the solver
+        :return: the placement vectors of every workload of the request on the whole CPU
+        """
+        placement = self.__canonicalization.restore(placement)
+        if self.__restriction is not None:
+            placement = self.__restriction.restore(placement)
+        return placement
+
+    def get_key(self):
+        return self.__key
+
+    def get_solver_args(self):
+        return self.__solver_args
 
 
 class IntegerProgramCpuAllocator(CpuAllocator):
 
-    def __init__(self, cpu, solver_max_runtime_secs = 1.5):
+    def __init__(self, cpu, solver_max_runtime_secs = 1.5, use_symmetry=True, incremental=True,
+                 churn_penalty=DEFAULT_CHURN_PENALTY, fast_free=False, formulation=THREAD_FORMULATION,
+                 solver_latency_slo_secs=None):
+        """
+        :param use_symmetry: solve and cache requests in a canonical form shared by all requests which differ only by
+        a permutation of packages, cores, threads within a core or placed workloads
+        :param incremental: solve only over the packages affected by a workload being added or removed, leaving the
+        workloads on other packages in place, so solve time scales with the change rather than with the CPU
+        :param churn_penalty: the isolation cost, in shared core violations, of moving one thread of a running
+        workload.  Adding or freeing workloads only moves others when the isolation gained outweighs the penalty.
+        :param fast_free: free workloads by releasing their threads without solving, which always leaves a valid
+        placement.  Re-optimizing it is left to the caller, e.g. with get_upgrade_request.
+        :param formulation: solve over threads with optimize_ip, or over cores with optimize_core_ip, whose program is
+        about half the size.  See core_integer_program.
+        :param solver_latency_slo_secs: if set, the time limit of each solve is chosen from a model of the solve times
+        recorded so far, so solves meet this SLO, rather than always being solver_max_runtime_secs.  See SolverBudget.
+        """
         self.__cpu = cpu
+        self.__use_symmetry = use_symmetry
+        self.__incremental = incremental
+        self.__churn_penalty = churn_penalty
+        self.__fast_free = fast_free
+        self.__formulation = formulation
         self.__workload_insertion_times = {}
-        self.__cache = {}  # TODO: use @functools.lru_cache instead
+        self.__cache = SolutionCache()
+        self.__cache_file = None
+        self.__table = None
         self.__solver_max_runtime_secs = solver_max_runtime_secs
+        self.__solver_budget = SolverBudget(solver_max_runtime_secs, solver_latency_slo_secs)
         self.__last_call_time_bound = False
+        self.__placement_memo = None
 
         curr_ids_per_workload = self.__cpu.get_workload_ids_to_thread_ids()
         if len(curr_ids_per_workload) > 0:
@@ -27,32 +182,141 @@ class IntegerProgramCpuAllocator(CpuAllocator):
     def __ordered_workload_ids(self):
         return [t[0] for t in sorted(self.__workload_insertion_times.items(), key=lambda t: t[1])]
 
-    def __assign_new_mapping(self, thread_id2workload_id):
-        self.__cpu.clear()
-        for t in self.__cpu.get_threads():
-            wid = thread_id2workload_id.get(t.get_id(), None)
-            if wid is not None:
-                t.claim(wid)
-
-    def __compute_new_placement(self, current_placement, requested_units):
-        key_req = '-'.join([str(e) for e in requested_units])
-        cache_key = key_req
-        if current_placement is not None: 
-            cache_key += '&' + '%'.join(['|'.join([str(e) for e in v]) for v in current_placement])
-
-        cache_val = self.__cache.get(cache_key, None)
-        if cache_val is None:
-            placement, status = optimize_ip(requested_units,
-                            len(self.__cpu.get_threads()),
-                            len(self.__cpu.get_packages()),
-                            current_placement,
-                            verbose=False,
-                            max_runtime_secs=self.__solver_max_runtime_secs)
-            self.__cache[cache_key] = (placement, status)
-        else:
-            placement, status = cache_val[0], cache_val[1]
+    def __get_current_placement(self, ordered_workload_ids):
+        """
+        Returns the placement vectors of the given workloads and their packed form.  Both are memoized on the CPU's
+        fingerprint, so the placement left by the previous call is not rebuilt unless the CPU was changed elsewhere.
+        """
+        memo_key = (self.__cpu.fingerprint(), tuple(ordered_workload_ids))
+        if self.__placement_memo is None or self.__placement_memo[0] != memo_key:
+            vectors = self.__cpu.get_occupancy_matrix().get_placement_vectors(ordered_workload_ids).tolist()
+            self.__placement_memo = (memo_key, vectors, self.__pack_vectors(vectors))
+
+        return self.__placement_memo[1], self.__placement_memo[2]
+
+    def __remember_placement(self, ordered_workload_ids, thread_id_to_workload_id):
+        thread_ids = self.__cpu.get_occupancy_matrix().get_thread_ids()
+        indices = {w_id: i for i, w_id in enumerate(ordered_workload_ids)}
+        vectors = [[0] * len(thread_ids) for _ in ordered_workload_ids]
+        for t_ind, thread_id in enumerate(thread_ids):
+            workload_id = thread_id_to_workload_id.get(int(thread_id), None)
+            if workload_id is not None:
+                vectors[indices[workload_id]][t_ind] = 1
+
+        memo_key = (self.__cpu.fingerprint(), tuple(ordered_workload_ids))
+        self.__placement_memo = (memo_key, vectors, self.__pack_vectors(vectors))
+
+    def __pack_vectors(self, vectors):
+        return pack_vectors(vectors, len(self.__cpu.get_threads()))
+
+    def __get_request(self, ordered_workload_ids, current_placement, packed_placement, requested_units,
+                      skipped_workload_id=None):
+        core_thread_counts = [[len(c.get_threads()) for c in p.get_cores()] for p in self.__cpu.get_packages()]
+        return make_solver_request(
+            requested_units,
+            current_placement,
+            core_thread_counts,
+            self.__solver_max_runtime_secs,
+            use_symmetry=self.__use_symmetry,
+            incremental=self.__incremental,
+            packed_placement=packed_placement,
+            fingerprint=self.__cpu.fingerprint(),
+            workload_ids=ordered_workload_ids,
+            skipped_workload_id=skipped_workload_id,
+            formulation=self.__formulation)
+
+    def get_cached_solution(self, request):
+        """
+        :return: the (placement, status) solving the request from the solution cache or table, or None
+        """
+        solution = self.__cache.get(request.get_key())
+        if solution is None and self.__table is not None:
+            solution = self.__table.get(request.get_key())
+            if solution is not None:
+                self.__cache.put(request.get_key(), solution[0], solution[1])
+
+        return solution
+
+    def has_cached_solution(self, request):
+        """
+        :return: True if the solution cache or table solves the request, without counting as use
+        """
+        return request.get_key() in self.__cache or (self.__table is not None and request.get_key() in self.__table)
+
+    def put_solution(self, request, placement, status):
+        """
+        Caches a solution of the request, wherever it was solved.  Only optimal solutions are persisted: a solution the
+        solver was stopped early on is kept in memory, where it does not replace an optimal one and is replaced by the
+        next solution put for the request.
+        """
+        if status != IP_SOLUTION_OPTIMAL and self.__cache.get_status(request.get_key()) == IP_SOLUTION_OPTIMAL:
+            return
+
+        self.__cache.put(request.get_key(), placement, status)
+        if status == IP_SOLUTION_OPTIMAL:
+            self.__write_through(request.get_key(), placement, status)
+
+    def __solve(self, request):
+        solution = self.get_cached_solution(request)
+        if solution is None:
+            solver_args = self.__solver_budget.budget(request.get_solver_args())
+            start_time = time.time()
+            solution = solve_ip(solver_args)
+            self.__solver_budget.record(solver_args, time.time() - start_time, solution[1])
+
+            # A solve cut short by a reduced time limit, e.g. during a latency spike, is not reused for the request
+            if solution[1] == IP_SOLUTION_TIME_BOUND and solver_args[4] < request.get_solver_args()[4]:
+                log.info("Not caching a solution stopped early by a time limit reduced to: {:.3f}s".format(
+                    solver_args[4]))
+            else:
+                self.put_solution(request, solution[0], solution[1])
+
+        return solution
+
+    def get_thread_mapping(self, request, placement):
+        """
+        Maps the threads claimed in a solution of the request, which are ordered by workload and then by thread, back
+        to thread ids.  When moving running workloads is penalized, the equivalent mapping keeping the most of their
+        threads in place is returned instead, see minimize_churn.
+
+        :return: a dict of thread ids to workload ids
+        """
+        placement_vectors = request.restore(placement)
+        ordered_workload_ids = request.get_workload_ids()
+        thread_ids = self.__cpu.get_occupancy_matrix().get_thread_ids()
+        w_indices, t_indices = np.nonzero(np.asarray(placement_vectors) == 1)
+
+        thread_id2workload_id = {}
+        for w_ind, t_ind in zip(w_indices.tolist(), t_indices.tolist()):
+            if ordered_workload_ids[w_ind] != request.get_skipped_workload_id():
+                thread_id2workload_id[int(thread_ids[t_ind])] = ordered_workload_ids[w_ind]
+
+        if self.__churn_penalty <= 0:
+            return thread_id2workload_id
+
+        return minimize_churn(self.__cpu, thread_id2workload_id)
+
+    def apply_solution(self, request, placement, status):
+        """
+        Applies a solution of the request to the CPU.  The CPU must not have changed since the request was made.
+
+        :return: a PlacementDelta describing the change
+        """
+        return self.__apply_thread_mapping(request, self.get_thread_mapping(request, placement), status)
+
+    def __apply_thread_mapping(self, request, thread_id_to_workload_id, status):
         self.__last_call_time_bound = status == IP_SOLUTION_TIME_BOUND
-        return placement
+        delta = apply_thread_mapping(self.__cpu, thread_id_to_workload_id)
+
+        ordered_workload_ids = request.get_workload_ids()
+        skipped_workload_id = request.get_skipped_workload_id()
+        for wid in ordered_workload_ids:
+            if wid != skipped_workload_id and wid not in self.__workload_insertion_times:
+                self.__workload_insertion_times[wid] = time.time()
+
+        self.__remember_placement(
+            [wid for wid in ordered_workload_ids if wid != skipped_workload_id], thread_id_to_workload_id)
+        return delta
 
     def assign_threads(self, workload):
         """
@@ -63,81 +327,223 @@ class IntegerProgramCpuAllocator(CpuAllocator):
         indicating unix timestamps at which workloads currently running on the cpu
         have been placed.
         """
-        n_compute_units = len(self.__cpu.get_threads())
+        return self.assign_threads_batch([workload])
 
-        curr_ids_per_workload = self.__cpu.get_workload_ids_to_thread_ids()
+    def assign_threads_batch(self, workloads):
+        """
+        Use the integer program solver to place all the given workloads in a single optimization.
+        """
+        if len(workloads) == 0:
+            return PlacementDelta()
 
-        ordered_workload_ids = self.__ordered_workload_ids().copy()
-        tid_2order = {i: t.get_id() for i, t in enumerate(self.__cpu.get_threads())}
+        request = self.get_assign_request(workloads)
+        placement, status = self.__solve(request)
 
-        curr_placement_vectors = []
-        for wid in ordered_workload_ids:
-            cids = curr_ids_per_workload[wid]
-            v = [1 if tid_2order[i] in cids else 0 for i in range(n_compute_units)]
-            curr_placement_vectors.append(v)
+        return self.__apply_thread_mapping(request, self.__get_cheaper_mapping(request, placement), status)
+
+    def get_assign_request(self, workloads):
+        """
+        :return: the SolverRequest assigning threads to the given workloads would solve
+        """
+        ordered_workload_ids = self.__ordered_workload_ids()
+
+        curr_placement_vectors, packed_placement = self.__get_current_placement(ordered_workload_ids)
         if len(curr_placement_vectors) == 0:
             curr_placement_vectors = None
             requested_cus = []
         else:
             requested_cus = [sum(v) for v in curr_placement_vectors]
-        requested_cus += [workload.get_thread_count()]
-
-        new_placement_vectors = self.__compute_new_placement(curr_placement_vectors, requested_cus)
-
-        ordered_workload_ids.append(workload.get_id())
-
-        thread_id2workload_id = {}
-        for w_ind, v in enumerate(new_placement_vectors):
-            for i, e in enumerate(v):
-                if e == 1:
-                    thread_id2workload_id[tid_2order[i]] = ordered_workload_ids[w_ind]
+        requested_cus += [w.get_thread_count() for w in workloads]
 
-        self.__assign_new_mapping(thread_id2workload_id)
-        self.__workload_insertion_times[workload.get_id()] = time.time()
+        return self.__get_request(
+            ordered_workload_ids + [w.get_id() for w in workloads],
+            curr_placement_vectors,
+            packed_placement,
+            requested_cus)
 
     def free_threads(self, workload_id):
         """
         Use the integerprogram solver to find the optimal static placement
         after removing the given workload from the cpu.
         """
-        n_compute_units = len(self.__cpu.get_threads())
+        if not self.__cpu.has_workload(workload_id):
+            raise Exception("workload_id=`%s` is not placed on the instance. Cannot free it." % (workload_id,))
 
-        curr_ids_per_workload = self.__cpu.get_workload_ids_to_thread_ids()
+        if self.__fast_free:
+            return self.__release_threads(workload_id)
 
-        if workload_id not in curr_ids_per_workload:
-            raise Exception("workload_id=`%s` is not placed on the instance. Cannot free it." % (workload_id,))
+        request = self.get_free_request(workload_id)
+        placement, status = self.__solve(request)
 
+        delta = self.__apply_thread_mapping(request, self.__get_cheaper_mapping(request, placement), status)
+        self.__workload_insertion_times.pop(workload_id)
+        return delta
+
+    def get_free_request(self, workload_id):
+        """
+        :return: the SolverRequest freeing the threads of the given workload would solve, unless freeing is fast
+        """
         ordered_workload_ids = self.__ordered_workload_ids()
-        tid_2order = {i: t.get_id() for i, t in enumerate(self.__cpu.get_threads())}
 
-        curr_placement_vectors = []
-        for wid in ordered_workload_ids:
-            cids = curr_ids_per_workload[wid]
-            v = [1 if tid_2order[i] in cids else 0 for i in range(n_compute_units)]
-            curr_placement_vectors.append(v)
+        curr_placement_vectors, packed_placement = self.__get_current_placement(ordered_workload_ids)
         if len(curr_placement_vectors) == 0:
             raise Exception("Cannot free a workload from an empty CPU")
 
-        requested_cus = [len(curr_ids_per_workload[wid]) if wid != workload_id else 0 for wid in ordered_workload_ids]
+        requested_cus = [sum(v) if wid != workload_id else 0
+                         for wid, v in zip(ordered_workload_ids, curr_placement_vectors)]
 
-        new_placement_vectors = self.__compute_new_placement(curr_placement_vectors, requested_cus)
+        return self.__get_request(
+            ordered_workload_ids, curr_placement_vectors, packed_placement, requested_cus, workload_id)
+
+    def __release_threads(self, workload_id):
+        self.__last_call_time_bound = False
+        before = get_workload_thread_ids(self.__cpu, [workload_id])
+        for t in self.__cpu.get_workload_threads(workload_id):
+            t.free()
+
+        self.__workload_insertion_times.pop(workload_id, None)
+        return PlacementDelta(before, {})
+
+    def __get_cheaper_mapping(self, request, placement):
+        """
+        :return: the thread mapping of the solution, or one keeping running workloads in place if the isolation gained
+        by moving them is not worth the churn penalty
+        """
+        thread_id_to_workload_id = self.get_thread_mapping(request, placement)
+        if self.__churn_penalty <= 0:
+            return thread_id_to_workload_id
+
+        moved_thread_count = get_moved_thread_count(self.__cpu, thread_id_to_workload_id)
+        if moved_thread_count == 0:
+            return thread_id_to_workload_id
+
+        current_cpu = self.__cpu.snapshot()
+        kept = keep_running_workloads(self.__cpu, thread_id_to_workload_id)
+        moved_cost = get_penalized_cost(
+            current_cpu.remap(thread_id_to_workload_id), moved_thread_count, self.__churn_penalty)
+        kept_cost = get_penalized_cost(current_cpu.remap(kept), 0, self.__churn_penalty)
+        if moved_cost < kept_cost:
+            return thread_id_to_workload_id
+
+        log.info("Keeping running workloads in place, moving {} of their threads is not worth the churn".format(
+            moved_thread_count))
+        return kept
+
+    def get_upgrade_request(self):
+        """
+        Makes the request this allocator would have made for the workloads placed on the CPU by another allocator
+        sharing it, e.g. a faster one placing them first.  Those workloads are requested as new ones, alongside the
+        workloads this allocator placed.  The request may be solved elsewhere, see solve_ip, and applied later if the
+        CPU has not changed in between.
+
+        :return: a SolverRequest, or None if the CPU holds no workloads
+        """
+        placed_workload_ids = self.__cpu.get_workload_ids_to_thread_ids()
+        for wid in list(self.__workload_insertion_times.keys()):
+            if wid not in placed_workload_ids:
+                self.__workload_insertion_times.pop(wid)
+
+        ordered_workload_ids = self.__ordered_workload_ids()
+        new_workload_ids = [wid for wid in placed_workload_ids.keys() if wid not in self.__workload_insertion_times]
+        if len(ordered_workload_ids) + len(new_workload_ids) == 0:
+            return None
+
+        curr_placement_vectors, packed_placement = self.__get_current_placement(ordered_workload_ids)
+        requested_cus = [sum(v) for v in curr_placement_vectors] + \
+                        [len(placed_workload_ids[wid]) for wid in new_workload_ids]
+        if len(curr_placement_vectors) == 0:
+            curr_placement_vectors = None
+
+        return self.__get_request(
+            ordered_workload_ids + new_workload_ids, curr_placement_vectors, packed_placement, requested_cus)
+
+    def get_solution_cache(self):
+        return self.__cache
+
+    def set_solution_cache_path(self, path):
+        """
+        Loads the solutions persisted at the path for this CPU's topology and the installed solver, and persists every
+        new solution there, so the cache survives restarts.  Failing to use the file only disables persistence.
+        """
+        self.__close_cache_file()
+        try:
+            cache_file = SolutionCacheFile(path, get_cache_version(self.__cpu, self.__formulation))
+            cache_file.load(self.__cache)
+            self.__cache_file = cache_file
+        except:
+            log.exception("Failed to load the solution cache file: '{}', solutions will not be persisted".format(path))
+
+    def set_solution_table_dir(self, directory):
+        """
+        Loads the precomputed solution table for this CPU's topology from the directory, if one was shipped there.  The
+        table is consulted before the solver, so states it covers are never solved online.
+        """
+        path = get_solution_table_path(directory, self.__cpu)
+        if path is None:
+            log.info("No solution table applies to a CPU with a non-uniform topology")
+            return
+
+        self.__table = SolutionTable.load(path, get_cache_version(self.__cpu, self.__formulation))
+
+    def get_solution_table(self):
+        return self.__table
+
+    def __write_through(self, cache_key, placement, status):
+        if self.__cache_file is None:
+            return
+
+        try:
+            self.__cache_file.append(cache_key, placement, status)
+            if self.__cache_file.should_compact(self.__cache):
+                self.__cache_file.compact(self.__cache)
+        except:
+            log.exception("Failed to persist a solution to: '{}', solutions will no longer be persisted".format(
+                self.__cache_file.get_path()))
+            self.__close_cache_file()
+
+    def __close_cache_file(self):
+        if self.__cache_file is not None:
+            self.__cache_file.close()
+            self.__cache_file = None
+
+    def is_fast_free(self):
+        return self.__fast_free
+
+    def set_fast_free(self, fast_free):
+        self.__fast_free = fast_free
+
+    def get_formulation(self):
+        return self.__formulation
+
+    def set_formulation(self, formulation):
+        """
+        Drops the solutions of the previous formulation, cached, persisted or precomputed, so it should be set before
+        loading any.
+        """
+        if formulation == self.__formulation:
+            return
+
+        self.__formulation = formulation
+        self.__cache = SolutionCache()
+        self.__close_cache_file()
+        self.__table = None
+
+    def get_churn_penalty(self):
+        return self.__churn_penalty
+
+    def set_churn_penalty(self, churn_penalty):
+        self.__churn_penalty = churn_penalty
 
-        thread_id2workload_id = {}
-        for w_ind, v in enumerate(new_placement_vectors):
-            if ordered_workload_ids[w_ind] == workload_id:
-                continue
-            for i, e in enumerate(v):
-                if e == 1:
-                    thread_id2workload_id[tid_2order[i]] = ordered_workload_ids[w_ind]
-
-        self.__assign_new_mapping(thread_id2workload_id)
-        self.__workload_insertion_times.pop(workload_id)
-    
     def is_last_call_time_bound(self):
         return self.__last_call_time_bound
     
     def set_solver_max_runtime_secs(self, val):
         self.__solver_max_runtime_secs = val
+        self.__solver_budget.set_default_budget_secs(val)
+
+    def get_solver_budget(self):
+        return self.__solver_budget
 
     def set_cpu(self, cpu):
-        self.__cpu = cpu    
+        self.__cpu = cpu
+        self.__placement_memo = None    
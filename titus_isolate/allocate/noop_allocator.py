@@ -1,5 +1,6 @@
 from titus_isolate import log
 from titus_isolate.allocate.cpu_allocator import CpuAllocator
+from titus_isolate.allocate.placement_delta import PlacementDelta
 
 
 class NoopCpuAllocator(CpuAllocator):
@@ -12,6 +13,8 @@ class NoopCpuAllocator(CpuAllocator):
 
     def assign_threads(self, workload):
         log.info("Ignoring attempt to assign threads to workload: '{}'".format(workload.get_id()))
+        return PlacementDelta()
 
     def free_threads(self, workload_id):
         log.info("Ignoring attempt to free threads for workload: '{}'".format(workload_id))
+        return PlacementDelta()
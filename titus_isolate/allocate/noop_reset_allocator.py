@@ -1,5 +1,6 @@
 from titus_isolate import log
 from titus_isolate.allocate.cpu_allocator import CpuAllocator
+from titus_isolate.allocate.placement_delta import PlacementDelta
 from titus_isolate.cgroup.file_cgroup_manager import FileCgroupManager
 
 
@@ -24,7 +25,8 @@ class NoopResetCpuAllocator(CpuAllocator):
 
         log.info("Setting cpuset.cpus to ALL cpus: '{}' for workload: '{}'".format(thread_ids, workload.get_id()))
         self.__cgroup_manager.set_cpuset(workload.get_id(), thread_ids)
-        return []  # No threads assigned
+        return PlacementDelta()  # No threads assigned
 
     def free_threads(self, workload_id):
         log.info("Ignoring attempt to free threads for workload: '{}'".format(workload_id))
+        return PlacementDelta()
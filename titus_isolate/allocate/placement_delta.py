@@ -0,0 +1,114 @@
+def get_workload_thread_ids(cpu, workload_ids):
+    return {workload_id: [t.get_id() for t in cpu.get_workload_threads(workload_id)] for workload_id in workload_ids}
+
+
+def apply_thread_mapping(cpu, thread_id_to_workload_id):
+    """
+    Claims and frees only those threads whose workload differs from the given mapping.  Threads absent from the
+    mapping are freed.
+
+    :return: a PlacementDelta describing the change
+    """
+    changed_threads = []
+    for t in cpu.get_threads():
+        workload_id = thread_id_to_workload_id.get(t.get_id(), None)
+        if t.get_workload_id() != workload_id:
+            changed_threads.append((t, workload_id))
+
+    workload_ids = set()
+    for t, workload_id in changed_threads:
+        workload_ids.add(t.get_workload_id())
+        workload_ids.add(workload_id)
+    workload_ids.discard(None)
+
+    before = get_workload_thread_ids(cpu, workload_ids)
+    for t, workload_id in changed_threads:
+        if workload_id is None:
+            t.free()
+        else:
+            t.claim(workload_id)
+
+    return PlacementDelta(before, get_workload_thread_ids(cpu, workload_ids))
+
+
+def merge_deltas(deltas):
+    """
+    :return: a PlacementDelta describing the changes of the given deltas, made one after the other
+    """
+    before = {}
+    after = {}
+    for delta in deltas:
+        for workload_id in delta.get_workload_ids():
+            if workload_id not in before:
+                before[workload_id] = delta.get_previous_thread_ids(workload_id)
+            after[workload_id] = delta.get_thread_ids(workload_id)
+
+    return PlacementDelta(before, after)
+
+
+class PlacementDelta:
+    """
+    A PlacementDelta describes how one allocator call changed the static placement of workloads.
+
+    For every workload whose threads changed it records the thread ids held before and after the call.  A workload
+    with no threads before the call was added, one with no threads after it was removed, and any other was moved.
+    """
+
+    def __init__(self, before=None, after=None):
+        """
+        :param before: dictionary mapping workload ids to the thread ids they held before the change
+        :param after: dictionary mapping workload ids to the thread ids they hold after the change
+        """
+        if before is None:
+            before = {}
+        if after is None:
+            after = {}
+
+        self.__before = {}
+        self.__after = {}
+        for workload_id in set(before.keys()) | set(after.keys()):
+            before_thread_ids = set(before.get(workload_id, []))
+            after_thread_ids = set(after.get(workload_id, []))
+            if before_thread_ids != after_thread_ids:
+                self.__before[workload_id] = before_thread_ids
+                self.__after[workload_id] = after_thread_ids
+
+    def is_empty(self):
+        return len(self.__after) == 0
+
+    def get_workload_ids(self):
+        return set(self.__after.keys())
+
+    def get_added_workload_ids(self):
+        return set([w_id for w_id in self.__after.keys() if len(self.__before[w_id]) == 0])
+
+    def get_removed_workload_ids(self):
+        return set([w_id for w_id in self.__after.keys() if len(self.__after[w_id]) == 0])
+
+    def get_moved_workload_ids(self):
+        return self.get_workload_ids() - self.get_added_workload_ids() - self.get_removed_workload_ids()
+
+    def get_thread_ids(self, workload_id):
+        return sorted(self.__after.get(workload_id, []))
+
+    def get_previous_thread_ids(self, workload_id):
+        return sorted(self.__before.get(workload_id, []))
+
+    def get_added_thread_ids(self, workload_id):
+        return sorted(self.__after.get(workload_id, set()) - self.__before.get(workload_id, set()))
+
+    def get_removed_thread_ids(self, workload_id):
+        return sorted(self.__before.get(workload_id, set()) - self.__after.get(workload_id, set()))
+
+    def get_updates(self):
+        """
+        :return: dictionary mapping the ids of workloads which still hold threads, and whose threads changed, to their
+        new thread ids.  This is the same format as isolate.update.get_updates.
+        """
+        return {w_id: self.get_thread_ids(w_id) for w_id in self.__after.keys() if len(self.__after[w_id]) > 0}
+
+    def __str__(self):
+        return "added: {}, removed: {}, moved: {}".format(
+            sorted([str(w) for w in self.get_added_workload_ids()]),
+            sorted([str(w) for w in self.get_removed_workload_ids()]),
+            sorted([str(w) for w in self.get_moved_workload_ids()]))
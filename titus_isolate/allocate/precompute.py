@@ -0,0 +1,76 @@
+from collections import OrderedDict
+
+from titus_isolate import log
+from titus_isolate.allocate.core_integer_program import THREAD_FORMULATION
+from titus_isolate.allocate.integer_program_cpu_allocator import make_solver_request, solve_ip
+
+DEFAULT_REQUEST_SIZES = [1, 2, 4, 8, 16]
+DEFAULT_MAX_WORKLOADS = 4
+DEFAULT_MAX_SOLUTIONS = 5000
+DEFAULT_SOLVER_MAX_RUNTIME_SECS = 10
+
+
+def precompute_solutions(
+        cpu,
+        request_sizes=DEFAULT_REQUEST_SIZES,
+        max_workloads=DEFAULT_MAX_WORKLOADS,
+        max_solutions=DEFAULT_MAX_SOLUTIONS,
+        solver_max_runtime_secs=DEFAULT_SOLVER_MAX_RUNTIME_SECS,
+        incremental=True,
+        formulation=THREAD_FORMULATION,
+        map_function=map):
+    """
+    Solves the requests an IntegerProgramCpuAllocator is likely to make on a fresh host, keyed as it caches them.
+
+    States are enumerated breadth first from an empty CPU.  Each state is the placement the solver chose for the
+    previous request, so it is exactly the state the allocator reaches by the same sequence of requests.  From each
+    state a workload of each size is added, which leads to the states of the next level, or one of the placed workloads
+    is removed.  Every request of a level is independent of the others, so they are solved with the given map
+    function, e.g. that of a process pool.
+
+    :param cpu: a CPU of the topology shape to precompute solutions for
+    :param request_sizes: the thread counts of the workloads to add
+    :param max_workloads: the number of workloads to place, at most
+    :param max_solutions: the number of solutions to compute, at most
+    :param incremental: whether the allocator using the solutions solves incrementally
+    :param formulation: the integer program formulation of the allocator using the solutions
+    :return: a dict of cache keys to (placement, status)
+    """
+    thread_count = len(cpu.get_threads())
+    core_thread_counts = [[len(c.get_threads()) for c in p.get_cores()] for p in cpu.get_packages()]
+
+    solutions = {}
+    states = [([], None)]
+    for depth in range(max_workloads + 1):
+        # key --> (request, requested units, whether the request adds a workload)
+        requests = OrderedDict()
+        for requested_units, placement in states:
+            candidates = []
+            free_thread_count = thread_count - sum(requested_units)
+            for size in request_sizes:
+                if depth < max_workloads and size <= free_thread_count:
+                    candidates.append((requested_units + [size], True))
+            for row in range(len(requested_units)):
+                candidates.append((requested_units[:row] + [0] + requested_units[row + 1:], False))
+
+            for candidate_units, is_add in candidates:
+                request = make_solver_request(
+                    candidate_units, placement, core_thread_counts, solver_max_runtime_secs, incremental=incremental,
+                    formulation=formulation)
+                if request.get_key() not in solutions and request.get_key() not in requests:
+                    requests[request.get_key()] = (request, candidate_units, is_add)
+
+        requests = list(requests.items())[:max_solutions - len(solutions)]
+        if len(requests) == 0:
+            break
+
+        log.info("Solving {} requests with up to {} workloads placed".format(len(requests), depth))
+        results = map_function(solve_ip, [request.get_solver_args() for _, (request, _, _) in requests])
+
+        states = []
+        for (key, (request, requested_units, is_add)), (placement, status) in zip(requests, results):
+            solutions[key] = (placement, status)
+            if is_add:
+                states.append((requested_units, request.restore(placement)))
+
+    return solutions
@@ -0,0 +1,133 @@
+import numpy as np
+
+from titus_isolate.allocate.symmetry import is_uniform
+
+
+def restrict(requested_units, current_placement, core_thread_counts):
+    """
+    Restricts an integer program request to the packages which a change of workloads affects, so workloads elsewhere
+    keep their threads and are left out of the problem.
+
+    Workloads are changed if they have no current placement, i.e. they are being added, or if their requested units
+    differ from their current thread count, e.g. they are being removed.  The restriction starts from the packages of
+    the changed workloads and adds the package with the most free threads until the workloads within them fit.  It is
+    closed under the packages of every workload it touches, so no workload is split between the restricted problem and
+    the rest of the CPU.
+
+    :param requested_units: the number of threads requested by each workload
+    :param current_placement: the current placement vectors, or None
+    :param core_thread_counts: a list, per package, of the thread count of each of its cores
+    :return: a Restriction, or None if the request involves the whole CPU
+    """
+    if not is_uniform(core_thread_counts):
+        return None
+
+    package_count = len(core_thread_counts)
+    package_thread_count = sum(core_thread_counts[0])
+    thread_count = package_count * package_thread_count
+
+    if current_placement is None or len(current_placement) == 0:
+        placement = np.zeros((0, thread_count), dtype=np.int32)
+    else:
+        placement = np.asarray(current_placement, dtype=np.int32)
+    row_count = placement.shape[0]
+
+    # row_packages[row, package] = the number of threads of the row's workload on the package
+    row_packages = placement.reshape(row_count, package_count, package_thread_count).sum(axis=2)
+    free_thread_counts = package_thread_count - row_packages.sum(axis=0)
+
+    changed_rows = [row for row in range(len(requested_units))
+                    if row >= row_count or requested_units[row] != row_packages[row].sum()]
+    if len(changed_rows) == 0:
+        return None
+
+    packages = set()
+    for row in changed_rows:
+        if row < row_count:
+            packages.update(np.nonzero(row_packages[row])[0].tolist())
+
+    while True:
+        packages, rows = close(packages, row_packages)
+        rows = sorted(rows | set([row for row in changed_rows if row >= row_count]))
+        if sum([requested_units[row] for row in rows]) <= len(packages) * package_thread_count:
+            break
+
+        remaining_packages = [p for p in range(package_count) if p not in packages]
+        if len(remaining_packages) == 0:
+            return None
+        packages.add(max(remaining_packages, key=lambda p: (free_thread_counts[p], -p)))
+
+    if len(packages) == package_count:
+        return None
+
+    packages = sorted(packages)
+    slots = np.array([p * package_thread_count + t for p in packages for t in range(package_thread_count)])
+    return Restriction(requested_units, placement, rows, slots, [core_thread_counts[p] for p in packages])
+
+
+def close(packages, row_packages):
+    """
+    :return: the smallest superset of the packages holding every workload on any of them, and the rows of those
+    workloads
+    """
+    packages = set(packages)
+    while True:
+        rows = set([row for row in range(row_packages.shape[0]) if row_packages[row, sorted(packages)].sum() > 0])
+        closed_packages = set(packages)
+        for row in rows:
+            closed_packages.update(np.nonzero(row_packages[row])[0].tolist())
+
+        if closed_packages == packages:
+            return packages, rows
+        packages = closed_packages
+
+
+class Restriction:
+    """
+    A request restricted to some packages, with the mapping of its solutions back onto the whole CPU.
+    """
+
+    def __init__(self, requested_units, placement, rows, slots, core_thread_counts):
+        """
+        :param placement: the current placement vectors of the whole CPU
+        :param rows: the indices of the workloads of the restricted request
+        :param slots: the indices of the threads of the restricted request
+        """
+        self.__requested_units = requested_units
+        self.__placement = placement
+        self.__rows = rows
+        self.__slots = slots
+        self.__core_thread_counts = core_thread_counts
+
+    def get_requested_units(self):
+        return [self.__requested_units[row] for row in self.__rows]
+
+    def get_current_placement(self):
+        """
+        :return: the current placement vectors of the restricted workloads which have one, or None
+        """
+        current_rows = [row for row in self.__rows if row < self.__placement.shape[0]]
+        if len(current_rows) == 0:
+            return None
+
+        return self.__placement[np.ix_(current_rows, self.__slots)].tolist()
+
+    def get_core_thread_counts(self):
+        return self.__core_thread_counts
+
+    def get_thread_count(self):
+        return len(self.__slots)
+
+    def get_package_count(self):
+        return len(self.__core_thread_counts)
+
+    def restore(self, placement):
+        """
+        :param placement: placement vectors solving the restricted request
+        :return: the placement vectors of every workload on the whole CPU
+        """
+        restored = np.zeros((len(self.__requested_units), self.__placement.shape[1]), dtype=np.int32)
+        restored[:self.__placement.shape[0]] = self.__placement
+        restored[self.__rows] = 0
+        restored[np.ix_(self.__rows, self.__slots)] = np.asarray(placement, dtype=np.int32)
+        return restored.tolist()
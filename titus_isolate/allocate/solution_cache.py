@@ -0,0 +1,163 @@
+import struct
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+from titus_isolate.allocate.symmetry import Canonicalization, canonicalize
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+# Bookkeeping bytes charged per entry on top of its key and packed solution
+ENTRY_OVERHEAD_BYTES = 64
+
+HEADER_FORMAT = '<HHH'
+
+
+def pack_vectors(vectors, thread_count):
+    if len(vectors) == 0:
+        return b''
+
+    return np.packbits(np.asarray(vectors, dtype=np.uint8).reshape(len(vectors), thread_count), axis=1).tobytes()
+
+
+def unpack_vectors(packed, row_count, thread_count):
+    if row_count == 0:
+        return []
+
+    bits = np.unpackbits(np.frombuffer(packed, dtype=np.uint8).reshape(row_count, -1), axis=1)
+    return bits[:, :thread_count].astype(int).tolist()
+
+
+def get_solution_key(thread_count, requested_units, placement_row_count, packed_placement):
+    """
+    Encodes a solver request as compact bytes: a small header, the requested unit counts and the current placement
+    vectors packed one bit per thread.
+
+    :param thread_count: the number of threads on the CPU
+    :param requested_units: the number of threads requested by each workload
+    :param placement_row_count: the number of current placement vectors
+    :param packed_placement: the current placement vectors as packed by pack_vectors
+    """
+    header = struct.pack(HEADER_FORMAT, thread_count, len(requested_units), placement_row_count)
+    return header + array('H', requested_units).tobytes() + packed_placement
+
+
+def get_solver_request(thread_count, requested_units, current_placement, core_thread_counts, use_symmetry=True,
+                       packed_placement=None):
+    """
+    Prepares a request for the integer program solver as it is cached.
+
+    :param current_placement: the current placement vectors, or None
+    :param core_thread_counts: a list, per package, of the thread count of each of its cores
+    :param use_symmetry: whether to pose the request in its canonical form
+    :param packed_placement: the current placement vectors as packed by pack_vectors, when already known
+    :return: the Canonicalization of the request, and its cache key
+    """
+    if use_symmetry:
+        canonicalization = canonicalize(requested_units, current_placement, core_thread_counts)
+    else:
+        canonicalization = Canonicalization(requested_units, current_placement, None, None)
+
+    current_placement = canonicalization.get_current_placement()
+    if current_placement is None:
+        current_placement = []
+    if packed_placement is None or not canonicalization.is_identity():
+        packed_placement = pack_vectors(current_placement, thread_count)
+
+    key = get_solution_key(
+        thread_count, canonicalization.get_requested_units(), len(current_placement), packed_placement)
+    return canonicalization, key
+
+
+class SolutionCache:
+    """
+    A least recently used cache of integer program solutions.
+
+    It is bounded both by entry count and by the bytes held in keys and packed solutions, whichever is reached first.
+    Hits, misses and evictions are counted so the capacity can be tuned from metrics.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        if max_entries < 1:
+            raise ValueError("A solution cache must hold at least 1 entry.")
+
+        self.__max_entries = max_entries
+        self.__max_bytes = max_bytes
+        self.__entries = OrderedDict()
+        self.__size_bytes = 0
+
+        self.__hit_count = 0
+        self.__miss_count = 0
+        self.__eviction_count = 0
+
+    def get(self, key):
+        """
+        :return: the (placement, status) stored for the key, or None
+        """
+        entry = self.__entries.get(key, None)
+        if entry is None:
+            self.__miss_count += 1
+            return None
+
+        self.__entries.move_to_end(key)
+        self.__hit_count += 1
+
+        packed, row_count, thread_count, status = entry
+        return unpack_vectors(packed, row_count, thread_count), status
+
+    def put(self, key, placement, status):
+        thread_count = len(placement[0]) if len(placement) > 0 else 0
+        entry = (pack_vectors(placement, thread_count), len(placement), thread_count, status)
+
+        if key in self.__entries:
+            self.__size_bytes -= self.__get_entry_size(key, self.__entries.pop(key))
+
+        self.__entries[key] = entry
+        self.__size_bytes += self.__get_entry_size(key, entry)
+
+        while len(self.__entries) > self.__max_entries or \
+                (self.__size_bytes > self.__max_bytes and len(self.__entries) > 1):
+            evicted_key, evicted_entry = self.__entries.popitem(last=False)
+            self.__size_bytes -= self.__get_entry_size(evicted_key, evicted_entry)
+            self.__eviction_count += 1
+
+    def get_status(self, key):
+        """
+        :return: the status of the solution stored for the key, or None, without counting as use
+        """
+        entry = self.__entries.get(key, None)
+        return None if entry is None else entry[3]
+
+    def get_items(self):
+        """
+        :return: a list of (key, (placement, status)) from the least to the most recently used, without counting as use
+        """
+        return [(key, (unpack_vectors(packed, row_count, thread_count), status))
+                for key, (packed, row_count, thread_count, status) in self.__entries.items()]
+
+    def get_hit_count(self):
+        return self.__hit_count
+
+    def get_miss_count(self):
+        return self.__miss_count
+
+    def get_eviction_count(self):
+        return self.__eviction_count
+
+    def get_size_bytes(self):
+        return self.__size_bytes
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key):
+        """
+        Looks the key up without counting as use, a hit or a miss.
+        """
+        return key in self.__entries
+
+    @staticmethod
+    def __get_entry_size(key, entry):
+        return len(key) + len(entry[0]) + ENTRY_OVERHEAD_BYTES
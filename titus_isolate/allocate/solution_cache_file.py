@@ -0,0 +1,186 @@
+import hashlib
+import os
+import struct
+
+import titus_optimize.compute
+from titus_optimize.compute import IP_SOLUTION_OPTIMAL
+
+from titus_isolate import log
+from titus_isolate.allocate import core_integer_program
+from titus_isolate.allocate.core_integer_program import CORE_FORMULATION, THREAD_FORMULATION
+from titus_isolate.allocate.solution_cache import pack_vectors, unpack_vectors
+
+FORMAT_VERSION = 1
+MAGIC = b'TIIPSC'
+
+# key length, packed solution length, row count, thread count, status length
+RECORD_HEADER_FORMAT = '<IIHHB'
+RECORD_HEADER_SIZE = struct.calcsize(RECORD_HEADER_FORMAT)
+
+# Compact once the file holds this many more records than the cache it backs
+COMPACTION_SLACK_RECORDS = 1000
+
+
+def get_solver_version(formulation=THREAD_FORMULATION):
+    """
+    Identifies the solver by a hash of the module which implements it, so any change to the integer program, packaged
+    or not, invalidates persisted solutions.
+    """
+    module = core_integer_program if formulation == CORE_FORMULATION else titus_optimize.compute
+    with open(module.__file__, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=8).hexdigest()
+
+
+def get_cache_version(cpu, formulation=THREAD_FORMULATION):
+    """
+    :return: the version of persisted solutions for the CPU's topology shape and the installed solver, of the given
+    integer program formulation
+    """
+    shape = '|'.join([','.join([str(len(c.get_threads())) for c in p.get_cores()]) for p in cpu.get_packages()])
+    version = "format:{};solver:{};shape:{}".format(FORMAT_VERSION, get_solver_version(formulation), shape)
+    if formulation != THREAD_FORMULATION:
+        version += ";formulation:{}".format(formulation)
+    return version
+
+
+def get_header(version):
+    version = version.encode('utf-8')
+    return MAGIC + struct.pack('<H', len(version)) + version
+
+
+def get_record(key, placement, status):
+    thread_count = len(placement[0]) if len(placement) > 0 else 0
+    packed = pack_vectors(placement, thread_count)
+    status = status.encode('utf-8')
+    header = struct.pack(RECORD_HEADER_FORMAT, len(key), len(packed), len(placement), thread_count, len(status))
+    return header + key + packed + status
+
+
+def read_solutions(path, version):
+    """
+    :return: the (key, placement, status) records of the file, and whether it was intact and of the given version
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    header = get_header(version)
+    if not data.startswith(header):
+        log.info("Discarding solution file: '{}' written for another version".format(path))
+        return [], False
+
+    records = []
+    offset = len(header)
+    while offset + RECORD_HEADER_SIZE <= len(data):
+        key_size, packed_size, row_count, thread_count, status_size = \
+            struct.unpack_from(RECORD_HEADER_FORMAT, data, offset)
+        offset += RECORD_HEADER_SIZE
+
+        end = offset + key_size + packed_size + status_size
+        if end > len(data):
+            break
+
+        key = data[offset:offset + key_size]
+        offset += key_size
+        placement = unpack_vectors(data[offset:offset + packed_size], row_count, thread_count)
+        offset += packed_size
+        status = data[offset:end].decode('utf-8')
+        offset = end
+
+        records.append((key, placement, status))
+
+    return records, offset == len(data)
+
+
+def write_solutions(path, version, items):
+    """
+    Atomically replaces the file at the path with one holding the given (key, (placement, status)) items.
+    """
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(get_header(version))
+        for key, (placement, status) in items:
+            f.write(get_record(key, placement, status))
+    os.replace(temp_path, path)
+
+
+class SolutionCacheFile:
+    """
+    An append-only file of integer program solutions which lets a SolutionCache survive restarts.
+
+    The file starts with a header holding its version.  A file written for another topology shape or solver version is
+    discarded when loaded, so stale solutions are never reused.  Each put appends a record.  Once the file holds
+    many more records than the cache, e.g. because of evictions, it is compacted by atomically replacing it with the
+    cache's current entries.
+    """
+
+    def __init__(self, path, version):
+        self.__path = path
+        self.__version = version
+        self.__record_count = 0
+        self.__file = None
+
+    def get_path(self):
+        return self.__path
+
+    def get_record_count(self):
+        return self.__record_count
+
+    def load(self, cache):
+        """
+        Fills the cache with the solutions in the file, then opens it for appending.  A missing, stale or corrupted
+        file is replaced.
+        """
+        directory = os.path.dirname(self.__path)
+        if len(directory) > 0:
+            os.makedirs(directory, exist_ok=True)
+
+        records = []
+        intact = False
+        try:
+            records, intact = read_solutions(self.__path, self.__version)
+        except FileNotFoundError:
+            log.info("No solution cache file found at: '{}'".format(self.__path))
+        except:
+            log.exception("Failed to read solution cache file: '{}'".format(self.__path))
+
+        for key, placement, status in records:
+            cache.put(key, placement, status)
+        log.info("Loaded {} solutions from: '{}'".format(len(records), self.__path))
+
+        if intact:
+            self.__record_count = len(records)
+            self.__file = open(self.__path, 'ab')
+        else:
+            self.compact(cache)
+
+    def append(self, key, placement, status):
+        if self.__file is None:
+            return
+
+        self.__file.write(get_record(key, placement, status))
+        self.__file.flush()
+        self.__record_count += 1
+
+    def should_compact(self, cache):
+        return self.__record_count > 2 * len(cache) + COMPACTION_SLACK_RECORDS
+
+    def compact(self, cache):
+        """
+        Replaces the file with one holding only the cache's current optimal entries, solutions the solver was stopped
+        early on are not worth reusing after a restart.
+        """
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+        items = [(key, solution) for key, solution in cache.get_items() if solution[1] == IP_SOLUTION_OPTIMAL]
+        write_solutions(self.__path, self.__version, items)
+
+        self.__record_count = len(items)
+        self.__file = open(self.__path, 'ab')
+        log.info("Compacted solution cache file: '{}' to {} solutions".format(self.__path, self.__record_count))
+
+    def close(self):
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
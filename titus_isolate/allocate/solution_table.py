@@ -0,0 +1,96 @@
+import os
+
+from titus_isolate import log
+from titus_isolate.allocate.solution_cache_file import read_solutions, write_solutions
+from titus_isolate.allocate.symmetry import is_uniform
+
+SOLUTION_TABLE_SUFFIX = '.solutions'
+
+
+def get_solution_table_name(cpu):
+    """
+    :return: the name of the solution table for the CPU's topology shape, e.g. '2x24x2.solutions', or None if the
+    topology is not uniform
+    """
+    core_thread_counts = [[len(c.get_threads()) for c in p.get_cores()] for p in cpu.get_packages()]
+    if not is_uniform(core_thread_counts):
+        return None
+
+    return "{}x{}x{}{}".format(
+        len(core_thread_counts), len(core_thread_counts[0]), core_thread_counts[0][0], SOLUTION_TABLE_SUFFIX)
+
+
+def get_solution_table_path(directory, cpu):
+    name = get_solution_table_name(cpu)
+    if name is None:
+        return None
+
+    return os.path.join(directory, name)
+
+
+def write_solution_table(path, version, solutions):
+    """
+    :param solutions: a dict of cache keys to (placement, status)
+    """
+    directory = os.path.dirname(path)
+    if len(directory) > 0:
+        os.makedirs(directory, exist_ok=True)
+
+    write_solutions(path, version, sorted(solutions.items()))
+
+
+class SolutionTable:
+    """
+    A read-only table of integer program solutions computed offline for one topology shape.
+
+    Unlike the SolutionCache it is never evicted from, so every state it covers is served without solving.
+    """
+
+    def __init__(self, solutions):
+        self.__solutions = solutions
+        self.__hit_count = 0
+        self.__miss_count = 0
+
+    @staticmethod
+    def load(path, version):
+        """
+        :return: the table at the path, empty if it is missing, damaged or was computed for another version
+        """
+        try:
+            records, intact = read_solutions(path, version)
+        except FileNotFoundError:
+            log.info("No solution table found at: '{}'".format(path))
+            return SolutionTable({})
+        except:
+            log.exception("Failed to read solution table: '{}'".format(path))
+            return SolutionTable({})
+
+        if not intact:
+            log.warn("Solution table: '{}' is damaged or stale, ignoring it".format(path))
+            return SolutionTable({})
+
+        log.info("Loaded {} precomputed solutions from: '{}'".format(len(records), path))
+        return SolutionTable(dict([(key, (placement, status)) for key, placement, status in records]))
+
+    def get(self, key):
+        """
+        :return: (placement, status) or None
+        """
+        value = self.__solutions.get(key)
+        if value is None:
+            self.__miss_count += 1
+        else:
+            self.__hit_count += 1
+        return value
+
+    def get_hit_count(self):
+        return self.__hit_count
+
+    def get_miss_count(self):
+        return self.__miss_count
+
+    def __len__(self):
+        return len(self.__solutions)
+
+    def __contains__(self, key):
+        return key in self.__solutions
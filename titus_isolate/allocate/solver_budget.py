@@ -0,0 +1,189 @@
+from collections import deque
+
+import numpy as np
+
+from titus_isolate.allocate.core_integer_program import CORE_FORMULATION
+from titus_optimize.compute import IP_SOLUTION_TIME_BOUND
+
+# The number of recent solves kept per topology to fit the runtime model
+DEFAULT_HISTORY_LENGTH = 200
+# The number of optimal solves of a topology needed before its runtime is predicted
+DEFAULT_MIN_SAMPLES = 5
+# Solve times vary between problems of the same size, so solves get this many times their predicted runtime
+DEFAULT_BUDGET_MARGIN = 2.0
+DEFAULT_MIN_BUDGET_SECS = 0.1
+
+
+def get_problem_size(solver_args):
+    """
+    :return: the number of placement variables of the integer program posed by the solver arguments
+    """
+    requested_units, thread_count, _, _, _, formulation = solver_args
+    unit_count = thread_count // 2 if formulation == CORE_FORMULATION else thread_count
+    return max(1, len(requested_units) * unit_count)
+
+
+def get_topology(solver_args):
+    """
+    :return: the topology the solver arguments pose the integer program on, requests restricted to fewer packages have
+    their own
+    """
+    _, thread_count, package_count, _, _, formulation = solver_args
+    return thread_count, package_count, formulation
+
+
+def set_max_runtime_secs(solver_args, max_runtime_secs):
+    return solver_args[:4] + (max_runtime_secs,) + solver_args[5:]
+
+
+class RuntimeModel:
+    """
+    Predicts the time an optimal solve takes from the size of the problem, as a power law fitted by least squares on
+    recent optimal solves of one topology.  Time bound solves only bound the runtime from below, so they are left out
+    of the fit, but they measure the time spent outside of the solver's time limit, e.g. building the program.
+    """
+
+    def __init__(self, history_length=DEFAULT_HISTORY_LENGTH, min_samples=DEFAULT_MIN_SAMPLES):
+        self.__min_samples = min_samples
+        self.__optimal_samples = deque(maxlen=history_length)
+        self.__overheads = deque(maxlen=history_length)
+        self.__coefficients = None
+
+    def record(self, problem_size, duration_secs, max_runtime_secs, status):
+        if status == IP_SOLUTION_TIME_BOUND:
+            self.__overheads.append(max(0.0, duration_secs - max_runtime_secs))
+            return
+
+        self.__optimal_samples.append((problem_size, max(duration_secs, 1e-6)))
+        self.__coefficients = None
+
+    def predict(self, problem_size):
+        """
+        :return: the predicted runtime of an optimal solve, or None if too few solves were recorded
+        """
+        if len(self.__optimal_samples) < self.__min_samples:
+            return None
+
+        if self.__coefficients is None:
+            sizes, durations = zip(*self.__optimal_samples)
+            log_sizes = np.log(sizes)
+            log_durations = np.log(durations)
+            if len(set(sizes)) > 1:
+                self.__coefficients = tuple(np.polyfit(log_sizes, log_durations, 1))
+            else:
+                self.__coefficients = (0.0, float(np.mean(log_durations)))
+
+        slope, intercept = self.__coefficients
+        return float(np.exp(intercept + slope * np.log(problem_size)))
+
+    def get_overhead_secs(self):
+        """
+        :return: the median time time bound solves took beyond their time limit, 0 if none was recorded
+        """
+        if len(self.__overheads) == 0:
+            return 0.0
+        return float(np.median(self.__overheads))
+
+
+class SolverBudget:
+    """
+    Chooses the time limit of each integer program solve, so solves meet a latency SLO.
+
+    Without an SLO every solve gets the default budget.  With one, a solve gets its predicted runtime with a margin,
+    see RuntimeModel, within the SLO less the time solves take beyond their limit.  Small problems then give up early
+    when they unexpectedly stall, and large ones are cut at the SLO rather than at an arbitrary limit.
+    """
+
+    def __init__(self, default_budget_secs, slo_secs=None, min_budget_secs=DEFAULT_MIN_BUDGET_SECS,
+                 margin=DEFAULT_BUDGET_MARGIN, history_length=DEFAULT_HISTORY_LENGTH,
+                 min_samples=DEFAULT_MIN_SAMPLES):
+        """
+        :param default_budget_secs: the budget of solves without an SLO, or before their runtime can be predicted
+        :param slo_secs: the latency SLO of a solve, or None
+        """
+        self.__default_budget_secs = default_budget_secs
+        self.__slo_secs = slo_secs
+        self.__min_budget_secs = min_budget_secs
+        self.__margin = margin
+        self.__history_length = history_length
+        self.__min_samples = min_samples
+        self.__models = {}
+
+        self.__solve_count = 0
+        self.__slo_miss_count = 0
+        self.__recent_time_bound = deque(maxlen=history_length)
+        self.__last_budget_secs = None
+        self.__last_predicted_secs = None
+
+    def __get_model(self, solver_args):
+        topology = get_topology(solver_args)
+        if topology not in self.__models:
+            self.__models[topology] = RuntimeModel(self.__history_length, self.__min_samples)
+        return self.__models[topology]
+
+    def get_budget(self, solver_args):
+        """
+        :return: the time limit of a solve of the integer program posed by the solver arguments
+        """
+        if self.__slo_secs is None:
+            return self.__default_budget_secs
+
+        model = self.__get_model(solver_args)
+        max_budget_secs = max(self.__min_budget_secs, self.__slo_secs - model.get_overhead_secs())
+        predicted_secs = model.predict(get_problem_size(solver_args))
+        self.__last_predicted_secs = predicted_secs
+        if predicted_secs is None:
+            return min(self.__default_budget_secs, max_budget_secs)
+
+        return min(max(self.__margin * predicted_secs, self.__min_budget_secs), max_budget_secs)
+
+    def budget(self, solver_args):
+        """
+        :return: the solver arguments with the time limit chosen for them
+        """
+        self.__last_budget_secs = self.get_budget(solver_args)
+        return set_max_runtime_secs(solver_args, self.__last_budget_secs)
+
+    def record(self, solver_args, duration_secs, status):
+        """
+        Records a solve of the integer program posed by the solver arguments, with the time limit it was given.
+        """
+        max_runtime_secs = solver_args[4]
+        self.__get_model(solver_args).record(get_problem_size(solver_args), duration_secs, max_runtime_secs, status)
+
+        self.__solve_count += 1
+        self.__recent_time_bound.append(status == IP_SOLUTION_TIME_BOUND)
+        if self.__slo_secs is not None and duration_secs > self.__slo_secs:
+            self.__slo_miss_count += 1
+
+    def get_solve_count(self):
+        return self.__solve_count
+
+    def get_slo_miss_count(self):
+        return self.__slo_miss_count
+
+    def get_time_bound_ratio(self):
+        """
+        :return: the share of recent solves stopped by their time limit before proving their solution optimal
+        """
+        if len(self.__recent_time_bound) == 0:
+            return 0.0
+        return sum(self.__recent_time_bound) / len(self.__recent_time_bound)
+
+    def get_last_budget_secs(self):
+        return self.__last_budget_secs
+
+    def get_last_predicted_secs(self):
+        """
+        :return: the runtime predicted for the last solve, or None if it could not be predicted
+        """
+        return self.__last_predicted_secs
+
+    def get_slo_secs(self):
+        return self.__slo_secs
+
+    def set_slo_secs(self, slo_secs):
+        self.__slo_secs = slo_secs
+
+    def set_default_budget_secs(self, default_budget_secs):
+        self.__default_budget_secs = default_budget_secs
@@ -0,0 +1,123 @@
+import numpy as np
+
+
+def canonicalize(requested_units, current_placement, core_thread_counts):
+    """
+    Maps an integer program request onto a canonical representative of its symmetry class.
+
+    Requests which differ only by a permutation of packages, of cores within a package, of threads within a core or of
+    the order of placed workloads pose the same problem to the solver up to its tie breaking, so they share one
+    canonical form and therefore one cache entry.
+
+    :param requested_units: the number of threads requested by each workload
+    :param current_placement: the current placement vectors, or None
+    :param core_thread_counts: a list, per package, of the thread count of each of its cores
+    :return: a Canonicalization
+    """
+    if current_placement is None or len(current_placement) == 0 or not is_uniform(core_thread_counts):
+        return Canonicalization(requested_units, current_placement, None, None)
+
+    placement = np.asarray(current_placement, dtype=np.int32)
+    package_count = len(core_thread_counts)
+    core_count = len(core_thread_counts[0])
+    thread_count = core_thread_counts[0][0]
+
+    # Label each thread with the index of its workload, or -1 when free
+    row_count = placement.shape[0]
+    labels = np.full(placement.shape[1], -1, dtype=np.int32)
+    rows, slots = np.nonzero(placement)
+    labels[slots] = rows
+    labels = labels.reshape(package_count, core_count, thread_count)
+
+    # 1. Describe each workload by what is invariant under the permutations: its request and the shape of its footprint
+    row_signatures = []
+    for row in range(row_count):
+        core_counts = (labels == row).sum(axis=2)
+        row_signatures.append((
+            requested_units[row],
+            tuple(sorted(core_counts.sum(axis=1).tolist(), reverse=True)),
+            tuple(sorted(core_counts.flatten().tolist(), reverse=True))))
+
+    # 2. Sort threads within cores, cores within packages, then packages, by the signatures of their workloads
+    def get_thread_signature(label):
+        return row_signatures[label] if label >= 0 else ()
+
+    thread_orders = {}
+    for p_i in range(package_count):
+        for c_i in range(core_count):
+            core_labels = labels[p_i, c_i].tolist()
+            thread_orders[(p_i, c_i)] = sorted(
+                range(thread_count), key=lambda t_i: get_thread_signature(core_labels[t_i]))
+
+    def get_core_signature(p_i, c_i):
+        return tuple([get_thread_signature(labels[p_i, c_i, t_i]) for t_i in thread_orders[(p_i, c_i)]])
+
+    package_orders = []
+    for p_i in range(package_count):
+        core_signatures = [get_core_signature(p_i, c_i) for c_i in range(core_count)]
+        package_orders.append(sorted(range(core_count), key=lambda c_i: core_signatures[c_i]))
+
+    def get_package_signature(p_i):
+        return tuple([get_core_signature(p_i, c_i) for c_i in package_orders[p_i]])
+
+    package_order = sorted(range(package_count), key=get_package_signature)
+
+    # slot_order[canonical slot] = original slot
+    slot_order = np.array([
+        (p_i * core_count + c_i) * thread_count + t_i
+        for p_i in package_order
+        for c_i in package_orders[p_i]
+        for t_i in thread_orders[(p_i, c_i)]])
+
+    # 3. Order placed workloads by signature, breaking ties by where they now first appear
+    canonical_labels = labels.flatten()[slot_order]
+    first_slots = [int(np.argmax(canonical_labels == row)) for row in range(row_count)]
+    row_order = sorted(range(row_count), key=lambda row: (row_signatures[row], first_slots[row]))
+
+    canonical_requested_units = [requested_units[row] for row in row_order] + list(requested_units[row_count:])
+    canonical_placement = placement[row_order][:, slot_order].tolist()
+
+    return Canonicalization(canonical_requested_units, canonical_placement, row_order, slot_order)
+
+
+def is_uniform(core_thread_counts):
+    return len(set([len(counts) for counts in core_thread_counts])) == 1 and \
+        len(set([count for counts in core_thread_counts for count in counts])) == 1
+
+
+class Canonicalization:
+    """
+    A request in canonical form, with the permutations needed to map a solution of it back onto the real threads and
+    workloads.
+    """
+
+    def __init__(self, requested_units, current_placement, row_order, slot_order):
+        self.__requested_units = requested_units
+        self.__current_placement = current_placement
+        self.__row_order = row_order
+        self.__slot_order = slot_order
+
+    def get_requested_units(self):
+        return self.__requested_units
+
+    def get_current_placement(self):
+        return self.__current_placement
+
+    def is_identity(self):
+        return self.__row_order is None
+
+    def restore(self, placement):
+        """
+        :param placement: placement vectors solving the canonical request
+        :return: the placement vectors solving the original request
+        """
+        if self.is_identity():
+            return placement
+
+        canonical = np.asarray(placement, dtype=np.int32)
+        restored = np.zeros_like(canonical)
+
+        # Placed workloads were reordered, any others kept their position
+        row_order = self.__row_order + list(range(len(self.__row_order), canonical.shape[0]))
+        restored[np.ix_(row_order, self.__slot_order)] = canonical
+        return restored.tolist()
@@ -1,8 +1,9 @@
 import json
 
-from flask import Flask
+from flask import Flask, make_response, request
 
-from titus_isolate.isolate.detect import get_cross_package_violations, get_shared_core_violations
+from titus_isolate.isolate.detect import get_cross_package_violations, get_shared_core_violations, \
+    get_cross_llc_violations
 
 app = Flask(__name__)
 __workload_manager = None
@@ -27,8 +28,19 @@ def get_workloads():
 
 @app.route('/cpu')
 def get_cpu():
+    """
+    Serves the CPU with the placement fingerprint as its ETag, so pollers can revalidate with If-None-Match and
+    receive a 304 when nothing has moved.
+    """
+    snapshot = __workload_manager.get_cpu_snapshot()
+    response = make_response(__get_cpu_json(snapshot))
+    response.set_etag(format(snapshot.fingerprint(), '016x'))
+    return response.make_conditional(request)
+
+
+def __get_cpu_json(snapshot):
     packages = []
-    for p in __workload_manager.get_cpu().get_packages():
+    for p in snapshot.get_packages():
 
         cores = []
         for c in p.get_cores():
@@ -58,9 +70,11 @@ def get_cpu():
 
 @app.route('/violations')
 def get_violations():
+    cpu = __workload_manager.get_cpu_snapshot()
     return json.dumps({
-        "cross_package": get_cross_package_violations(__workload_manager.get_cpu()),
-        "shared_core": get_shared_core_violations(__workload_manager.get_cpu())
+        "cross_package": get_cross_package_violations(cpu),
+        "shared_core": get_shared_core_violations(cpu),
+        "cross_llc": get_cross_llc_violations(cpu)
     })
 
 
@@ -1,4 +1,6 @@
+from titus_isolate.allocate.best_fit_cpu_allocator import BestFitCpuAllocator
 from titus_isolate.allocate.greedy_cpu_allocator import GreedyCpuAllocator
+from titus_isolate.allocate.hierarchical_cpu_allocator import HierarchicalCpuAllocator
 from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator
 from titus_isolate.allocate.noop_allocator import NoopCpuAllocator
 from titus_isolate.allocate.noop_reset_allocator import NoopResetCpuAllocator
@@ -10,14 +12,18 @@ ALLOCATOR_KEY = 'TITUS_ISOLATE_ALLOCATOR'
 AB_TEST = 'AB_TEST'
 IP = 'IP'
 GREEDY = 'GREEDY'
+BEST_FIT = 'BEST_FIT'
+HIERARCHICAL = 'HIERARCHICAL'
 NOOP = 'NOOP'
 NOOP_RESET = 'NOOP_RESET'
 DEFAULT_ALLOCATOR = NOOP
-CPU_ALLOCATORS = [AB_TEST, IP, GREEDY, NOOP, NOOP_RESET]
+CPU_ALLOCATORS = [AB_TEST, IP, GREEDY, BEST_FIT, HIERARCHICAL, NOOP, NOOP_RESET]
 
 CPU_ALLOCATOR_NAME_TO_CLASS_MAP = {
     IP: IntegerProgramCpuAllocator,
     GREEDY: GreedyCpuAllocator,
+    BEST_FIT: BestFitCpuAllocator,
+    HIERARCHICAL: HierarchicalCpuAllocator,
     NOOP: NoopCpuAllocator,
     NOOP_RESET: NoopResetCpuAllocator,
 }
@@ -25,6 +31,38 @@ CPU_ALLOCATOR_NAME_TO_CLASS_MAP = {
 CPU_ALLOCATOR_A = 'CPU_ALLOCATOR_A'
 CPU_ALLOCATOR_B = 'CPU_ALLOCATOR_B'
 
+# Replay static workload events against this allocator on a copy of the CPU, to compare it with the live one
+SHADOW_ALLOCATOR_KEY = 'TITUS_ISOLATE_SHADOW_ALLOCATOR'
+
+# Place static workloads greedily, then upgrade them with the IP allocator in the background
+ANYTIME_ALLOCATION_KEY = 'TITUS_ISOLATE_ANYTIME_ALLOCATION'
+DEFAULT_ANYTIME_ALLOCATION = 'false'
+
+# Free workloads placed by the IP allocator without solving, and compact the placement in the background once degraded
+FAST_FREE_KEY = 'TITUS_ISOLATE_FAST_FREE'
+DEFAULT_FAST_FREE = 'false'
+
+# Solve the IP requests likely to be made next while no event is handled
+PRESOLVE_KEY = 'TITUS_ISOLATE_PRESOLVE'
+DEFAULT_PRESOLVE = 'false'
+
+# Solve the IP over every thread, or over cores and expand the solution to threads: 'thread' or 'core'
+IP_FORMULATION_KEY = 'TITUS_ISOLATE_IP_FORMULATION'
+DEFAULT_IP_FORMULATION = 'thread'
+
+# Choose the time limit of each IP solve so solves meet this latency SLO, in seconds, rather than using a fixed one
+IP_SOLVER_LATENCY_SLO_KEY = 'TITUS_ISOLATE_IP_SOLVER_LATENCY_SLO_SECS'
+
+# The isolation cost, in shared core violations, of moving one thread of a running workload
+CHURN_PENALTY_KEY = 'TITUS_ISOLATE_CHURN_PENALTY'
+DEFAULT_CHURN_PENALTY = '0.0'
+
+# Periodically move static workloads to a placement with better isolation while no events are handled
+REBALANCE_KEY = 'TITUS_ISOLATE_REBALANCE'
+DEFAULT_REBALANCE = 'false'
+REBALANCE_CHURN_BUDGET_KEY = 'TITUS_ISOLATE_REBALANCE_CHURN_BUDGET'
+DEFAULT_REBALANCE_CHURN_BUDGET = 8
+
 # CGROUP FILE
 WAIT_CGROUP_FILE_KEY = 'TITUS_ISOLATE_WAIT_CGROUP_FILE_SEC'
 DEFAULT_WAIT_CGROUP_FILE_SEC = 90
@@ -40,6 +78,15 @@ PROPERTIES = [
     ALLOCATOR_KEY,
     CPU_ALLOCATOR_A,
     CPU_ALLOCATOR_B,
+    SHADOW_ALLOCATOR_KEY,
+    ANYTIME_ALLOCATION_KEY,
+    FAST_FREE_KEY,
+    PRESOLVE_KEY,
+    IP_FORMULATION_KEY,
+    IP_SOLVER_LATENCY_SLO_KEY,
+    CHURN_PENALTY_KEY,
+    REBALANCE_KEY,
+    REBALANCE_CHURN_BUDGET_KEY,
     EC2_INSTANCE_ID,
     WAIT_CGROUP_FILE_KEY,
     WAIT_JSON_FILE_KEY]
@@ -12,16 +12,36 @@ class CreateEventHandler(EventHandler):
         if not self.__relevant(event):
             return
 
-        name = get_container_name(event)
-        cpus = get_cpu_count(event)
-        workload_type = get_workload_type(event)
-
-        workload = Workload(name, cpus, workload_type)
+        workload = self.__get_workload(event)
 
         self.handling_event(event, "adding workload: '{}'".format(workload.get_id()))
         self.workload_manager.add_workload(workload)
         self.handled_event(event, "added workload: '{}'".format(workload.get_id()))
 
+    def handle_batch(self, events):
+        """
+        Adds the workloads of all the relevant events together, e.g. during a storm of container creations.  Every
+        workload is parsed before any is added, so an unparsable event fails the batch without side effects.
+        """
+        events = [event for event in events if self.__relevant(event)]
+        workloads = [self.__get_workload(event) for event in events]
+        if len(workloads) == 0:
+            return
+
+        for event, workload in zip(events, workloads):
+            self.handling_event(event, "adding workload: '{}' in a batch".format(workload.get_id()))
+        self.workload_manager.add_workloads(workloads)
+        for event, workload in zip(events, workloads):
+            self.handled_event(event, "added workload: '{}' in a batch".format(workload.get_id()))
+
+    @staticmethod
+    def __get_workload(event):
+        name = get_container_name(event)
+        cpus = get_cpu_count(event)
+        workload_type = get_workload_type(event)
+
+        return Workload(name, cpus, workload_type)
+
     def __relevant(self, event):
         if not event[ACTION] == CREATE:
             self.ignored_event(event, "not a CREATE event")
@@ -30,3 +30,11 @@ class EventHandler:
     def handle(self, event):
         pass
 
+    def handle_batch(self, events):
+        """
+        Handles events which arrived together.  Handlers able to act on them at once should override this, by default
+        they are handled one after the other.
+        """
+        for event in events:
+            self.handle(event)
+
@@ -5,3 +5,8 @@ class EventLogger:
     @staticmethod
     def handle(event):
         log.info("event: '{}'".format(event))
+
+    @staticmethod
+    def handle_batch(events):
+        for event in events:
+            EventLogger.handle(event)
@@ -12,9 +12,18 @@ from titus_isolate.utils import get_config_manager
 
 DEFAULT_EVENT_TIMEOUT_SECS = 60
 
+# The number of queued events handled together, at most
+MAX_EVENT_BATCH_SIZE = 64
+
 
 class EventManager:
-    def __init__(self, event_iterable, event_handlers, file_manager=FileManager(), event_timeout=DEFAULT_EVENT_TIMEOUT_SECS):
+    def __init__(
+            self,
+            event_iterable,
+            event_handlers,
+            file_manager=FileManager(),
+            event_timeout=DEFAULT_EVENT_TIMEOUT_SECS,
+            max_batch_size=MAX_EVENT_BATCH_SIZE):
         self.__stopped = False
         self.__raw_q = Queue()
         self.__groomed_q = Queue()
@@ -23,6 +32,7 @@ class EventManager:
         self.__event_handlers = event_handlers
         self.__event_logger = EventLogger()
         self.__event_timeout = event_timeout
+        self.__max_batch_size = max_batch_size
 
         self.__file_manger = file_manager
 
@@ -102,15 +112,51 @@ class EventManager:
                 log.debug("Timed out waiting for event on queue.")
                 continue
 
-            for event_handler in self.__event_handlers:
+            # Take whatever else is already queued, so consecutive CREATE events are handled together
+            events = [event]
+            while len(events) < self.__max_batch_size:
+                try:
+                    events.append(self.__groomed_q.get_nowait())
+                except Empty:
+                    break
+
+            for batch in self.__get_batches(events):
+                self.__process_batch(batch)
+
+    @staticmethod
+    def __get_batches(events):
+        batches = []
+        for event in events:
+            if len(batches) > 0 and event[ACTION] == CREATE and batches[-1][-1][ACTION] == CREATE:
+                batches[-1].append(event)
+            else:
+                batches.append([event])
+        return batches
+
+    def __process_batch(self, events):
+        for event_handler in self.__event_handlers:
+            if len(events) > 1:
                 try:
-                    event_handler.handle(event)
-                    self.__success_event_count += 1
+                    event_handler.handle_batch(events)
+                    self.__success_event_count += len(events)
+                    continue
                 except:
-                    log.exception("Event handler: '{}' failed to handle event: '{}'".format(
-                        type(event_handler).__name__, event))
-                    self.__error_event_count += 1
+                    log.exception("Event handler: '{}' failed to handle a batch of {} events, handling them one at a "
+                                  "time".format(type(event_handler).__name__, len(events)))
 
+            for event in events:
+                self.__handle(event_handler, event)
+
+        for _ in events:
             self.__raw_q.task_done()
-            self.__processed_event_count += 1
-            log.debug("processed event count: {}".format(self.get_success_count()))
+        self.__processed_event_count += len(events)
+        log.debug("processed event count: {}".format(self.get_success_count()))
+
+    def __handle(self, event_handler, event):
+        try:
+            event_handler.handle(event)
+            self.__success_event_count += 1
+        except:
+            log.exception("Event handler: '{}' failed to handle event: '{}'".format(
+                type(event_handler).__name__, event))
+            self.__error_event_count += 1
@@ -1,6 +1,4 @@
-from functools import reduce
-
-from titus_isolate.model.processor.utils import get_packages_with_workload, get_workload_ids
+from titus_isolate.model.processor.utils import get_workload_ids
 
 
 def get_cross_package_violations(cpu):
@@ -15,13 +13,34 @@ def get_cross_package_violations(cpu):
     :param cpu: CPU to scan for cross package violations
     :return: dictionary mapping workload ids to lists of packages
     """
+    return cpu.get_occupancy_matrix().get_cross_package_violations()
+
+
+def get_cross_package_violation_count(cpu):
+    return cpu.get_occupancy_matrix().get_cross_package_violation_count()
+
+
+def get_cross_llc_violations(cpu):
+    """
+    Returns a dictionary mapping workload ids to lists of last level cache ids.  Only workloads on more than one last
+    level cache are included.  A CPU without last level cache information has no violations.
+
+    {
+       fa873f01-da52-45b4-b37b-edad0dfab519: [0, 1]
+    }
+
+    :param cpu: CPU to scan for cross last level cache violations
+    :return: dictionary mapping workload ids to lists of last level cache ids
+    """
     violations = {}
-    workload_ids = get_workload_ids(cpu)
+    llcs = cpu.get_llcs()
+    if len(llcs) < 2:
+        return violations
 
-    for workload_id in workload_ids:
-        packages = get_packages_with_workload(cpu, workload_id)
-        if len(packages) > 1:
-            violations[workload_id] = [p.get_id() for p in packages]
+    for workload_id in get_workload_ids(cpu):
+        llc_ids = [llc.get_id() for llc in llcs if llc.has_workload(workload_id)]
+        if len(llc_ids) > 1:
+            violations[workload_id] = llc_ids
 
     return violations
 
@@ -40,13 +59,8 @@ def get_shared_core_violations(cpu):
     :param cpu: CPU to scan for cross package violations
     :return: dictionary mapping core ids to lists of workload ids
     """
-    violations = {}
+    return cpu.get_occupancy_matrix().get_shared_core_violations()
 
-    for package in cpu.get_packages():
-        for core in package.get_cores():
-            unique_workload_ids = set([t.get_workload_id() for t in core.get_threads() if t.is_claimed()])
-            if len(unique_workload_ids) > 1:
-                violation_key = ':'.join([str(package.get_id()), str(core.get_id())])
-                violations[violation_key] = list(unique_workload_ids)
 
-    return violations
+def get_shared_core_violation_count(cpu):
+    return cpu.get_occupancy_matrix().get_shared_core_violation_count()
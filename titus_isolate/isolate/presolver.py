@@ -0,0 +1,124 @@
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import schedule
+
+from titus_isolate import log
+from titus_isolate.allocate.integer_program_cpu_allocator import solve_ip
+
+DEFAULT_PRESOLVE_INTERVAL_SEC = 1
+DEFAULT_PRESOLVE_THREAD_COUNTS = [1, 2, 4, 8]
+DEFAULT_MAX_PRESOLVED_SIZES = 4
+DEFAULT_MAX_PRESOLVED_FREES = 8
+
+# Presolving yields the CPU to everything else on the host
+PRESOLVE_NICENESS = 19
+
+
+def lower_priority():
+    os.nice(PRESOLVE_NICENESS)
+
+
+def get_likely_thread_counts(
+        recent_thread_counts,
+        max_count=DEFAULT_MAX_PRESOLVED_SIZES,
+        default_thread_counts=DEFAULT_PRESOLVE_THREAD_COUNTS):
+    """
+    :param recent_thread_counts: the thread counts of recently added workloads
+    :return: the most frequent of the recent thread counts, then the default ones, at most max_count of them
+    """
+    thread_counts = [count for count, _ in Counter(recent_thread_counts).most_common() if count > 0]
+    thread_counts += [count for count in default_thread_counts if count not in thread_counts]
+    return thread_counts[:max_count]
+
+
+class Presolver:
+    """
+    Solves the integer program requests the next events are likely to make while no event is handled, so those
+    events find their solution in the cache rather than solving it on the critical path.
+
+    The likely events are the addition of a workload of one of the sizes most frequently added recently, and the
+    removal of any running workload.  Requests are solved one at a time in a worker process of the lowest priority,
+    and only while the event queue is empty.
+    """
+
+    def __init__(
+            self,
+            workload_manager,
+            event_manager,
+            executor=None,
+            presolve_interval=DEFAULT_PRESOLVE_INTERVAL_SEC,
+            max_sizes=DEFAULT_MAX_PRESOLVED_SIZES,
+            max_frees=DEFAULT_MAX_PRESOLVED_FREES):
+        """
+        :param executor: the executor solving requests, by default a single worker process of the lowest priority
+        :param max_sizes: the most workload sizes to presolve adding
+        :param max_frees: the most running workloads to presolve removing
+        """
+        self.__workload_manager = workload_manager
+        self.__event_manager = event_manager
+        self.__executor = executor
+        self.__max_sizes = max_sizes
+        self.__max_frees = max_frees
+
+        self.__in_flight = False
+        self.__solved_state = None
+        self.__skipped_count = 0
+
+        schedule.every(presolve_interval).seconds.do(self.presolve)
+
+    def presolve(self):
+        """
+        :return: True if a request was submitted to be solved, False otherwise
+        """
+        try:
+            if self.__in_flight:
+                return False
+
+            if self.__event_manager.get_queue_depth() > 0:
+                log.debug("Not presolving while events are queued")
+                self.__skipped_count += 1
+                return False
+
+            thread_counts = get_likely_thread_counts(self.__workload_manager.get_recent_request_sizes(),
+                                                     self.__max_sizes)
+
+            # Every likely request was solved already if neither the placement nor the likely sizes changed since
+            state = (self.__workload_manager.get_cpu_snapshot().fingerprint(), tuple(thread_counts))
+            if state == self.__solved_state:
+                return False
+
+            requests = self.__workload_manager.get_presolve_requests(thread_counts, self.__max_frees)
+            if len(requests) == 0:
+                self.__solved_state = state
+                return False
+
+            request = requests[0]
+            if self.__executor is None:
+                self.__executor = ProcessPoolExecutor(max_workers=1, initializer=lower_priority)
+            self.__in_flight = True
+            future = self.__executor.submit(solve_ip, request.get_solver_args())
+        except:
+            log.exception("Failed to presolve a likely request")
+            self.__in_flight = False
+            return False
+
+        future.add_done_callback(lambda f: self.__complete(request, f))
+        return True
+
+    def __complete(self, request, future):
+        try:
+            placement, status = future.result()
+            self.__workload_manager.put_presolved_solution(request, placement, status)
+        except:
+            log.exception("Failed to complete a presolved request")
+            self.__in_flight = False
+            return
+
+        self.__in_flight = False
+        # Keep going while events are not queued, rather than waiting for the next check
+        self.presolve()
+
+    def get_skipped_count(self):
+        return self.__skipped_count
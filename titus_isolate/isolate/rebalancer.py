@@ -0,0 +1,129 @@
+import time
+
+import schedule
+
+from titus_isolate import log
+from titus_isolate.allocate.best_fit_cpu_allocator import BestFitCpuAllocator
+from titus_isolate.allocate.churn import get_moved_thread_count, minimize_churn
+from titus_isolate.docker.constants import STATIC
+from titus_isolate.isolate.balance import has_better_isolation
+from titus_isolate.model.processor.config import get_empty_cpu
+from titus_isolate.model.workload import Workload
+
+DEFAULT_REBALANCE_INTERVAL_SEC = 60
+DEFAULT_MIN_REBALANCE_INTERVAL_SEC = 300
+DEFAULT_REBALANCE_CHURN_BUDGET = 8
+
+
+def get_candidate_placement(cpu, allocator_class=BestFitCpuAllocator):
+    """
+    Places the static workloads of the CPU from scratch, then relabels the placement to keep as many of their threads
+    in place as possible.
+
+    :param cpu: the CPU to rebalance, which is not modified, e.g. a snapshot
+    :return: a dict of thread ids to workload ids
+    """
+    workload_ids_to_thread_ids = cpu.get_workload_ids_to_thread_ids()
+    workloads = [Workload(w_id, len(t_ids), STATIC) for w_id, t_ids in sorted(
+        workload_ids_to_thread_ids.items(), key=lambda item: str(item[0]))]
+
+    empty_cpu = get_empty_cpu(cpu)
+    allocator_class(empty_cpu).assign_threads_batch(workloads)
+    thread_id_to_workload_id = {t.get_id(): t.get_workload_id() for t in empty_cpu.get_claimed_threads()}
+    return minimize_churn(cpu, thread_id_to_workload_id)
+
+
+class Rebalancer:
+    """
+    Periodically looks for a placement of the static workloads with better isolation than the current one, which
+    degrades as workloads come and go, and applies it.
+
+    A candidate placement is computed from the workload manager's published snapshot, without holding its lock, and
+    only when the event queue has been idle since the previous check.  It is applied only if it has strictly better
+    isolation and moves at most churn_budget threads of running workloads, and at most once per min_rebalance_interval
+    seconds, so rebalancing never competes with event handling.
+    """
+
+    def __init__(
+            self,
+            workload_manager,
+            event_manager,
+            allocator_class=BestFitCpuAllocator,
+            churn_budget=DEFAULT_REBALANCE_CHURN_BUDGET,
+            rebalance_interval=DEFAULT_REBALANCE_INTERVAL_SEC,
+            min_rebalance_interval=DEFAULT_MIN_REBALANCE_INTERVAL_SEC):
+        """
+        :param allocator_class: the allocator placing candidate placements from scratch
+        :param churn_budget: the most threads of running workloads a rebalance may move
+        """
+        self.__workload_manager = workload_manager
+        self.__event_manager = event_manager
+        self.__allocator_class = allocator_class
+        self.__churn_budget = churn_budget
+        self.__min_rebalance_interval = min_rebalance_interval
+
+        self.__last_processed_count = None
+        self.__last_rebalance_time = None
+        self.__skipped_count = 0
+        self.__rejected_count = 0
+
+        schedule.every(rebalance_interval).seconds.do(self.rebalance)
+
+    def rebalance(self):
+        """
+        :return: True if a rebalanced placement was applied, False otherwise
+        """
+        try:
+            if not self.__is_idle():
+                log.debug("Not rebalancing while events are being handled")
+                self.__skipped_count += 1
+                return False
+
+            if self.__last_rebalance_time is not None and \
+                    time.time() - self.__last_rebalance_time < self.__min_rebalance_interval:
+                log.debug("Not rebalancing, the last rebalance was less than {} seconds ago".format(
+                    self.__min_rebalance_interval))
+                self.__skipped_count += 1
+                return False
+
+            return self.__rebalance()
+        except:
+            log.exception("Failed to rebalance")
+            return False
+
+    def __is_idle(self):
+        processed_count = self.__event_manager.get_processed_count()
+        idle = self.__event_manager.get_queue_depth() == 0 and processed_count == self.__last_processed_count
+        self.__last_processed_count = processed_count
+        return idle
+
+    def __rebalance(self):
+        cpu = self.__workload_manager.get_cpu_snapshot()
+        if len(cpu.get_claimed_threads()) == 0:
+            return False
+
+        candidate = get_candidate_placement(cpu, self.__allocator_class)
+        if not has_better_isolation(cpu, cpu.remap(candidate)):
+            log.debug("Not rebalancing, no placement with better isolation was found")
+            self.__rejected_count += 1
+            return False
+
+        moved_thread_count = get_moved_thread_count(cpu, candidate)
+        if moved_thread_count > self.__churn_budget:
+            log.info("Not rebalancing, a placement with better isolation moves {} threads, more than the budget of "
+                     "{}".format(moved_thread_count, self.__churn_budget))
+            self.__rejected_count += 1
+            return False
+
+        log.info("Rebalancing static workloads, moving {} threads".format(moved_thread_count))
+        if not self.__workload_manager.rebalance(cpu.fingerprint(), candidate):
+            return False
+
+        self.__last_rebalance_time = time.time()
+        return True
+
+    def get_skipped_count(self):
+        return self.__skipped_count
+
+    def get_rejected_count(self):
+        return self.__rejected_count
@@ -0,0 +1,223 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
+import uuid
+
+from titus_isolate import log
+from titus_isolate.allocate.churn import get_churn
+from titus_isolate.isolate.detect import get_cross_package_violation_count, get_shared_core_violation_count
+from titus_isolate.model.processor.config import get_empty_cpu
+
+LIVE = 'live'
+SHADOW = 'shadow'
+
+# Shadow allocators compete with the live one for the host's CPUs, so they replay at the lowest priority
+SHADOW_NICENESS = 19
+
+# The shadow allocators replaying in this process, by the id of their evaluator
+__shadow_allocators = {}
+
+
+def lower_priority():
+    os.nice(SHADOW_NICENESS)
+
+
+def get_call_record(duration_secs, delta, cpu):
+    """
+    :return: the record of an allocator call which took the duration, made the PlacementDelta and left the CPU, see
+    AllocatorStats
+    """
+    moved_workload_count, moved_thread_count = get_churn(delta)
+    return duration_secs, moved_workload_count, moved_thread_count, get_cross_package_violation_count(cpu), \
+        get_shared_core_violation_count(cpu)
+
+
+def reset_shadow_allocator(evaluator_id, allocator_class, cpu):
+    """
+    Creates the shadow allocator of the evaluator, on a copy of the CPU.
+
+    :return: a snapshot of the shadow CPU
+    """
+    shadow_cpu = get_empty_cpu(cpu)
+    threads = {t.get_id(): t for t in shadow_cpu.get_threads()}
+    for t in cpu.get_claimed_threads():
+        threads[t.get_id()].claim(t.get_workload_id())
+
+    __shadow_allocators[evaluator_id] = allocator_class(shadow_cpu)
+    return shadow_cpu.snapshot()
+
+
+def replay_shadow_call(evaluator_id, allocator_class, initial_cpu, func_name, args, live_cpu, live_duration_secs,
+                       live_delta):
+    """
+    Makes an allocator call to the shadow allocator of the evaluator, in the process replaying it.  It is a module level
+    function so it can be run in a process pool.  The shadow allocator is created from the initial CPU on the first
+    call.  When it fails, or was lost with the process which held it, it is reset to the live placement.
+
+    :return: the records of the live and shadow calls, the latter None if the shadow call failed, a snapshot of the
+    shadow CPU and whether the shadow allocator was reset
+    """
+    live_record = get_call_record(live_duration_secs, live_delta, live_cpu)
+    if evaluator_id not in __shadow_allocators and initial_cpu is not None:
+        reset_shadow_allocator(evaluator_id, allocator_class, initial_cpu)
+
+    try:
+        allocator = __shadow_allocators[evaluator_id]
+        start_time = time.time()
+        delta = getattr(allocator, func_name)(*args)
+        duration_secs = time.time() - start_time
+        return live_record, get_call_record(duration_secs, delta, allocator.get_cpu()), \
+            allocator.get_cpu().snapshot(), False
+    except:
+        log.exception("Shadow allocator: '{}' failed to replay func: {}, resetting it to the live placement".format(
+            allocator_class.__name__, func_name))
+        return live_record, None, reset_shadow_allocator(evaluator_id, allocator_class, live_cpu), True
+
+
+class AllocatorStats:
+    """
+    Accumulates the decision latency and churn of the allocator calls made for a stream of events, and the isolation
+    violations of the placement left by the last one.
+    """
+
+    def __init__(self):
+        self.__call_count = 0
+        self.__call_duration_sum_secs = 0
+        self.__max_call_duration_secs = 0
+        self.__moved_workload_count = 0
+        self.__moved_thread_count = 0
+        self.__cross_package_violation_count = 0
+        self.__shared_core_violation_count = 0
+        self.__error_count = 0
+
+    def record(self, call_record):
+        """
+        :param call_record: the record of an allocator call, see get_call_record
+        """
+        duration_secs, moved_workload_count, moved_thread_count, cross_package_violation_count, \
+            shared_core_violation_count = call_record
+        self.__call_count += 1
+        self.__call_duration_sum_secs += duration_secs
+        self.__max_call_duration_secs = max(self.__max_call_duration_secs, duration_secs)
+        self.__moved_workload_count += moved_workload_count
+        self.__moved_thread_count += moved_thread_count
+        self.__cross_package_violation_count = cross_package_violation_count
+        self.__shared_core_violation_count = shared_core_violation_count
+
+    def record_error(self):
+        self.__error_count += 1
+
+    def get_call_count(self):
+        return self.__call_count
+
+    def get_call_duration_sum_secs(self):
+        return self.__call_duration_sum_secs
+
+    def get_max_call_duration_secs(self):
+        return self.__max_call_duration_secs
+
+    def get_moved_workload_count(self):
+        return self.__moved_workload_count
+
+    def get_moved_thread_count(self):
+        return self.__moved_thread_count
+
+    def get_cross_package_violation_count(self):
+        return self.__cross_package_violation_count
+
+    def get_shared_core_violation_count(self):
+        return self.__shared_core_violation_count
+
+    def get_error_count(self):
+        return self.__error_count
+
+
+class ShadowEvaluator:
+    """
+    Replays the static workload adds and removes handled by the live allocator against a shadow allocator, which
+    places them on its own copy of the CPU.  Both allocators' decision latency, churn and isolation violations are
+    recorded side by side, so allocators can be compared on the same event stream without switching hosts over.
+
+    Replays run one at a time, in order, in a separate worker process at the lowest priority, so the live allocator
+    never waits on the shadow one, nor competes with it for the interpreter lock.  The shadow's latency still includes
+    contention for the host's CPUs.  The live allocator's results are recorded by that worker too.  When the shadow
+    allocator fails, its copy of the CPU is reset to the live placement, so later events are still compared from the
+    same starting point.
+    """
+
+    def __init__(self, cpu, allocator_class, executor=None):
+        """
+        :param cpu: the live CPU, whose placement the shadow one starts from
+        :param executor: the executor replaying events, by default a single worker process at low priority
+        """
+        self.__id = str(uuid.uuid4())
+        self.__allocator_class = allocator_class
+        self.__executor = executor
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(max_workers=1, initializer=lower_priority)
+
+        self.__live_stats = AllocatorStats()
+        self.__shadow_stats = AllocatorStats()
+        self.__initial_cpu = cpu.snapshot()
+        self.__shadow_cpu = self.__initial_cpu
+        self.__reset_count = 1
+        log.info("Created shadow evaluator with allocator: '{}'".format(allocator_class.__name__))
+
+    def replay(self, func_name, args, live_cpu, live_duration_secs, live_delta):
+        """
+        Makes the same allocator call as the live allocator to the shadow allocator in the background, and records
+        both once it completes.
+
+        :param func_name: the name of the allocator function called, e.g. 'assign_threads'
+        :param args: the arguments it was called with
+        :param live_cpu: a snapshot of the live CPU after the call
+        :param live_delta: the PlacementDelta returned by the live allocator
+        :return: the future of the replay
+        """
+        # Only the first replay creates the shadow allocator
+        initial_cpu = self.__initial_cpu
+        self.__initial_cpu = None
+
+        future = self.__executor.submit(
+            replay_shadow_call, self.__id, self.__allocator_class, initial_cpu, func_name, args, live_cpu,
+            live_duration_secs, live_delta)
+        future.add_done_callback(lambda f: self.__record(func_name, f))
+        return future
+
+    def __record(self, func_name, future):
+        try:
+            live_record, shadow_record, shadow_cpu, reset = future.result()
+        except:
+            log.exception("Failed to replay func: {} against shadow allocator: '{}'".format(
+                func_name, self.__allocator_class.__name__))
+            self.__shadow_stats.record_error()
+            return
+
+        self.__live_stats.record(live_record)
+        self.__shadow_cpu = shadow_cpu
+        if reset:
+            self.__shadow_stats.record_error()
+            self.__reset_count += 1
+        else:
+            self.__shadow_stats.record(shadow_record)
+
+    def get_allocator_name(self):
+        return self.__allocator_class.__name__
+
+    def get_live_stats(self):
+        return self.__live_stats
+
+    def get_shadow_stats(self):
+        return self.__shadow_stats
+
+    def get_shadow_cpu(self):
+        """
+        :return: a snapshot of the shadow CPU after the last replay
+        """
+        return self.__shadow_cpu
+
+    def get_reset_count(self):
+        """
+        :return: the number of times the shadow CPU was reset to the live placement, including at creation
+        """
+        return self.__reset_count
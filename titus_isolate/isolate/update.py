@@ -1,10 +1,11 @@
 from titus_isolate import log
+from titus_isolate.model.processor.snapshot import CpuSnapshot
 from titus_isolate.model.processor.utils import get_workload_ids
 
 
 def get_updates(cur_cpu, new_cpu):
     updates = {}
-    for workload_id in get_workload_ids(new_cpu):
+    for workload_id in __get_candidate_workload_ids(cur_cpu, new_cpu):
         new_thread_ids = __get_threads(new_cpu, workload_id)
         cur_thread_ids = __get_threads(cur_cpu, workload_id)
         if set(new_thread_ids) != set(cur_thread_ids):
@@ -14,5 +15,15 @@ def get_updates(cur_cpu, new_cpu):
     return updates
 
 
+def __get_candidate_workload_ids(cur_cpu, new_cpu):
+    workload_ids = get_workload_ids(new_cpu)
+
+    # Snapshots share every unchanged core, so only workloads on changed cores need to be compared.
+    if isinstance(cur_cpu, CpuSnapshot) and isinstance(new_cpu, CpuSnapshot):
+        workload_ids = workload_ids & new_cpu.get_changed_workload_ids(cur_cpu)
+
+    return workload_ids
+
+
 def __get_threads(cpu, workload_id):
-    return [t.get_id() for t in cpu.get_threads() if t.get_workload_id() == workload_id]
+    return [t.get_id() for t in cpu.get_workload_threads(workload_id)]
@@ -2,7 +2,7 @@ import datetime
 
 from titus_isolate import log
 from titus_isolate.config.constants import ALLOCATOR_KEY, CPU_ALLOCATORS, DEFAULT_ALLOCATOR, \
-    CPU_ALLOCATOR_A, CPU_ALLOCATOR_B, AB_TEST, EC2_INSTANCE_ID, CPU_ALLOCATOR_NAME_TO_CLASS_MAP
+    CPU_ALLOCATOR_A, CPU_ALLOCATOR_B, AB_TEST, EC2_INSTANCE_ID, CPU_ALLOCATOR_NAME_TO_CLASS_MAP, SHADOW_ALLOCATOR_KEY
 from titus_isolate.docker.constants import BURST, STATIC
 
 BUCKETS = ["A", "B"]
@@ -32,6 +32,21 @@ def get_allocator_class(config_manager, hour=None):
         return __get_allocator_class(alloc_str)
 
 
+def get_shadow_allocator_class(config_manager):
+    """
+    :return: the class of the allocator to replay events against alongside the live one, or None if there is none
+    """
+    alloc_str = config_manager.get(SHADOW_ALLOCATOR_KEY)
+    if alloc_str is None:
+        return None
+
+    if alloc_str not in CPU_ALLOCATOR_NAME_TO_CLASS_MAP:
+        log.error("Unexpected shadow CPU allocator specified: '{}', not shadowing".format(alloc_str))
+        return None
+
+    return CPU_ALLOCATOR_NAME_TO_CLASS_MAP[alloc_str]
+
+
 def __get_allocator_class(allocator_str):
     if allocator_str not in CPU_ALLOCATORS:
         log.error("Unexpected CPU allocator specified: '{}', falling back to default: '{}'".format(allocator_str, DEFAULT_ALLOCATOR))
@@ -1,19 +1,56 @@
-import copy
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from threading import Lock
 import time
 
 from titus_isolate import log
-from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator
+from titus_isolate.allocate.churn import get_churn, get_isolation_cost
+from titus_isolate.allocate.placement_delta import apply_thread_mapping
+from titus_isolate.allocate.integer_program_cpu_allocator import IntegerProgramCpuAllocator, solve_ip
 from titus_isolate.allocate.greedy_cpu_allocator import GreedyCpuAllocator
+from titus_isolate.allocate.hierarchical_cpu_allocator import HierarchicalCpuAllocator
 from titus_isolate.docker.constants import STATIC, BURST
+from titus_isolate.isolate.balance import has_better_isolation
+from titus_isolate.isolate.shadow import ShadowEvaluator
 from titus_isolate.isolate.update import get_updates
-from titus_isolate.isolate.utils import get_burst_workloads
+from titus_isolate.isolate.utils import get_burst_workloads, get_static_workloads
+from titus_isolate.model.workload import Workload
+
+DEFAULT_UPGRADE_DEADLINE_SECS = 5
+
+# The number of recent static workload sizes kept to predict the next ones
+REQUEST_SIZE_HISTORY_LENGTH = 100
+# The id of the hypothetical workloads presolved requests are made for
+PRESOLVE_WORKLOAD_ID = 'presolve'
+
+# Compact once the isolation cost reaches that of one cross package violation, see get_isolation_cost
+DEFAULT_COMPACTION_VIOLATION_THRESHOLD = 10.0
 
 
 class WorkloadManager:
     def __init__(self, cpu, cgroup_manager,
             allocator_class=IntegerProgramCpuAllocator,
-            fallback_allocator_class=GreedyCpuAllocator):
+            fallback_allocator_class=GreedyCpuAllocator,
+            anytime=False,
+            upgrade_executor=None,
+            upgrade_deadline_secs=DEFAULT_UPGRADE_DEADLINE_SECS,
+            shadow_allocator_class=None,
+            shadow_executor=None,
+            fast_free=False,
+            compaction_violation_threshold=DEFAULT_COMPACTION_VIOLATION_THRESHOLD):
+        """
+        :param anytime: when the integer program allocator is used, place static workloads greedily right away and
+        upgrade the placement with the integer program solved in a worker process, rather than solving it under the
+        lock
+        :param upgrade_executor: the executor solving upgrades, by default a single worker process
+        :param upgrade_deadline_secs: upgrades solved later than this after they were requested are discarded
+        :param shadow_allocator_class: if set, static workload adds and removes are replayed against an allocator of
+        this class on a copy of the CPU, to compare it with the live allocator
+        :param shadow_executor: the executor replaying them, by default a single worker process at low priority
+        :param fast_free: when the integer program allocator is used without anytime, free workloads by releasing
+        their threads rather than solving under the lock.  The placement left is compacted with the integer program
+        solved by the upgrade executor, only once its isolation cost reaches the given threshold.
+        """
         self.__lock = Lock()
 
         self.__error_count = 0
@@ -22,8 +59,12 @@ class WorkloadManager:
         self.__allocator_call_duration_sum_secs = 0
         self.__fallback_allocator_calls_count = 0
         self.__time_bound_ip_allocator_solution_count = 0
+        self.__moved_workload_count = 0
+        self.__moved_thread_count = 0
 
         self.__cpu = cpu
+        self.__cpu_snapshot = cpu.snapshot()
+        self.__cpu_snapshot_source = cpu
         self.__cgroup_manager = cgroup_manager
         self.__workloads = {}
         self.__cpu_allocator = allocator_class(cpu)
@@ -31,17 +72,72 @@ class WorkloadManager:
         self.__fallback_cpu_allocator = None
         if isinstance(self.__cpu_allocator, IntegerProgramCpuAllocator):
             self.__is_ip_allocator_used = True
+        # Both solve integer programs which may be stopped by their time limit
+        self.__is_time_bound_tracked = isinstance(
+            self.__cpu_allocator, (IntegerProgramCpuAllocator, HierarchicalCpuAllocator))
         if fallback_allocator_class is not None:
             self.__fallback_cpu_allocator = fallback_allocator_class(cpu)
-        log.info("Created workload manager with allocator: '{}'".format(self.__cpu_allocator.__class__.__name__))
+
+        self.__anytime = anytime and self.__is_ip_allocator_used
+        self.__immediate_cpu_allocator = None
+        if self.__anytime:
+            self.__immediate_cpu_allocator = GreedyCpuAllocator(cpu)
+        self.__fast_free = fast_free and self.__is_ip_allocator_used and not self.__anytime
+        if self.__fast_free:
+            self.__cpu_allocator.set_fast_free(True)
+        self.__compaction_violation_threshold = compaction_violation_threshold
+        self.__requested_compaction_count = 0
+        self.__recent_request_sizes = deque(maxlen=REQUEST_SIZE_HISTORY_LENGTH)
+        self.__presolved_count = 0
+
+        self.__upgrade_executor = upgrade_executor
+        self.__upgrade_deadline_secs = upgrade_deadline_secs
+        self.__upgrade_in_flight = False
+        self.__upgrade_requested = False
+        self.__applied_upgrade_count = 0
+        self.__discarded_upgrade_count = 0
+        self.__applied_rebalance_count = 0
+        self.__discarded_rebalance_count = 0
+
+        self.__shadow_evaluator = None
+        if shadow_allocator_class is not None:
+            self.__shadow_evaluator = ShadowEvaluator(cpu, shadow_allocator_class, shadow_executor)
+        log.info("Created workload manager with allocator: '{}', anytime: {}, fast free: {}".format(
+            self.__cpu_allocator.__class__.__name__, self.__anytime, self.__fast_free))
 
     def add_workload(self, workload):
         succeeded = self.__update_workload(self.__add_workload, workload, workload.get_id())
         if not succeeded:
             self.__remove_workload(workload.get_id())
+        self.__request_upgrade()
+
+    def add_workloads(self, workloads):
+        """
+        Adds all the given workloads with a single allocator call and a single pass over the cgroups, rather than one
+        of each per workload.  If that fails, they are added one at a time so one bad workload does not keep the others
+        out.
+        """
+        workloads = list(workloads)
+        if len(workloads) == 0:
+            return
+
+        workload_ids = [w.get_id() for w in workloads]
+        succeeded = self.__update_workload(self.__add_workloads, workloads, workload_ids)
+        if not succeeded:
+            log.warning("Failed to add workloads: {} together, adding them one at a time".format(workload_ids))
+            for workload_id in workload_ids:
+                if workload_id in self.__workloads:
+                    self.__update_workload(self.__remove_workload, workload_id, workload_id)
+            for workload in workloads:
+                self.add_workload(workload)
+            return
+
+        self.__request_upgrade()
 
     def remove_workload(self, workload_id):
         self.__update_workload(self.__remove_workload, workload_id, workload_id)
+        self.__request_upgrade()
+        self.__request_compaction()
 
     def __update_workload(self, func, arg, workload_id):
         try:
@@ -58,21 +154,56 @@ class WorkloadManager:
             log.exception("Failed to execute func: {} on workload: {}".format(func.__name__, workload_id))
             return False
 
-    def __call_allocator(self, func_name, *args):
+    def __call_allocator(self, func_name, *args, replay=True):
+        """
+        :param replay: whether to replay the call against the shadow allocator, which only places static workloads
+        """
+        start_time = time.time()
+        allocator, delta = self.__call_live_allocator(func_name, *args)
+        if self.__shadow_evaluator is not None and replay:
+            self.__replay(func_name, args, allocator, time.time() - start_time, delta)
+        return allocator, delta
+
+    def __replay(self, func_name, args, allocator, duration_secs, delta):
+        try:
+            self.__shadow_evaluator.replay(func_name, args, allocator.get_cpu().snapshot(), duration_secs, delta)
+        except:
+            log.exception("Failed to replay func: {} against the shadow allocator".format(func_name))
+
+    def __call_live_allocator(self, func_name, *args):
+        if self.__anytime:
+            allocator = self.__immediate_cpu_allocator
+            return allocator, getattr(allocator, func_name)(*args)
+
         allocator = self.__cpu_allocator
         try:
-            getattr(allocator, func_name)(*args)
-            if self.__is_ip_allocator_used and allocator.is_last_call_time_bound():
+            delta = getattr(allocator, func_name)(*args)
+            if self.__is_time_bound_tracked and allocator.is_last_call_time_bound():
                 self.__time_bound_ip_allocator_solution_count += 1
         except Exception as e:
             if self.__fallback_cpu_allocator is not None:
                 allocator = self.__fallback_cpu_allocator
-                getattr(allocator, func_name)(*args)
+                if func_name == 'assign_threads_batch':
+                    # Workloads placed before the allocator failed keep their threads
+                    args = ([w for w in args[0] if not allocator.get_cpu().has_workload(w.get_id())],)
+                delta = getattr(allocator, func_name)(*args)
                 self.__fallback_allocator_calls_count += 1
             else:
                 raise e
-        return allocator
+        return allocator, delta
+
+    def __get_updates(self, current_cpu, allocator, delta):
+        if delta is None:
+            return get_updates(current_cpu, allocator.get_cpu().snapshot())
+
+        log.info("Allocator: '{}' made placement changes: {}".format(allocator.__class__.__name__, delta))
+        moved_workload_count, moved_thread_count = get_churn(delta)
+        if moved_workload_count > 0:
+            log.info("Moved {} running workload(s) off {} thread(s)".format(moved_workload_count, moved_thread_count))
+        self.__moved_workload_count += moved_workload_count
+        self.__moved_thread_count += moved_thread_count
 
+        return delta.get_updates()
 
     def __add_workload(self, workload):
         log.info("Adding workload: {}".format(workload.get_id()))
@@ -82,9 +213,10 @@ class WorkloadManager:
 
         allocator = self.__cpu_allocator
         if workload.get_type() == STATIC:
-            current_cpu = copy.deepcopy(self.get_cpu())
-            allocator = self.__call_allocator('assign_threads', workload)
-            updates = get_updates(current_cpu, allocator.get_cpu())
+            self.__recent_request_sizes.append(workload.get_thread_count())
+            current_cpu = self.get_cpu().snapshot()
+            allocator, delta = self.__call_allocator('assign_threads', workload)
+            updates = self.__get_updates(current_cpu, allocator, delta)
             log.info("Found footprint updates: '{}'".format(updates))
             self.__update_static_cpusets(updates)
 
@@ -93,24 +225,238 @@ class WorkloadManager:
 
         self.__cpu = allocator.get_cpu()
         self.__update_burst_cpusets()
+        self.__publish_cpu_snapshot()
 
         log.info("Added workload: {}".format(workload.get_id()))
         self.__added_count += 1
 
 
+    def __add_workloads(self, workloads):
+        log.info("Adding workloads: {}".format([w.get_id() for w in workloads]))
+
+        for workload in workloads:
+            self.__workloads[workload.get_id()] = workload
+
+        allocator = self.__cpu_allocator
+        static_workloads = get_static_workloads(workloads)
+        self.__recent_request_sizes.extend([w.get_thread_count() for w in static_workloads])
+        if len(static_workloads) > 0:
+            current_cpu = self.get_cpu().snapshot()
+            allocator, delta = self.__call_allocator('assign_threads_batch', static_workloads)
+            updates = self.__get_updates(current_cpu, allocator, delta)
+            log.info("Found footprint updates: '{}'".format(updates))
+            self.__update_static_cpusets(updates)
+
+        # New burst workloads are updated along with the existing ones
+        self.__cpu = allocator.get_cpu()
+        self.__update_burst_cpusets()
+        self.__publish_cpu_snapshot()
+
+        log.info("Added workloads: {}".format([w.get_id() for w in workloads]))
+        self.__added_count += len(workloads)
+
     def __remove_workload(self, workload_id):
         log.info("Removing workload: {}".format(workload_id))
         if workload_id not in self.__workloads:
             raise ValueError("Attempted to remove unknown workload: '{}'".format(workload_id))
 
-        allocator = self.__call_allocator('free_threads', workload_id)
+        current_cpu = self.get_cpu().snapshot()
+        is_static = self.__workloads[workload_id].get_type() == STATIC
+        allocator, delta = self.__call_allocator('free_threads', workload_id, replay=is_static)
         self.__workloads.pop(workload_id)
 
+        # Freeing a workload may move other static workloads
+        updates = self.__get_updates(current_cpu, allocator, delta)
+        log.info("Found footprint updates: '{}'".format(updates))
+        self.__update_static_cpusets(updates)
+
         self.__cpu = allocator.get_cpu()
         self.__update_burst_cpusets()
+        self.__publish_cpu_snapshot()
         log.info("Removed workload: {}".format(workload_id))
         self.__removed_count += 1
 
+    def __request_upgrade(self):
+        """
+        In anytime mode, solves the integer program for the current placement in the background.
+        """
+        if not self.__anytime:
+            return
+
+        self.__request_solve()
+
+    def __request_compaction(self):
+        """
+        With fast free, compacts the placement left by freed workloads in the background, as upgrades are, once it
+        has degraded enough.  Requests made while a compaction is solved are coalesced into one.
+        """
+        if not self.__fast_free:
+            return
+
+        cpu = self.get_cpu_snapshot()
+        isolation_cost = get_isolation_cost(cpu)
+        if isolation_cost < self.__compaction_violation_threshold:
+            return
+
+        log.info("Requesting compaction of a placement with isolation cost: {}".format(isolation_cost))
+        self.__requested_compaction_count += 1
+        self.__request_solve()
+
+    def __request_solve(self):
+        """
+        Solves the integer program for the current placement in the background, and applies the solution if it
+        improves the placement.  At most one upgrade is solved at a time; requests made meanwhile are coalesced into one
+        made once it completes.
+        """
+        try:
+            with self.__lock:
+                if self.__upgrade_in_flight:
+                    self.__upgrade_requested = True
+                    return
+
+                request = self.__cpu_allocator.get_upgrade_request()
+                if request is None:
+                    return
+
+                solution = self.__cpu_allocator.get_cached_solution(request)
+                if solution is not None:
+                    self.__apply_upgrade(request, solution[0], solution[1])
+                    return
+
+                if self.__upgrade_executor is None:
+                    self.__upgrade_executor = ProcessPoolExecutor(max_workers=1)
+                self.__upgrade_in_flight = True
+                request_time = time.time()
+                future = self.__upgrade_executor.submit(solve_ip, request.get_solver_args())
+        except:
+            self.__error_count += 1
+            log.exception("Failed to request a placement upgrade")
+            return
+
+        # Outside the lock, as the callback runs right away if the solution is already available
+        future.add_done_callback(lambda f: self.__complete_upgrade(request, request_time, f))
+
+    def __complete_upgrade(self, request, request_time, future):
+        try:
+            with self.__lock:
+                self.__upgrade_in_flight = False
+                placement, status = future.result()
+                self.__cpu_allocator.put_solution(request, placement, status)
+
+                duration_secs = time.time() - request_time
+                if duration_secs > self.__upgrade_deadline_secs:
+                    log.info("Discarding placement upgrade which missed its deadline by: '{}' seconds".format(
+                        duration_secs - self.__upgrade_deadline_secs))
+                    self.__discarded_upgrade_count += 1
+                else:
+                    self.__apply_upgrade(request, placement, status)
+        except:
+            self.__error_count += 1
+            log.exception("Failed to complete a placement upgrade")
+
+        with self.__lock:
+            upgrade_requested = self.__upgrade_requested
+            self.__upgrade_requested = False
+
+        if upgrade_requested:
+            self.__request_solve()
+
+    def __apply_upgrade(self, request, placement, status):
+        if self.__cpu.fingerprint() != request.get_fingerprint():
+            log.info("Discarding placement upgrade solved for a placement which has since changed")
+            self.__discarded_upgrade_count += 1
+            return
+
+        current_cpu = self.__cpu.snapshot()
+        upgraded_cpu = current_cpu.remap(self.__cpu_allocator.get_thread_mapping(request, placement))
+        if not has_better_isolation(current_cpu, upgraded_cpu):
+            log.info("Discarding placement upgrade which does not improve isolation")
+            self.__discarded_upgrade_count += 1
+            return
+
+        delta = self.__cpu_allocator.apply_solution(request, placement, status)
+        if self.__cpu_allocator.is_last_call_time_bound():
+            self.__time_bound_ip_allocator_solution_count += 1
+
+        updates = self.__get_updates(current_cpu, self.__cpu_allocator, delta)
+        log.info("Found footprint updates from placement upgrade: '{}'".format(updates))
+        self.__update_static_cpusets(updates)
+        self.__update_burst_cpusets()
+        self.__publish_cpu_snapshot()
+        self.__applied_upgrade_count += 1
+
+    def get_presolve_requests(self, thread_counts, max_free_count):
+        """
+        Makes the integer program requests the next events are likely to make and which are not solved yet, e.g. for
+        a Presolver to solve while no event is handled.  Nothing is presolved unless the integer program allocator
+        places workloads as they come, i.e. not in anytime mode.
+
+        :param thread_counts: the thread counts of the workloads likely to be added next, most likely first
+        :param max_free_count: the most running workloads to presolve freeing, unless freeing is fast
+        :return: a list of SolverRequests, most likely first
+        """
+        if not self.__is_ip_allocator_used or self.__anytime:
+            return []
+
+        with self.__lock:
+            empty_thread_count = self.__cpu.get_empty_thread_count()
+            requests = [self.__cpu_allocator.get_assign_request([Workload(PRESOLVE_WORKLOAD_ID, count, STATIC)])
+                        for count in thread_counts if 0 < count <= empty_thread_count]
+
+            if not self.__fast_free:
+                workload_ids = list(self.__cpu.get_workload_ids_to_thread_ids().keys())[:max_free_count]
+                requests += [self.__cpu_allocator.get_free_request(w_id) for w_id in workload_ids]
+
+            keys = set()
+            unsolved = []
+            for request in requests:
+                if request.get_key() not in keys and not self.__cpu_allocator.has_cached_solution(request):
+                    keys.add(request.get_key())
+                    unsolved.append(request)
+
+            return unsolved
+
+    def put_presolved_solution(self, request, placement, status):
+        with self.__lock:
+            self.__cpu_allocator.put_solution(request, placement, status)
+            self.__presolved_count += 1
+
+    def rebalance(self, fingerprint, thread_id_to_workload_id):
+        """
+        Moves static workloads to the given placement, computed elsewhere for the CPU with the given fingerprint, e.g.
+        by a Rebalancer.  It is discarded if the placement has changed since.
+
+        :return: True if the placement was applied, False otherwise
+        """
+        try:
+            with self.__lock:
+                if self.__cpu.fingerprint() != fingerprint:
+                    log.info("Discarding rebalanced placement computed for a placement which has since changed")
+                    self.__discarded_rebalance_count += 1
+                    return False
+
+                current_cpu = self.__cpu.snapshot()
+                delta = apply_thread_mapping(self.__cpu, thread_id_to_workload_id)
+                updates = self.__get_updates(current_cpu, self.__cpu_allocator, delta)
+                log.info("Found footprint updates from rebalancing: '{}'".format(updates))
+                self.__update_static_cpusets(updates)
+                self.__update_burst_cpusets()
+                self.__publish_cpu_snapshot()
+                self.__applied_rebalance_count += 1
+                return True
+        except:
+            self.__error_count += 1
+            log.exception("Failed to apply a rebalanced placement")
+            return False
+
+    def __publish_cpu_snapshot(self):
+        # Keep the published snapshot when the placement is unchanged, e.g. after adding a burst workload
+        if self.__cpu is self.__cpu_snapshot_source and self.__cpu.fingerprint() == self.__cpu_snapshot.fingerprint():
+            return
+
+        self.__cpu_snapshot = self.__cpu.snapshot()
+        self.__cpu_snapshot_source = self.__cpu
+
     def __update_static_cpusets(self, updates):
         for workload_id, thread_ids in updates.items():
             log.info("updating static workload: '{}'".format(workload_id))
@@ -144,6 +490,13 @@ class WorkloadManager:
     def get_cpu(self):
         return self.__cpu
 
+    def get_cpu_snapshot(self):
+        """
+        Returns the snapshot of the CPU published after the last completed add or remove.  Unlike get_cpu(), it is
+        immutable and safe to read without holding the workload manager's lock.
+        """
+        return self.__cpu_snapshot
+
     def get_added_count(self):
         return self.__added_count
 
@@ -164,4 +517,65 @@ class WorkloadManager:
         return self.__allocator_call_duration_sum_secs
 
     def get_time_bound_ip_allocator_solution_count(self):
-        return self.__time_bound_ip_allocator_solution_count
\ No newline at end of file
+        return self.__time_bound_ip_allocator_solution_count
+
+    def is_anytime(self):
+        return self.__anytime
+
+    def is_fast_free(self):
+        return self.__fast_free
+
+    def get_requested_compaction_count(self):
+        return self.__requested_compaction_count
+
+    def get_recent_request_sizes(self):
+        """
+        :return: the thread counts of the most recently added static workloads, oldest first
+        """
+        with self.__lock:
+            return list(self.__recent_request_sizes)
+
+    def get_presolved_count(self):
+        return self.__presolved_count
+
+    def get_moved_workload_count(self):
+        return self.__moved_workload_count
+
+    def get_moved_thread_count(self):
+        return self.__moved_thread_count
+
+    def get_applied_upgrade_count(self):
+        return self.__applied_upgrade_count
+
+    def get_discarded_upgrade_count(self):
+        return self.__discarded_upgrade_count
+
+    def get_applied_rebalance_count(self):
+        return self.__applied_rebalance_count
+
+    def get_discarded_rebalance_count(self):
+        return self.__discarded_rebalance_count
+
+    def get_shadow_evaluator(self):
+        """
+        Returns the evaluator comparing the live allocator with a shadow one, or None if there is none.
+        """
+        return self.__shadow_evaluator
+
+    def get_ip_solution_cache(self):
+        """
+        Returns the solution cache of the integer program allocator, or None if it is not in use.
+        """
+        if not self.__is_ip_allocator_used:
+            return None
+
+        return self.__cpu_allocator.get_solution_cache()
+
+    def get_ip_solver_budget(self):
+        """
+        Returns the solver budget of the integer program allocator, or None if it is not in use.
+        """
+        if not self.__is_ip_allocator_used:
+            return None
+
+        return self.__cpu_allocator.get_solver_budget()
@@ -1,5 +1,7 @@
 from titus_isolate import log
-from titus_isolate.isolate.detect import get_cross_package_violations, get_shared_core_violations
+from titus_isolate.isolate.detect import get_cross_package_violation_count, get_shared_core_violation_count, \
+    get_cross_llc_violations
+from titus_isolate.isolate.shadow import LIVE, SHADOW
 from titus_isolate.metrics.metrics_reporter import MetricsReporter
 
 ADDED_KEY = 'titus-isolate.added'
@@ -9,6 +11,33 @@ FAILED_KEY = 'titus-isolate.failed'
 ALLOCATOR_CALL_DURATION = 'titus-isolate.allocatorCallDurationSecs'
 FALLBACK_ALLOCATOR_COUNT = 'titus-isolate.fallbackCount'
 IP_ALLOCATOR_TIMEBOUND_COUNT = 'titus-isolate.ipAllocatorTimeBoundSolutionCount'
+MOVED_WORKLOADS_KEY = 'titus-isolate.movedWorkloads'
+MOVED_THREADS_KEY = 'titus-isolate.movedThreads'
+IP_SOLUTION_CACHE_HIT_KEY = 'titus-isolate.ipSolutionCacheHits'
+IP_SOLUTION_CACHE_MISS_KEY = 'titus-isolate.ipSolutionCacheMisses'
+IP_SOLUTION_CACHE_EVICTION_KEY = 'titus-isolate.ipSolutionCacheEvictions'
+IP_SOLUTION_CACHE_SIZE_KEY = 'titus-isolate.ipSolutionCacheSize'
+IP_SOLUTION_CACHE_BYTES_KEY = 'titus-isolate.ipSolutionCacheBytes'
+IP_PRESOLVED_KEY = 'titus-isolate.ipSolutionsPresolved'
+IP_SOLVER_BUDGET_KEY = 'titus-isolate.ipSolverBudgetSecs'
+IP_SOLVER_PREDICTED_KEY = 'titus-isolate.ipSolverPredictedSecs'
+IP_SOLVER_TIME_BOUND_RATIO_KEY = 'titus-isolate.ipSolverTimeBoundRatio'
+IP_SOLVER_SLO_MISS_KEY = 'titus-isolate.ipSolverLatencySloMisses'
+IP_UPGRADE_APPLIED_KEY = 'titus-isolate.ipUpgradesApplied'
+IP_UPGRADE_DISCARDED_KEY = 'titus-isolate.ipUpgradesDiscarded'
+COMPACTION_REQUESTED_KEY = 'titus-isolate.compactionsRequested'
+REBALANCE_APPLIED_KEY = 'titus-isolate.rebalancesApplied'
+REBALANCE_DISCARDED_KEY = 'titus-isolate.rebalancesDiscarded'
+SHADOW_CALL_COUNT_KEY = 'titus-isolate.shadow.allocatorCallCount'
+SHADOW_CALL_DURATION_KEY = 'titus-isolate.shadow.allocatorCallDurationSecs'
+SHADOW_MAX_CALL_DURATION_KEY = 'titus-isolate.shadow.maxAllocatorCallDurationSecs'
+SHADOW_MOVED_WORKLOADS_KEY = 'titus-isolate.shadow.movedWorkloads'
+SHADOW_MOVED_THREADS_KEY = 'titus-isolate.shadow.movedThreads'
+SHADOW_PACKAGE_VIOLATIONS_KEY = 'titus-isolate.shadow.crossPackageViolations'
+SHADOW_CORE_VIOLATIONS_KEY = 'titus-isolate.shadow.sharedCoreViolations'
+SHADOW_ERROR_KEY = 'titus-isolate.shadow.errors'
+SHADOW_ROLE_TAG = 'shadow_role'
+SHADOW_ALLOCATOR_TAG = 'shadow_allocator'
 QUEUE_DEPTH_KEY = 'titus-isolate.queueDepth'
 WORKLOAD_COUNT_KEY = 'titus-isolate.workloadCount'
 EVENT_SUCCEEDED_KEY = 'titus-isolate.eventSucceeded'
@@ -17,6 +46,7 @@ EVENT_PROCESSED_KEY = 'titus-isolate.eventProcessed'
 
 PACKAGE_VIOLATIONS_KEY = 'titus-isolate.crossPackageViolations'
 CORE_VIOLATIONS_KEY = 'titus-isolate.sharedCoreViolations'
+LLC_VIOLATIONS_KEY = 'titus-isolate.crossLlcViolations'
 
 RUNNING = 'titus-isolate.running'
 
@@ -47,6 +77,37 @@ class InternalMetricsReporter(MetricsReporter):
             self.__reg.gauge(ALLOCATOR_CALL_DURATION, tags).set(self.__workload_manager.get_allocator_call_duration_sum_secs())
             self.__reg.gauge(FALLBACK_ALLOCATOR_COUNT, tags).set(self.__workload_manager.get_fallback_allocator_calls_count())
             self.__reg.gauge(IP_ALLOCATOR_TIMEBOUND_COUNT, tags).set(self.__workload_manager.get_time_bound_ip_allocator_solution_count())
+            self.__reg.gauge(MOVED_WORKLOADS_KEY, tags).set(self.__workload_manager.get_moved_workload_count())
+            self.__reg.gauge(MOVED_THREADS_KEY, tags).set(self.__workload_manager.get_moved_thread_count())
+
+            solution_cache = self.__workload_manager.get_ip_solution_cache()
+            if solution_cache is not None:
+                self.__reg.gauge(IP_SOLUTION_CACHE_HIT_KEY, tags).set(solution_cache.get_hit_count())
+                self.__reg.gauge(IP_SOLUTION_CACHE_MISS_KEY, tags).set(solution_cache.get_miss_count())
+                self.__reg.gauge(IP_SOLUTION_CACHE_EVICTION_KEY, tags).set(solution_cache.get_eviction_count())
+                self.__reg.gauge(IP_SOLUTION_CACHE_SIZE_KEY, tags).set(len(solution_cache))
+                self.__reg.gauge(IP_SOLUTION_CACHE_BYTES_KEY, tags).set(solution_cache.get_size_bytes())
+                self.__reg.gauge(IP_PRESOLVED_KEY, tags).set(self.__workload_manager.get_presolved_count())
+
+            solver_budget = self.__workload_manager.get_ip_solver_budget()
+            if solver_budget is not None:
+                self.__report_solver_budget_metrics(solver_budget, tags)
+
+            if self.__workload_manager.is_anytime() or self.__workload_manager.is_fast_free():
+                self.__reg.gauge(IP_UPGRADE_APPLIED_KEY, tags).set(self.__workload_manager.get_applied_upgrade_count())
+                self.__reg.gauge(IP_UPGRADE_DISCARDED_KEY, tags).set(
+                    self.__workload_manager.get_discarded_upgrade_count())
+
+            if self.__workload_manager.is_fast_free():
+                self.__reg.gauge(COMPACTION_REQUESTED_KEY, tags).set(
+                    self.__workload_manager.get_requested_compaction_count())
+
+            self.__reg.gauge(REBALANCE_APPLIED_KEY, tags).set(self.__workload_manager.get_applied_rebalance_count())
+            self.__reg.gauge(REBALANCE_DISCARDED_KEY, tags).set(self.__workload_manager.get_discarded_rebalance_count())
+
+            shadow_evaluator = self.__workload_manager.get_shadow_evaluator()
+            if shadow_evaluator is not None:
+                self.__report_shadow_metrics(shadow_evaluator, tags)
 
             # Event manager metrics
             self.__reg.gauge(QUEUE_DEPTH_KEY, tags).set(self.__event_manager.get_queue_depth())
@@ -55,11 +116,40 @@ class InternalMetricsReporter(MetricsReporter):
             self.__reg.gauge(EVENT_PROCESSED_KEY, tags).set(self.__event_manager.get_processed_count())
 
             # CPU metrics
-            cross_package_violation_count = len(get_cross_package_violations(self.__workload_manager.get_cpu()))
-            shared_core_violation_count = len(get_shared_core_violations(self.__workload_manager.get_cpu()))
+            cpu = self.__workload_manager.get_cpu_snapshot()
+            cross_package_violation_count = get_cross_package_violation_count(cpu)
+            shared_core_violation_count = get_shared_core_violation_count(cpu)
+            cross_llc_violation_count = len(get_cross_llc_violations(cpu))
             self.__reg.gauge(PACKAGE_VIOLATIONS_KEY, tags).set(cross_package_violation_count)
             self.__reg.gauge(CORE_VIOLATIONS_KEY, tags).set(shared_core_violation_count)
+            self.__reg.gauge(LLC_VIOLATIONS_KEY, tags).set(cross_llc_violation_count)
             log.debug("Reported metrics")
 
         except:
             log.exception("Failed to report metric")
+
+    def __report_solver_budget_metrics(self, solver_budget, tags):
+        self.__reg.gauge(IP_SOLVER_TIME_BOUND_RATIO_KEY, tags).set(solver_budget.get_time_bound_ratio())
+        self.__reg.gauge(IP_SOLVER_SLO_MISS_KEY, tags).set(solver_budget.get_slo_miss_count())
+        if solver_budget.get_last_budget_secs() is not None:
+            self.__reg.gauge(IP_SOLVER_BUDGET_KEY, tags).set(solver_budget.get_last_budget_secs())
+        if solver_budget.get_last_predicted_secs() is not None:
+            self.__reg.gauge(IP_SOLVER_PREDICTED_KEY, tags).set(solver_budget.get_last_predicted_secs())
+
+    def __report_shadow_metrics(self, shadow_evaluator, tags):
+        """
+        Reports the same stats for the live and shadow allocators, told apart by a tag.
+        """
+        for role, stats in [(LIVE, shadow_evaluator.get_live_stats()), (SHADOW, shadow_evaluator.get_shadow_stats())]:
+            role_tags = dict(tags)
+            role_tags[SHADOW_ROLE_TAG] = role
+            role_tags[SHADOW_ALLOCATOR_TAG] = shadow_evaluator.get_allocator_name()
+
+            self.__reg.gauge(SHADOW_CALL_COUNT_KEY, role_tags).set(stats.get_call_count())
+            self.__reg.gauge(SHADOW_CALL_DURATION_KEY, role_tags).set(stats.get_call_duration_sum_secs())
+            self.__reg.gauge(SHADOW_MAX_CALL_DURATION_KEY, role_tags).set(stats.get_max_call_duration_secs())
+            self.__reg.gauge(SHADOW_MOVED_WORKLOADS_KEY, role_tags).set(stats.get_moved_workload_count())
+            self.__reg.gauge(SHADOW_MOVED_THREADS_KEY, role_tags).set(stats.get_moved_thread_count())
+            self.__reg.gauge(SHADOW_PACKAGE_VIOLATIONS_KEY, role_tags).set(stats.get_cross_package_violation_count())
+            self.__reg.gauge(SHADOW_CORE_VIOLATIONS_KEY, role_tags).set(stats.get_shared_core_violation_count())
+            self.__reg.gauge(SHADOW_ERROR_KEY, role_tags).set(stats.get_error_count())
@@ -3,7 +3,10 @@ import subprocess
 
 from titus_isolate.model.processor.core import Core
 from titus_isolate.model.processor.cpu import Cpu
+from titus_isolate.model.processor.domain import Domain
 from titus_isolate.model.processor.package import Package
+from titus_isolate.model.processor.sysfs import DEFAULT_SYSFS_ROOT, get_cpu_topology, get_numa_topology, \
+    get_llc_topology
 from titus_isolate.model.processor.thread import Thread
 from titus_isolate.model.processor.utils import DEFAULT_PACKAGE_COUNT, DEFAULT_CORE_COUNT, DEFAULT_THREAD_COUNT
 
@@ -20,7 +23,7 @@ def get_cpu_from_env():
     if processor is None:
         raise EnvironmentError("Unexpected system type: '{}'".format(system))
 
-    return get_cpu(processor.get_package_count(), processor.get_cores_per_package(), processor.get_threads_per_core())
+    return processor.get_cpu()
 
 
 def get_cpu(
@@ -40,6 +43,47 @@ def get_cpu(
     return Cpu(packages)
 
 
+def get_cpu_from_topology(topology, numa_topology=None, llc_topology=None):
+    """
+    :param topology: a list of packages, each a list of cores, each a list of thread ids
+    :param numa_topology: optional list of NUMA nodes, each a list of thread ids
+    :param llc_topology: optional list of last level caches, each a list of thread ids
+    """
+    threads = {}
+    packages = []
+    for p_i, core_thread_ids in enumerate(topology):
+
+        cores = []
+        for c_i, thread_ids in enumerate(core_thread_ids):
+            core_threads = [Thread(t_id) for t_id in thread_ids]
+            threads.update({t.get_id(): t for t in core_threads})
+            cores.append(Core(c_i, core_threads))
+
+        packages.append(Package(p_i, cores))
+
+    def get_domains(domain_topology):
+        if domain_topology is None:
+            return None
+        return [Domain(d_i, [threads[t_id] for t_id in thread_ids]) for d_i, thread_ids in enumerate(domain_topology)]
+
+    return Cpu(packages, get_domains(numa_topology), get_domains(llc_topology))
+
+
+def get_empty_cpu(cpu):
+    """
+    :return: a CPU with the same topology as the given one, e.g. a snapshot, with no thread claimed
+    """
+    def get_domain_topology(domains):
+        if len(domains) == 0:
+            return None
+        return [[t.get_id() for t in d.get_threads()] for d in domains]
+
+    return get_cpu_from_topology(
+        [[[t.get_id() for t in c.get_threads()] for c in p.get_cores()] for p in cpu.get_packages()],
+        get_domain_topology(cpu.get_numa_nodes()),
+        get_domain_topology(cpu.get_llcs()))
+
+
 def __get_threads(package_index, core_index, package_count, core_count, thread_count):
     threads = []
     for row_index in range(thread_count):
@@ -65,27 +109,28 @@ class Processor:
     def get_threads_per_core(self):
         return self.__threads_per_core
 
+    def get_cpu(self):
+        return get_cpu(self.get_package_count(), self.get_cores_per_package(), self.get_threads_per_core())
+
 
 class LinuxProcessor(Processor):
-    def __init__(self):
+    """
+    LinuxProcessor reads the processor topology from sysfs, so the modeled CPU matches the real numbering and sibling
+    layout of the online threads rather than a formula.  NUMA nodes and last level caches are read too, when the
+    kernel exposes them.
+    """
+    def __init__(self, sysfs_root=DEFAULT_SYSFS_ROOT):
+        self.__topology = get_cpu_topology(sysfs_root)
+        self.__numa_topology = get_numa_topology(sysfs_root)
+        self.__llc_topology = get_llc_topology(sysfs_root)
+        first_package = self.__topology[0]
         super(LinuxProcessor, self).__init__(
-            self.__get_package_count(),
-            self.__get_cores_per_package(),
-            self.__get_threads_per_core())
-
-    def __get_package_count(self):
-        return self.__get_lscpu_value('^Socket')
-
-    def __get_cores_per_package(self):
-        return self.__get_lscpu_value('^Core')
+            len(self.__topology),
+            len(first_package),
+            len(first_package[0]))
 
-    def __get_threads_per_core(self):
-        return self.__get_lscpu_value('^Thread')
-
-    @staticmethod
-    def __get_lscpu_value(grep_filter):
-        output = subprocess.check_output("lscpu | grep -E {}".format(grep_filter), shell=True).decode('utf-8')
-        return int(output.split(':')[1].strip())
+    def get_cpu(self):
+        return get_cpu_from_topology(self.__topology, self.__numa_topology, self.__llc_topology)
 
 
 class MacProcessor(Processor):
@@ -1,4 +1,4 @@
-from titus_isolate.model.processor import utils
+from titus_isolate.model.processor.occupancy import Occupancy, get_range_mask
 
 
 class Core:
@@ -8,12 +8,53 @@ class Core:
 
         self.__identifier = identifier
         self.__threads = threads
+        self.__occupancy = None
+        self.__mask = None
+        self.__group = None
 
     def get_id(self):
         return self.__identifier
 
+    def set_occupancy(self, occupancy, offset):
+        self.__occupancy = occupancy
+        self.__mask = get_range_mask(offset, len(self.__threads))
+        self.__group = occupancy.add_group(offset, len(self.__threads))
+        for slot, thread in enumerate(self.__threads, offset):
+            thread.set_occupancy(occupancy, slot)
+
+        return self.__group
+
     def get_threads(self):
         return self.__threads
 
     def get_empty_threads(self):
-        return utils.get_empty_threads(self.get_threads())
+        occupancy = self.__get_occupancy()
+        return occupancy.get_threads_in_mask(self.__mask & ~occupancy.get_claimed_mask())
+
+    def get_claimed_threads(self):
+        occupancy = self.__get_occupancy()
+        return occupancy.get_threads_in_mask(self.__mask & occupancy.get_claimed_mask())
+
+    def get_workload_threads(self, workload_id):
+        occupancy = self.__get_occupancy()
+        return occupancy.get_threads_in_mask(self.__mask & occupancy.get_workload_mask(workload_id))
+
+    def has_workload(self, workload_id):
+        occupancy = self.__get_occupancy()
+        return self.__mask & occupancy.get_workload_mask(workload_id) != 0
+
+    def get_empty_thread_count(self):
+        return self.__get_occupancy().get_group_empty_count(self.__group)
+
+    def get_claimed_thread_count(self):
+        return len(self.__threads) - self.get_empty_thread_count()
+
+    def __get_occupancy(self):
+        """
+        The occupancy is shared with the CPU, which binds it.  A core used on its own, outside of a CPU, binds one of
+        its own on first use.
+        """
+        if self.__occupancy is None:
+            self.set_occupancy(Occupancy(self.__threads), 0)
+
+        return self.__occupancy
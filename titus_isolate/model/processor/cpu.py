@@ -1,53 +1,144 @@
 from collections import defaultdict
-from functools import reduce
 
 from titus_isolate.model.processor import utils
+from titus_isolate.model.processor.occupancy import Occupancy, get_bit_count
+from titus_isolate.model.processor.occupancy_matrix import get_occupancy_matrix
+from titus_isolate.model.processor.snapshot import CpuSnapshot
 
 
 class Cpu:
-    def __init__(self, packages):
+    def __init__(self, packages, numa_nodes=None, llcs=None):
+        """
+        :param packages: the packages of the CPU
+        :param numa_nodes: optional list of Domains, one per NUMA node
+        :param llcs: optional list of Domains, one per last level cache
+        """
         if len(packages) < 1:
             raise ValueError("A CPU must contain at least 1 package.")
 
         self.__packages = packages
+        self.__threads = [thread for package in packages for thread in package.get_threads()]
+        self.__occupancy = Occupancy(self.__threads)
+
+        package_groups = []
+        offset = 0
+        for package in packages:
+            package_groups.append(package.set_occupancy(self.__occupancy, offset))
+            offset += len(package.get_threads())
+        self.__package_heap = self.__occupancy.add_heap(package_groups)
+
+        self.__topology = tuple([
+            (p.get_id(), tuple([(c.get_id(), tuple([t.get_id() for t in c.get_threads()])) for c in p.get_cores()]))
+            for p in packages])
+        self.__occupancy.set_placement_layout([[len(c.get_threads()) for c in p.get_cores()] for p in packages])
+
+        self.__numa_nodes = self.__add_domains(numa_nodes)
+        self.__llcs = self.__add_domains(llcs)
+
+        self.__occupancy_matrix = None
+        self.__occupancy_matrix_version = None
 
     def get_packages(self):
         return self.__packages
 
-    def get_emptiest_package(self):
-        emptiest_package = self.__packages[0]
-        curr_empty_thread_count = len(emptiest_package.get_empty_threads())
+    def get_numa_nodes(self):
+        return self.__numa_nodes
 
-        for package in self.get_packages()[1:]:
-            new_empty_thread_count = len(package.get_empty_threads())
+    def get_llcs(self):
+        return self.__llcs
 
-            if new_empty_thread_count > curr_empty_thread_count:
-                emptiest_package = package
-                curr_empty_thread_count = new_empty_thread_count
+    def get_version(self):
+        return self.__occupancy.get_version()
 
-        return emptiest_package
+    def fingerprint(self):
+        """
+        :return: a 64 bit hash of which workload holds each thread, updated in O(1) by every claim and free.  Equal
+        placements on CPUs with the same layout have equal fingerprints.
+        """
+        return self.__occupancy.get_fingerprint()
+
+    def snapshot(self):
+        return CpuSnapshot(
+            self.__topology,
+            self.__occupancy.get_placement(),
+            self.__occupancy.get_version(),
+            self.__occupancy.get_fingerprint(),
+            self.__get_domain_topology(self.__numa_nodes),
+            self.__get_domain_topology(self.__llcs))
+
+    def get_occupancy_matrix(self):
+        """
+        :return: an OccupancyMatrix of the current placement.  It is cached until the next claim or free.
+        """
+        version = self.__occupancy.get_version()
+        if self.__occupancy_matrix_version != version:
+            self.__occupancy_matrix = get_occupancy_matrix(
+                self.__topology,
+                self.__occupancy.get_workload_indices(),
+                self.__occupancy.get_workload_id_table())
+            self.__occupancy_matrix_version = version
+
+        return self.__occupancy_matrix
+
+    def get_emptiest_package(self):
+        return self.__packages[self.__package_heap.get_emptiest()]
 
     def get_threads(self):
-        return reduce(list.__add__, [package.get_threads() for package in self.get_packages()])
+        return self.__threads
 
     def get_empty_threads(self):
-        return utils.get_empty_threads(self.get_threads())
+        return self.__occupancy.get_threads_in_mask(self.__get_empty_mask())
 
     def get_claimed_threads(self):
-        return utils.get_claimed_threads(self.get_threads())
+        return self.__occupancy.get_threads_in_mask(self.__occupancy.get_claimed_mask())
+
+    def get_empty_thread_count(self):
+        return get_bit_count(self.__get_empty_mask())
+
+    def get_claimed_thread_count(self):
+        return get_bit_count(self.__occupancy.get_claimed_mask())
+
+    def get_workload_ids(self):
+        return self.__occupancy.get_workload_ids()
+
+    def get_workload_threads(self, workload_id):
+        return self.__occupancy.get_threads_in_mask(self.__occupancy.get_workload_mask(workload_id))
+
+    def has_workload(self, workload_id):
+        return self.__occupancy.get_workload_mask(workload_id) != 0
 
     def clear(self):
-        for t in self.get_threads():
+        for t in self.get_claimed_threads():
             t.free()
 
     def get_workload_ids_to_thread_ids(self):
         res = defaultdict(list)
-        for t in self.get_threads():
-            if t.is_claimed():
-                wid = t.get_workload_id()
-                res[wid] = res[wid] + [t.get_id()]
+        for workload_id in self.get_workload_ids():
+            res[workload_id] = [t.get_id() for t in self.get_workload_threads(workload_id)]
         return res
 
+    def __add_domains(self, domains):
+        if domains is None:
+            return []
+
+        slots = {t.get_id(): slot for slot, t in enumerate(self.__threads)}
+        for domain in domains:
+            mask = 0
+            for t in domain.get_threads():
+                if t.get_id() not in slots:
+                    raise ValueError("Domain: '{}' contains unknown thread: '{}'".format(domain.get_id(), t.get_id()))
+                mask |= 1 << slots[t.get_id()]
+            domain.set_occupancy(self.__occupancy, mask)
+
+        return domains
+
+    @staticmethod
+    def __get_domain_topology(domains):
+        return tuple([(d.get_id(), tuple([t.get_id() for t in d.get_threads()])) for d in domains])
+
+    def __get_empty_mask(self):
+        return ~self.__occupancy.get_claimed_mask() & ((1 << len(self.__threads)) - 1)
+
     def __str__(self):
         n_packages = len(self.get_packages())
         n_cores = n_packages * len(self.get_packages()[0].get_cores())
@@ -57,6 +148,6 @@ class Cpu:
                 n_packages,
                 n_cores,
                 int(len(self.get_threads()) / n_cores),
-                len(self.get_claimed_threads()),
+                self.get_claimed_thread_count(),
                 utils.visualize(self)
             )
@@ -0,0 +1,40 @@
+from titus_isolate.model.processor.occupancy import get_bit_count
+
+
+class Domain:
+    """
+    A Domain is a set of threads which share a resource below or across the package level, such as a NUMA node or a
+    last level cache.  Unlike cores and packages its threads need not be contiguous, so its queries are answered with
+    a mask over the CPU's occupancy.
+    """
+
+    def __init__(self, identifier, threads):
+        if len(threads) < 1:
+            raise ValueError("A domain must have at least 1 thread.")
+
+        self.__identifier = identifier
+        self.__threads = threads
+        self.__occupancy = None
+        self.__mask = 0
+
+    def get_id(self):
+        return self.__identifier
+
+    def set_occupancy(self, occupancy, mask):
+        self.__occupancy = occupancy
+        self.__mask = mask
+
+    def get_threads(self):
+        return self.__threads
+
+    def get_empty_threads(self):
+        return self.__occupancy.get_threads_in_mask(self.__mask & ~self.__occupancy.get_claimed_mask())
+
+    def get_empty_thread_count(self):
+        return get_bit_count(self.__mask & ~self.__occupancy.get_claimed_mask())
+
+    def get_workload_threads(self, workload_id):
+        return self.__occupancy.get_threads_in_mask(self.__mask & self.__occupancy.get_workload_mask(workload_id))
+
+    def has_workload(self, workload_id):
+        return self.__mask & self.__occupancy.get_workload_mask(workload_id) != 0
@@ -0,0 +1,40 @@
+import heapq
+
+
+class EmptiestHeap:
+    """
+    A max-heap of empty thread counts which answers "which member is the emptiest?".
+
+    Members are addressed by position.  Ties are broken in favor of the lowest position, matching a linear scan which
+    keeps the first maximum it sees.  Stale entries are skipped lazily when the top of the heap is read, so an update
+    costs O(log n) and a lookup is amortized O(1).
+    """
+
+    def __init__(self, empty_counts):
+        if len(empty_counts) < 1:
+            raise ValueError("An emptiest heap must have at least 1 member.")
+
+        self.__empty_counts = list(empty_counts)
+        self.__heap = []
+        self.__rebuild()
+
+    def update(self, position, empty_count):
+        self.__empty_counts[position] = empty_count
+        heapq.heappush(self.__heap, (-empty_count, position))
+
+        if len(self.__heap) > 4 * len(self.__empty_counts):
+            self.__rebuild()
+
+    def get_empty_count(self, position):
+        return self.__empty_counts[position]
+
+    def get_emptiest(self):
+        while True:
+            negative_count, position = self.__heap[0]
+            if -negative_count == self.__empty_counts[position]:
+                return position
+            heapq.heappop(self.__heap)
+
+    def __rebuild(self):
+        self.__heap = [(-count, position) for position, count in enumerate(self.__empty_counts)]
+        heapq.heapify(self.__heap)
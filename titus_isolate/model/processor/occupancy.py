@@ -0,0 +1,260 @@
+import hashlib
+from array import array
+
+from titus_isolate.model.processor.emptiest_heap import EmptiestHeap
+
+FREE_INDEX = -1
+MASK_64 = (1 << 64) - 1
+
+
+def get_bit_count(mask):
+    return bin(mask).count('1')
+
+
+def get_bit_indices(mask):
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
+
+
+def get_range_mask(offset, count):
+    return ((1 << count) - 1) << offset
+
+
+def mix_64(value):
+    """
+    The splitmix64 finalizer: a cheap bijective scramble of a 64 bit value.
+    """
+    value = (value + 0x9E3779B97F4A7C15) & MASK_64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return value ^ (value >> 31)
+
+
+def get_workload_hash(workload_id):
+    """
+    A 64 bit hash of a workload id which, unlike hash(), is stable across processes.
+    """
+    return int.from_bytes(hashlib.blake2b(str(workload_id).encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def get_placement_key(slot, workload_hash):
+    return mix_64(mix_64(slot) ^ workload_hash)
+
+
+class Occupancy:
+    """
+    Occupancy tracks which threads of a processor tree have been claimed and by which workloads.
+
+    Each thread is addressed by its slot: its position in package, core, thread order.  Claimed slots are stored as
+    the set bits of a single integer mask and the workload on each slot is stored as an index into a compact table of
+    workload ids.  Cores and packages own contiguous ranges of slots, so their empty and claimed queries are mask
+    operations and popcounts rather than walks over thread objects.
+
+    A reverse index maps each workload to the mask of slots it holds, so finding a workload's threads, or whether it
+    is present on a given core or package, costs time proportional to the workload's own footprint.
+
+    A 64 bit Zobrist fingerprint of the placement is kept as the XOR of a pseudo-random key per claimed (slot,
+    workload) pair, so it is updated in O(1) by every claim and free.  Equal placements have equal fingerprints
+    regardless of the order of the changes which produced them.
+
+    Every claim and free increments a version number.  Once a placement layout has been set, the placement is also
+    kept as a persistent tree of tuples (packages of cores of workload ids) which is path-copied on every change, so
+    it can be handed out as an immutable snapshot in O(1).
+
+    Cores and packages also register their slot ranges as groups.  The empty thread count of every group is maintained
+    as threads are claimed and freed, and pushed into the EmptiestHeap (if any) which ranks the group against its
+    siblings.
+    """
+
+    def __init__(self, threads):
+        self.__threads = threads
+        self.__claimed_mask = 0
+        self.__workload_indices = array('i', [FREE_INDEX] * len(threads))
+
+        self.__workload_ids = []
+        self.__workload_hashes = []
+        self.__workload_thread_counts = []
+        self.__workload_masks = []
+        self.__workload_indices_by_id = {}
+        self.__free_workload_indices = []
+
+        self.__slot_groups = [[] for _ in threads]
+        self.__group_empty_counts = []
+        self.__group_heap_positions = []
+
+        self.__version = 0
+        self.__fingerprint = 0
+        self.__placement = None
+        self.__placement_positions = None
+
+        for slot, thread in enumerate(threads):
+            if thread.is_claimed():
+                self.claim(slot, thread.get_workload_id())
+            thread.set_occupancy(self, slot)
+
+    def get_threads(self):
+        return self.__threads
+
+    def get_thread_count(self):
+        return len(self.__threads)
+
+    def get_claimed_mask(self):
+        return self.__claimed_mask
+
+    def get_threads_in_mask(self, mask):
+        return [self.__threads[slot] for slot in get_bit_indices(mask)]
+
+    def get_workload_id(self, slot):
+        index = self.__workload_indices[slot]
+        if index == FREE_INDEX:
+            return None
+
+        return self.__workload_ids[index]
+
+    def get_workload_ids(self):
+        return set(self.__workload_indices_by_id.keys())
+
+    def get_workload_indices(self):
+        return self.__workload_indices
+
+    def get_workload_id_table(self):
+        return self.__workload_ids
+
+    def get_workload_mask(self, workload_id):
+        index = self.__workload_indices_by_id.get(workload_id, None)
+        if index is None:
+            return 0
+
+        return self.__workload_masks[index]
+
+    def get_workload_thread_count(self, workload_id):
+        index = self.__workload_indices_by_id.get(workload_id, None)
+        if index is None:
+            return 0
+
+        return self.__workload_thread_counts[index]
+
+    def add_group(self, offset, count):
+        group = len(self.__group_empty_counts)
+        self.__group_empty_counts.append(get_bit_count(get_range_mask(offset, count) & ~self.__claimed_mask))
+        self.__group_heap_positions.append(None)
+
+        for slot in range(offset, offset + count):
+            self.__slot_groups[slot].append(group)
+
+        return group
+
+    def add_heap(self, groups):
+        heap = EmptiestHeap([self.__group_empty_counts[group] for group in groups])
+        for position, group in enumerate(groups):
+            self.__group_heap_positions[group] = (heap, position)
+
+        return heap
+
+    def get_group_empty_count(self, group):
+        return self.__group_empty_counts[group]
+
+    def set_placement_layout(self, core_thread_counts):
+        """
+        :param core_thread_counts: a list, per package, of the thread count of each of its cores
+        """
+        placement = []
+        positions = []
+        slot = 0
+        for p_i, thread_counts in enumerate(core_thread_counts):
+            cores = []
+            for c_i, thread_count in enumerate(thread_counts):
+                cores.append(tuple([self.get_workload_id(s) for s in range(slot, slot + thread_count)]))
+                positions += [(p_i, c_i, t_i) for t_i in range(thread_count)]
+                slot += thread_count
+            placement.append(tuple(cores))
+
+        self.__placement = tuple(placement)
+        self.__placement_positions = positions
+
+    def get_placement(self):
+        return self.__placement
+
+    def get_version(self):
+        return self.__version
+
+    def get_fingerprint(self):
+        return self.__fingerprint
+
+    def claim(self, slot, workload_id):
+        current_workload_id = self.get_workload_id(slot)
+        if current_workload_id == workload_id:
+            return
+
+        if current_workload_id is not None:
+            self.free(slot)
+
+        index = self.__get_workload_index(workload_id)
+        self.__workload_indices[slot] = index
+        self.__workload_thread_counts[index] += 1
+        self.__workload_masks[index] |= 1 << slot
+        self.__claimed_mask |= 1 << slot
+        self.__fingerprint ^= get_placement_key(slot, self.__workload_hashes[index])
+        self.__update_group_empty_counts(slot, -1)
+        self.__update_placement(slot, workload_id)
+
+    def free(self, slot):
+        index = self.__workload_indices[slot]
+        if index == FREE_INDEX:
+            return
+
+        self.__workload_indices[slot] = FREE_INDEX
+        self.__claimed_mask &= ~(1 << slot)
+        self.__fingerprint ^= get_placement_key(slot, self.__workload_hashes[index])
+        self.__update_group_empty_counts(slot, 1)
+        self.__update_placement(slot, None)
+
+        self.__workload_thread_counts[index] -= 1
+        self.__workload_masks[index] &= ~(1 << slot)
+        if self.__workload_thread_counts[index] == 0:
+            self.__workload_indices_by_id.pop(self.__workload_ids[index])
+            self.__workload_ids[index] = None
+            self.__free_workload_indices.append(index)
+
+    def __update_group_empty_counts(self, slot, change):
+        for group in self.__slot_groups[slot]:
+            self.__group_empty_counts[group] += change
+
+            heap_position = self.__group_heap_positions[group]
+            if heap_position is not None:
+                heap, position = heap_position
+                heap.update(position, self.__group_empty_counts[group])
+
+    def __update_placement(self, slot, workload_id):
+        self.__version += 1
+        if self.__placement is None:
+            return
+
+        p_i, c_i, t_i = self.__placement_positions[slot]
+        package = self.__placement[p_i]
+        core = package[c_i]
+
+        core = core[:t_i] + (workload_id,) + core[t_i + 1:]
+        package = package[:c_i] + (core,) + package[c_i + 1:]
+        self.__placement = self.__placement[:p_i] + (package,) + self.__placement[p_i + 1:]
+
+    def __get_workload_index(self, workload_id):
+        index = self.__workload_indices_by_id.get(workload_id, None)
+        if index is not None:
+            return index
+
+        if len(self.__free_workload_indices) > 0:
+            index = self.__free_workload_indices.pop()
+            self.__workload_ids[index] = workload_id
+            self.__workload_hashes[index] = get_workload_hash(workload_id)
+        else:
+            index = len(self.__workload_ids)
+            self.__workload_ids.append(workload_id)
+            self.__workload_hashes.append(get_workload_hash(workload_id))
+            self.__workload_thread_counts.append(0)
+            self.__workload_masks.append(0)
+
+        self.__workload_indices_by_id[workload_id] = index
+        return index
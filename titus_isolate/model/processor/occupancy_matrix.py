@@ -0,0 +1,133 @@
+import numpy as np
+
+from titus_isolate.model.processor.occupancy import FREE_INDEX
+
+# Matches no slot, free or claimed
+UNKNOWN_INDEX = FREE_INDEX - 1
+
+
+def get_occupancy_matrix(topology, workload_indices, workload_ids):
+    """
+    :param topology: a tuple of (package id, tuple of (core id, tuple of thread ids)) as kept by a Cpu
+    :param workload_indices: the workload index of each slot, FREE_INDEX for empty slots
+    :param workload_ids: the table of workload ids, None marks unused rows
+    """
+    return OccupancyMatrix(
+        workload_indices,
+        workload_ids,
+        [t_id for _, cores in topology for _, thread_ids in cores for t_id in thread_ids],
+        [[len(thread_ids) for _, thread_ids in cores] for _, cores in topology],
+        [p_id for p_id, _ in topology],
+        [[c_id for c_id, _ in cores] for _, cores in topology])
+
+
+class OccupancyMatrix:
+    """
+    A read-only NumPy view of which workload holds every thread of a processor tree.
+
+    Threads are addressed by slot, their position in package, core, thread order.  Each slot holds the index of its
+    workload in a table of workload ids, or FREE_INDEX.  Cores and packages own contiguous ranges of slots, so per-core
+    and per-package questions are answered with reductions over those ranges instead of walks over thread objects.
+
+    The one-hot workloads x threads matrix is built on first use.  Rows of the table which no longer hold a workload
+    are all zero.
+    """
+
+    def __init__(self, workload_indices, workload_ids, thread_ids, core_thread_counts, package_ids, core_ids):
+        """
+        :param workload_indices: the workload index of each slot, FREE_INDEX for empty slots
+        :param workload_ids: the table of workload ids, None marks unused rows
+        :param thread_ids: the thread id of each slot
+        :param core_thread_counts: a list, per package, of the thread count of each of its cores
+        :param package_ids: the id of each package
+        :param core_ids: a list, per package, of the id of each of its cores
+        """
+        self.__workload_indices = np.array(workload_indices, dtype=np.int32)
+        self.__workload_ids = list(workload_ids)
+        self.__thread_ids = np.asarray(thread_ids, dtype=np.int64)
+        self.__core_thread_counts = core_thread_counts
+        self.__package_ids = list(package_ids)
+        self.__core_labels = ["{}:{}".format(p_id, c_id) for p_id, c_ids in zip(package_ids, core_ids) for c_id in c_ids]
+
+        core_sizes = [count for counts in core_thread_counts for count in counts]
+        package_sizes = [sum(counts) for counts in core_thread_counts]
+        self.__core_offsets = np.cumsum([0] + core_sizes[:-1])
+        self.__package_offsets = np.cumsum([0] + package_sizes[:-1])
+        self.__workload_rows = {w_id: row for row, w_id in enumerate(self.__workload_ids) if w_id is not None}
+
+        self.__one_hot = None
+
+    def get_workload_indices(self):
+        """
+        :return: the workload index of each slot, FREE_INDEX for empty slots
+        """
+        return self.__workload_indices
+
+    def get_workload_index_array(self):
+        """
+        :return: the workload indices shaped packages x cores x threads
+        :raises ValueError: if packages or cores differ in size
+        """
+        core_counts = set([len(counts) for counts in self.__core_thread_counts])
+        thread_counts = set([count for counts in self.__core_thread_counts for count in counts])
+        if len(core_counts) != 1 or len(thread_counts) != 1:
+            raise ValueError("Packages and cores must be uniform to shape a workload index array.")
+
+        return self.__workload_indices.reshape(len(self.__core_thread_counts), core_counts.pop(), thread_counts.pop())
+
+    def get_workload_ids(self):
+        """
+        :return: the workload id table indexed by the values of get_workload_indices
+        """
+        return self.__workload_ids
+
+    def get_thread_ids(self):
+        return self.__thread_ids
+
+    def get_one_hot(self):
+        """
+        :return: a workloads x threads matrix with a 1 where the workload of the row holds the thread of the column
+        """
+        if self.__one_hot is None:
+            rows = np.arange(len(self.__workload_ids), dtype=np.int32)
+            self.__one_hot = (rows[:, np.newaxis] == self.__workload_indices[np.newaxis, :]).astype(np.int32)
+
+        return self.__one_hot
+
+    def get_placement_vectors(self, workload_ids):
+        """
+        :return: a matrix with one row of 0s and 1s over the threads for each of the given workloads, in order.  Unknown
+        workloads get a row of 0s.
+        """
+        rows = np.array([self.__workload_rows.get(w_id, UNKNOWN_INDEX) for w_id in workload_ids], dtype=np.int32)
+        return (rows[:, np.newaxis] == self.__workload_indices[np.newaxis, :]).astype(np.int32)
+
+    def get_workload_package_counts(self):
+        """
+        :return: a workloads x packages matrix of how many threads each workload holds on each package
+        """
+        return np.add.reduceat(self.get_one_hot(), self.__package_offsets, axis=1)
+
+    def get_workload_core_counts(self):
+        """
+        :return: a workloads x cores matrix of how many threads each workload holds on each core
+        """
+        return np.add.reduceat(self.get_one_hot(), self.__core_offsets, axis=1)
+
+    def get_cross_package_violations(self):
+        package_counts = self.get_workload_package_counts() > 0
+        rows = np.nonzero(package_counts.sum(axis=1) > 1)[0]
+        return {self.__workload_ids[row]: [self.__package_ids[p] for p in np.nonzero(package_counts[row])[0]]
+                for row in rows}
+
+    def get_cross_package_violation_count(self):
+        return int(np.count_nonzero((self.get_workload_package_counts() > 0).sum(axis=1) > 1))
+
+    def get_shared_core_violations(self):
+        core_counts = self.get_workload_core_counts() > 0
+        cores = np.nonzero(core_counts.sum(axis=0) > 1)[0]
+        return {self.__core_labels[core]: [self.__workload_ids[row] for row in np.nonzero(core_counts[:, core])[0]]
+                for core in cores}
+
+    def get_shared_core_violation_count(self):
+        return int(np.count_nonzero((self.get_workload_core_counts() > 0).sum(axis=0) > 1))
@@ -1,6 +1,4 @@
-from functools import reduce
-
-from titus_isolate.model.processor import utils
+from titus_isolate.model.processor.occupancy import Occupancy, get_range_mask
 
 
 class Package:
@@ -10,15 +8,66 @@ class Package:
 
         self.__identifier = identifier
         self.__cores = cores
+        self.__threads = [thread for core in cores for thread in core.get_threads()]
+        self.__occupancy = None
+        self.__mask = None
+        self.__group = None
+        self.__core_heap = None
 
     def get_id(self):
         return self.__identifier
 
+    def set_occupancy(self, occupancy, offset):
+        self.__occupancy = occupancy
+        self.__mask = get_range_mask(offset, len(self.__threads))
+        self.__group = occupancy.add_group(offset, len(self.__threads))
+
+        core_groups = []
+        for core in self.__cores:
+            core_groups.append(core.set_occupancy(occupancy, offset))
+            offset += len(core.get_threads())
+        self.__core_heap = occupancy.add_heap(core_groups)
+
+        return self.__group
+
     def get_cores(self):
         return self.__cores
 
+    def get_emptiest_core(self):
+        self.__get_occupancy()
+        return self.__cores[self.__core_heap.get_emptiest()]
+
     def get_threads(self):
-        return reduce(list.__add__, [core.get_threads() for core in self.get_cores()])
+        return self.__threads
 
     def get_empty_threads(self):
-        return utils.get_empty_threads(self.get_threads())
+        occupancy = self.__get_occupancy()
+        return occupancy.get_threads_in_mask(self.__mask & ~occupancy.get_claimed_mask())
+
+    def get_claimed_threads(self):
+        occupancy = self.__get_occupancy()
+        return occupancy.get_threads_in_mask(self.__mask & occupancy.get_claimed_mask())
+
+    def get_workload_threads(self, workload_id):
+        occupancy = self.__get_occupancy()
+        return occupancy.get_threads_in_mask(self.__mask & occupancy.get_workload_mask(workload_id))
+
+    def has_workload(self, workload_id):
+        occupancy = self.__get_occupancy()
+        return self.__mask & occupancy.get_workload_mask(workload_id) != 0
+
+    def get_empty_thread_count(self):
+        return self.__get_occupancy().get_group_empty_count(self.__group)
+
+    def get_claimed_thread_count(self):
+        return len(self.__threads) - self.get_empty_thread_count()
+
+    def __get_occupancy(self):
+        """
+        The occupancy is shared with the CPU, which binds it.  A package used on its own, outside of a CPU, binds one of
+        its own on first use.
+        """
+        if self.__occupancy is None:
+            self.set_occupancy(Occupancy(self.__threads), 0)
+
+        return self.__occupancy
@@ -0,0 +1,215 @@
+from collections import defaultdict
+
+from titus_isolate.model.processor.occupancy import FREE_INDEX
+from titus_isolate.model.processor.occupancy_matrix import get_occupancy_matrix
+
+
+class ThreadSnapshot:
+    def __init__(self, processor_id, workload_id):
+        self.__processor_id = processor_id
+        self.__workload_id = workload_id
+
+    def get_id(self):
+        return self.__processor_id
+
+    def get_workload_id(self):
+        return self.__workload_id
+
+    def is_claimed(self):
+        return self.__workload_id is not None
+
+
+class _NodeSnapshot:
+    """
+    Read-only queries shared by the core, package and CPU snapshots, answered by walking the node's threads.
+    """
+
+    def get_threads(self):
+        raise NotImplementedError()
+
+    def get_empty_threads(self):
+        return [t for t in self.get_threads() if not t.is_claimed()]
+
+    def get_claimed_threads(self):
+        return [t for t in self.get_threads() if t.is_claimed()]
+
+    def get_empty_thread_count(self):
+        return len(self.get_empty_threads())
+
+    def get_claimed_thread_count(self):
+        return len(self.get_claimed_threads())
+
+    def get_workload_threads(self, workload_id):
+        return [t for t in self.get_threads() if t.get_workload_id() == workload_id]
+
+    def has_workload(self, workload_id):
+        return len(self.get_workload_threads(workload_id)) > 0
+
+
+class CoreSnapshot(_NodeSnapshot):
+    def __init__(self, identifier, thread_ids, workload_ids):
+        self.__identifier = identifier
+        self.__threads = [ThreadSnapshot(t_id, w_id) for t_id, w_id in zip(thread_ids, workload_ids)]
+
+    def get_id(self):
+        return self.__identifier
+
+    def get_threads(self):
+        return self.__threads
+
+
+class PackageSnapshot(_NodeSnapshot):
+    def __init__(self, identifier, cores):
+        self.__identifier = identifier
+        self.__cores = cores
+        self.__threads = [thread for core in cores for thread in core.get_threads()]
+
+    def get_id(self):
+        return self.__identifier
+
+    def get_cores(self):
+        return self.__cores
+
+    def get_threads(self):
+        return self.__threads
+
+
+class DomainSnapshot(_NodeSnapshot):
+    def __init__(self, identifier, threads):
+        self.__identifier = identifier
+        self.__threads = threads
+
+    def get_id(self):
+        return self.__identifier
+
+    def get_threads(self):
+        return self.__threads
+
+
+class CpuSnapshot(_NodeSnapshot):
+    """
+    An immutable, versioned view of a Cpu's placement.
+
+    The placement is a persistent tree of tuples (packages of cores of workload ids) maintained by the Cpu's
+    Occupancy.  Claiming or freeing a thread copies only the core and package tuples on its path, so taking a snapshot
+    is O(1) and consecutive snapshots share every untouched node.  Package, core and thread views are only built when
+    a reader asks for them, and never change afterwards, so snapshots may be read without holding any lock.
+    """
+
+    def __init__(self, topology, placement, version, fingerprint=0, numa_topology=(), llc_topology=()):
+        self.__topology = topology
+        self.__placement = placement
+        self.__version = version
+        self.__fingerprint = fingerprint
+        self.__numa_topology = numa_topology
+        self.__llc_topology = llc_topology
+        self.__packages = None
+        self.__workload_ids_to_thread_ids = None
+        self.__occupancy_matrix = None
+
+    def get_version(self):
+        return self.__version
+
+    def fingerprint(self):
+        return self.__fingerprint
+
+    def get_placement(self):
+        return self.__placement
+
+    def get_packages(self):
+        if self.__packages is None:
+            packages = []
+            for (p_id, core_topology), core_placements in zip(self.__topology, self.__placement):
+                cores = [CoreSnapshot(c_id, thread_ids, workload_ids)
+                         for (c_id, thread_ids), workload_ids in zip(core_topology, core_placements)]
+                packages.append(PackageSnapshot(p_id, cores))
+            self.__packages = packages
+
+        return self.__packages
+
+    def get_threads(self):
+        return [thread for package in self.get_packages() for thread in package.get_threads()]
+
+    def get_occupancy_matrix(self):
+        if self.__occupancy_matrix is None:
+            workload_ids = []
+            workload_indices = []
+            indices_by_id = {}
+            for package in self.__placement:
+                for core in package:
+                    for workload_id in core:
+                        if workload_id is None:
+                            workload_indices.append(FREE_INDEX)
+                            continue
+
+                        if workload_id not in indices_by_id:
+                            indices_by_id[workload_id] = len(workload_ids)
+                            workload_ids.append(workload_id)
+                        workload_indices.append(indices_by_id[workload_id])
+
+            self.__occupancy_matrix = get_occupancy_matrix(self.__topology, workload_indices, workload_ids)
+
+        return self.__occupancy_matrix
+
+    def remap(self, thread_id_to_workload_id):
+        """
+        :return: a snapshot of the same CPU in which threads are claimed by the given mapping instead, e.g. to evaluate
+        a proposed placement before applying it.  It describes no real state of the CPU, so its version and
+        fingerprint are None.
+        """
+        placement = tuple([
+            tuple([tuple([thread_id_to_workload_id.get(t_id, None) for t_id in thread_ids])
+                   for _, thread_ids in core_topology])
+            for _, core_topology in self.__topology])
+        return CpuSnapshot(self.__topology, placement, None, None, self.__numa_topology, self.__llc_topology)
+
+    def get_numa_nodes(self):
+        return self.__get_domains(self.__numa_topology)
+
+    def get_llcs(self):
+        return self.__get_domains(self.__llc_topology)
+
+    def __get_domains(self, domain_topology):
+        threads = {t.get_id(): t for t in self.get_threads()}
+        return [DomainSnapshot(d_id, [threads[t_id] for t_id in thread_ids]) for d_id, thread_ids in domain_topology]
+
+    def get_workload_ids(self):
+        return set(self.get_workload_ids_to_thread_ids().keys())
+
+    def get_workload_ids_to_thread_ids(self):
+        if self.__workload_ids_to_thread_ids is None:
+            res = defaultdict(list)
+            for t in self.get_claimed_threads():
+                res[t.get_workload_id()].append(t.get_id())
+            self.__workload_ids_to_thread_ids = res
+
+        return self.__workload_ids_to_thread_ids
+
+    def get_workload_threads(self, workload_id):
+        thread_ids = set(self.get_workload_ids_to_thread_ids().get(workload_id, []))
+        return [t for t in self.get_threads() if t.get_id() in thread_ids]
+
+    def has_workload(self, workload_id):
+        return workload_id in self.get_workload_ids_to_thread_ids()
+
+    def get_changed_workload_ids(self, other):
+        """
+        Returns the ids of workloads present on any core whose placement differs between this snapshot and the other.
+
+        Nodes shared between the two snapshots are skipped by identity, so comparing two snapshots of the same Cpu
+        costs time proportional to what changed between them.
+        """
+        workload_ids = set()
+        for package, other_package in zip(self.__placement, other.get_placement()):
+            if package is other_package or package == other_package:
+                continue
+
+            for core, other_core in zip(package, other_package):
+                if core is other_core or core == other_core:
+                    continue
+
+                workload_ids.update(core)
+                workload_ids.update(other_core)
+
+        workload_ids.discard(None)
+        return workload_ids
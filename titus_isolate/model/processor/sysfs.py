@@ -0,0 +1,157 @@
+import os
+import re
+
+from titus_isolate import log
+
+DEFAULT_SYSFS_ROOT = '/sys'
+CPU_PATH = 'devices/system/cpu'
+NODE_PATH = 'devices/system/node'
+
+CPU_DIR_PATTERN = re.compile(r'^cpu(\d+)$')
+NODE_DIR_PATTERN = re.compile(r'^node(\d+)$')
+CACHE_INDEX_DIR_PATTERN = re.compile(r'^index(\d+)$')
+
+
+def parse_cpu_list(cpu_list):
+    """
+    Parses the kernel's cpu list format, e.g. '0-3,8,10-11', into a sorted list of processor ids.
+    """
+    cpu_ids = set()
+    for cpu_range in cpu_list.strip().split(','):
+        cpu_range = cpu_range.strip()
+        if len(cpu_range) == 0:
+            continue
+
+        if '-' in cpu_range:
+            start, end = cpu_range.split('-')
+            cpu_ids.update(range(int(start), int(end) + 1))
+        else:
+            cpu_ids.add(int(cpu_range))
+
+    return sorted(cpu_ids)
+
+
+def read_value(path):
+    with open(path, 'r') as f:
+        return f.read().strip()
+
+
+def get_cpu_path(sysfs_root, *parts):
+    return os.path.join(sysfs_root, CPU_PATH, *parts)
+
+
+def get_online_cpu_ids(sysfs_root=DEFAULT_SYSFS_ROOT):
+    online_path = get_cpu_path(sysfs_root, 'online')
+    if os.path.exists(online_path):
+        return parse_cpu_list(read_value(online_path))
+
+    cpu_ids = []
+    for name in os.listdir(get_cpu_path(sysfs_root)):
+        match = CPU_DIR_PATTERN.match(name)
+        if match is not None:
+            cpu_ids.append(int(match.group(1)))
+
+    return sorted(cpu_ids)
+
+
+def get_cpu_topology(sysfs_root=DEFAULT_SYSFS_ROOT):
+    """
+    Reads the processor topology of the online CPUs from sysfs.
+
+    Threads are grouped into cores by their thread_siblings_list (or by core_id on kernels which do not expose it)
+    and cores into packages by their physical_package_id.  Packages are ordered by physical package id, cores by their
+    lowest thread id and threads by id.
+
+    :return: a list of packages, each a list of cores, each a list of thread ids
+    """
+    online_cpu_ids = set(get_online_cpu_ids(sysfs_root))
+    log.info("Found online cpus: '{}'".format(sorted(online_cpu_ids)))
+
+    cores_by_package_id = {}
+    for cpu_id in sorted(online_cpu_ids):
+        topology_path = get_cpu_path(sysfs_root, 'cpu{}'.format(cpu_id), 'topology')
+        package_id = int(read_value(os.path.join(topology_path, 'physical_package_id')))
+
+        siblings_path = os.path.join(topology_path, 'thread_siblings_list')
+        if os.path.exists(siblings_path):
+            core_key = tuple([s for s in parse_cpu_list(read_value(siblings_path)) if s in online_cpu_ids])
+        else:
+            core_key = int(read_value(os.path.join(topology_path, 'core_id')))
+
+        cores = cores_by_package_id.setdefault(package_id, {})
+        cores.setdefault(core_key, []).append(cpu_id)
+
+    return [sorted([sorted(thread_ids) for thread_ids in cores_by_package_id[p_id].values()])
+            for p_id in sorted(cores_by_package_id.keys())]
+
+
+def get_numa_topology(sysfs_root=DEFAULT_SYSFS_ROOT):
+    """
+    Reads the NUMA nodes of the online CPUs from sysfs.
+
+    :return: a list of NUMA nodes ordered by node id, each a sorted list of thread ids, or None if the kernel does not
+    expose NUMA nodes
+    """
+    node_path = os.path.join(sysfs_root, NODE_PATH)
+    if not os.path.isdir(node_path):
+        return None
+
+    online_cpu_ids = set(get_online_cpu_ids(sysfs_root))
+    nodes = {}
+    for name in os.listdir(node_path):
+        match = NODE_DIR_PATTERN.match(name)
+        if match is None:
+            continue
+
+        thread_ids = [t for t in parse_cpu_list(read_value(os.path.join(node_path, name, 'cpulist')))
+                      if t in online_cpu_ids]
+        if len(thread_ids) > 0:
+            nodes[int(match.group(1))] = thread_ids
+
+    if len(nodes) == 0:
+        return None
+
+    log.info("Found numa nodes: '{}'".format(nodes))
+    return [nodes[n_id] for n_id in sorted(nodes.keys())]
+
+
+def get_llc_topology(sysfs_root=DEFAULT_SYSFS_ROOT):
+    """
+    Reads the last level caches of the online CPUs from sysfs.
+
+    The last level cache of a thread is its highest level data or unified cache.  Threads are grouped by the
+    shared_cpu_list of that cache.
+
+    :return: a list of last level caches ordered by lowest thread id, each a sorted list of thread ids, or None if the
+    kernel does not expose cache information
+    """
+    online_cpu_ids = set(get_online_cpu_ids(sysfs_root))
+    llcs = set()
+    for cpu_id in sorted(online_cpu_ids):
+        cache_path = get_cpu_path(sysfs_root, 'cpu{}'.format(cpu_id), 'cache')
+        if not os.path.isdir(cache_path):
+            return None
+
+        llc_level = None
+        llc_thread_ids = None
+        for name in sorted(os.listdir(cache_path)):
+            index_path = os.path.join(cache_path, name)
+            if not CACHE_INDEX_DIR_PATTERN.match(name) or read_value(os.path.join(index_path, 'type')) == 'Instruction':
+                continue
+
+            level = int(read_value(os.path.join(index_path, 'level')))
+            if llc_level is None or level > llc_level:
+                llc_level = level
+                llc_thread_ids = tuple([t for t in parse_cpu_list(read_value(os.path.join(index_path, 'shared_cpu_list')))
+                                        if t in online_cpu_ids])
+
+        if llc_thread_ids is None:
+            return None
+
+        llcs.add(llc_thread_ids)
+
+    if len(llcs) == 0:
+        return None
+
+    log.info("Found last level caches: '{}'".format(sorted(llcs)))
+    return [list(thread_ids) for thread_ids in sorted(llcs)]
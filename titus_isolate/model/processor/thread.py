@@ -5,6 +5,8 @@ class Thread:
     def __init__(self, processor_id):
         self.__workload_id = None
         self.__processor_id = int(processor_id)
+        self.__occupancy = None
+        self.__slot = None
 
         if self.__processor_id < 0:
             raise ValueError("Thread processor ids must be non-negative.")
@@ -12,8 +14,14 @@ class Thread:
     def get_id(self):
         return self.__processor_id
 
+    def set_occupancy(self, occupancy, slot):
+        self.__occupancy = occupancy
+        self.__slot = slot
+
     def claim(self, workload_id):
         self.__workload_id = workload_id
+        if self.__occupancy is not None:
+            self.__occupancy.claim(self.__slot, workload_id)
 
     def get_workload_id(self):
         return self.__workload_id
@@ -21,6 +29,8 @@ class Thread:
     def free(self):
         log.debug("Releasing thread '{}' with workload '{}'".format(self.get_id(), self.__workload_id))
         self.__workload_id = None
+        if self.__occupancy is not None:
+            self.__occupancy.free(self.__slot)
 
     def is_claimed(self):
         return self.get_workload_id() is not None